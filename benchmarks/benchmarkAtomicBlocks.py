@@ -0,0 +1,38 @@
+import time
+from shapely.geometry import Polygon
+from censusData.censusBlock import CensusBlock
+from formatData.atomicBlock import AtomicBlock, createAtomicBlocksFromBlockList
+
+
+def squareCoordinates(minX, minY, size):
+    return [(minX, minY), (minX, minY + size), (minX + size, minY + size), (minX + size, minY)]
+
+
+def syntheticBlocksWithHoles(numberOfGridBlocks, holeEvery=5):
+    # a grid of square blocks, with every few blocks having a hole filled by another block
+    CensusBlock.blockTable = type(CensusBlock.blockTable)()
+    AtomicBlock.atomicBlockList = []
+    AtomicBlock.atomicBlockForBlock = {}
+    blocks = []
+    columns = int(numberOfGridBlocks ** 0.5)
+    for i in range(numberOfGridBlocks):
+        x, y = 10 * (i % columns), 10 * (i // columns)
+        holes = [squareCoordinates(x + 4, y + 4, 2)] if i % holeEvery == 0 else []
+        blocks.append(CensusBlock(countyFIPS='163', tractFIPS='{0:06}'.format(i // 1000),
+                                  blockFIPS='{0:04}'.format(i % 1000), population=1, isWater=False,
+                                  geometry=Polygon(squareCoordinates(x, y, 10), holes)))
+        if holes:
+            blocks.append(CensusBlock(countyFIPS='163', tractFIPS='{0:06}'.format(i // 1000),
+                                      blockFIPS='{0:04}'.format(5000 + i % 1000), population=1, isWater=False,
+                                      geometry=Polygon(holes[0])))
+    return blocks
+
+
+print('*** Creating atomic blocks from blocks with holes ***')
+print('{0:>10} {1:>14} {2:>10}'.format('Blocks', 'Atomic blocks', 'Seconds'))
+for gridBlockCount in [5000, 20000, 80000]:
+    blocks = syntheticBlocksWithHoles(gridBlockCount)
+    startTime = time.perf_counter()
+    atomicBlocks = createAtomicBlocksFromBlockList(blocks)
+    elapsedTime = time.perf_counter() - startTime
+    print('{0:>10} {1:>14} {2:>10.2f}'.format(len(blocks), len(atomicBlocks), elapsedTime))
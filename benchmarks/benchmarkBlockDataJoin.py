@@ -0,0 +1,37 @@
+import time
+from censusData.blockDataJoin import createBlockDataIndex, createBlockJoinMismatches, \
+    joinBlockGeometriesToBlockData, findBlockDataWithoutGeometry
+
+
+def syntheticBlockDataAndGeometries(numberOfBlocks, blocksPerTract=100):
+    existingBlockData = []
+    blockGeometries = []
+    for i in range(numberOfBlocks):
+        tractFIPS = '{0:06}'.format(i // blocksPerTract)
+        blockFIPS = '{0:04}'.format(1000 + i % blocksPerTract)
+        existingBlockData.append({'state': '26', 'county': '163', 'tract': tractFIPS, 'block': blockFIPS,
+                                  'P001001': '1'})
+        blockGeometries.append({'properties': {'STATE': '26', 'COUNTY': '163', 'TRACT': tractFIPS,
+                                               'BLOCK': blockFIPS},
+                                'geometry': None})
+    # TIGERweb doesn't return blocks in the same order as the population rows
+    blockGeometries.reverse()
+    return existingBlockData, blockGeometries
+
+
+def timeBlockDataJoin(numberOfBlocks):
+    existingBlockData, blockGeometries = syntheticBlockDataAndGeometries(numberOfBlocks)
+    startTime = time.perf_counter()
+    blockJoinMismatches = createBlockJoinMismatches()
+    blockDataIndex = createBlockDataIndex(existingBlockData, blockJoinMismatches)
+    matchedBlockKeys = set()
+    joinBlockGeometriesToBlockData(blockGeometries, blockDataIndex, matchedBlockKeys, blockJoinMismatches)
+    findBlockDataWithoutGeometry(blockDataIndex, matchedBlockKeys, blockJoinMismatches)
+    return time.perf_counter() - startTime
+
+
+print('*** Block geometry to block data join ***')
+print('{0:>10} {1:>12} {2:>16}'.format('Blocks', 'Seconds', 'Microsec/block'))
+for blockCount in [1000, 4000, 16000, 64000, 256000, 512000]:
+    elapsedSeconds = timeBlockDataJoin(blockCount)
+    print('{0:>10} {1:>12.4f} {2:>16.3f}'.format(blockCount, elapsedSeconds, elapsedSeconds / blockCount * 1e6))
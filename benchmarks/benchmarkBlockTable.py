@@ -0,0 +1,66 @@
+import time
+import tracemalloc
+from shapely.geometry import box
+from censusData.blockTable import BlockTable
+from censusData.censusBlock import CensusBlock, populationFromBlocks, getAllBlocksWithCountyFIPS
+
+
+class PerObjectCensusBlock:
+    # how blocks were stored before the block table, for comparison
+    def __init__(self, countyFIPS, tractFIPS, blockFIPS, population, isWater, geometry):
+        self.FIPS = blockFIPS
+        self.geometry = geometry
+        self.id = '{0}-{1}-{2}'.format(countyFIPS, tractFIPS, blockFIPS)
+        self.countyFIPS = countyFIPS
+        self.tractFIPS = tractFIPS
+        self.population = population
+        self.isWater = isWater
+        self.neighboringBlocks = []
+
+
+def syntheticBlockArguments(numberOfBlocks, geometries, blocksPerTract=100):
+    for i in range(numberOfBlocks):
+        yield {'countyFIPS': '{0:03}'.format(1 + 2 * (i % 83)),
+               'tractFIPS': '{0:06}'.format(i // blocksPerTract),
+               'blockFIPS': '{0:04}'.format(1000 + i % blocksPerTract),
+               'population': i % 50,
+               'isWater': False,
+               'geometry': geometries[i]}
+
+
+def bytesPerBlock(numberOfBlocks, createBlock, geometries):
+    tracemalloc.start()
+    blocks = [createBlock(**blockArguments) for blockArguments in syntheticBlockArguments(numberOfBlocks, geometries)]
+    allocatedBytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return blocks, allocatedBytes / numberOfBlocks
+
+
+def timeCall(function):
+    startTime = time.perf_counter()
+    function()
+    return time.perf_counter() - startTime
+
+
+print('*** Census block storage, excluding shared geometries ***')
+print('{0:>10} {1:>16} {2:>16} {3:>16} {4:>16}'.format('Blocks', 'Bytes/obj block', 'Bytes/table block',
+                                                       'Pop sum obj ms', 'Pop sum table ms'))
+for blockCount in [10000, 100000, 400000]:
+    geometries = [box(i, 0, i + 1, 1) for i in range(blockCount)]
+    objectBlocks, objectBytes = bytesPerBlock(blockCount, PerObjectCensusBlock, geometries)
+    CensusBlock.blockTable = BlockTable()
+    tableBlocks, tableBytes = bytesPerBlock(blockCount, CensusBlock, geometries)
+    objectSeconds = timeCall(lambda: sum(block.population for block in objectBlocks))
+    tableSeconds = timeCall(lambda: populationFromBlocks(tableBlocks))
+    print('{0:>10} {1:>16.1f} {2:>16.1f} {3:>16.2f} {4:>16.2f}'.format(blockCount, objectBytes, tableBytes,
+                                                                       objectSeconds * 1e3, tableSeconds * 1e3))
+
+print('*** County scan over {0} blocks ***'.format(len(CensusBlock.blockTable)))
+objectSeconds = timeCall(lambda: [block for block in objectBlocks if block.countyFIPS == '163'])
+tableSeconds = timeCall(lambda: getAllBlocksWithCountyFIPS('163'))
+print('per object: {0:.2f} ms, table: {1:.2f} ms'.format(objectSeconds * 1e3, tableSeconds * 1e3))
+
+print('*** Population scan over {0} blocks ***'.format(len(CensusBlock.blockTable)))
+objectSeconds = timeCall(lambda: sum(block.population for block in objectBlocks))
+tableSeconds = timeCall(lambda: CensusBlock.blockTable.totalPopulation())
+print('per object: {0:.2f} ms, table: {1:.2f} ms'.format(objectSeconds * 1e3, tableSeconds * 1e3))
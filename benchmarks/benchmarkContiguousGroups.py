@@ -0,0 +1,65 @@
+import time
+import numpy as np
+from shapely.geometry import Point
+from formatData.graphContext import GraphContext
+from formatData.graphObject import GraphObject
+from geographyHelper import findContiguousGroupsOfGraphObjects, CardinalDirection
+
+# the list based fill findContiguousGroupsOfGraphObjects used to run, for comparison on the smaller sizes
+largestListFillCount = 10000
+
+
+def listFindContiguousGroupsOfGraphObjects(graphObjects):
+    remainingObjects = graphObjects.copy()
+    contiguousObjectGroups = []
+    while remainingObjects:
+        fireFilledObjects = []
+        fireQueue = [remainingObjects[0]]
+        while fireQueue:
+            graphObject = fireQueue.pop(0)
+            remainingObjects.remove(graphObject)
+            fireFilledObjects.append(graphObject)
+            for neighborObject in graphObject.allNeighbors:
+                if neighborObject in remainingObjects and neighborObject not in fireQueue:
+                    fireQueue.append(neighborObject)
+        contiguousObjectGroups.append(fireFilledObjects)
+    return contiguousObjectGroups
+
+
+def gridOfGraphObjects(count, fractionRemoved):
+    # a square grid of rook-adjacent objects with some cells knocked out, so there are several pieces
+    sideLength = int(np.ceil(np.sqrt(count / (1 - fractionRemoved)))) + 1
+    isKept = np.random.default_rng(0).random(sideLength * sideLength) >= fractionRemoved
+    graphObjectForCell = {}
+    for cellIndex in np.flatnonzero(isKept)[:count].tolist():
+        row, column = divmod(cellIndex, sideLength)
+        graphObjectForCell[(row, column)] = GraphObject(centerOfObject=Point(column, row))
+    for (row, column), graphObject in graphObjectForCell.items():
+        for rowOffset, columnOffset, direction in ((1, 0, CardinalDirection.north), (0, -1, CardinalDirection.west),
+                                                   (0, 1, CardinalDirection.east), (-1, 0, CardinalDirection.south)):
+            neighborObject = graphObjectForCell.get((row + rowOffset, column + columnOffset))
+            if neighborObject is not None:
+                graphObject.addNeighbor(neighborObject, direction=direction)
+    return list(graphObjectForCell.values())
+
+
+def timeCall(function):
+    startTime = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - startTime) * 1000
+
+
+print('*** findContiguousGroupsOfGraphObjects on rook grids ***')
+for fractionRemoved in (0.0, 0.4):
+    for count in (100, 1000, 10000, 100000):
+        with GraphContext():
+            graphObjects = gridOfGraphObjects(count=count, fractionRemoved=fractionRemoved)
+            contiguousGroups, setMilliseconds = timeCall(lambda: findContiguousGroupsOfGraphObjects(graphObjects))
+            if len(graphObjects) <= largestListFillCount:
+                listGroups, listMilliseconds = timeCall(lambda: listFindContiguousGroupsOfGraphObjects(graphObjects))
+                assert listGroups == contiguousGroups
+                listTiming = '{0:10.2f} ms'.format(listMilliseconds)
+            else:
+                listTiming = '{0:>13}'.format('skipped')
+            print('{0:>7} objects, {1:.0%} removed, {2:>6} pieces: sets {3:9.2f} ms, lists {4}'.format(
+                len(graphObjects), fractionRemoved, len(contiguousGroups), setMilliseconds, listTiming))
@@ -0,0 +1,52 @@
+import os
+import time
+from exportData.exportData import loadDataFromFile
+from geographyHelper import CardinalDirection
+
+testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                '../tests/testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+redistrictingGroup = loadDataFromFile(filePath=testDataFilePath)[0]
+atomicBlocks = redistrictingGroup.children
+
+
+def timeCall(function, repeats=5):
+    startTime = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - startTime) / repeats * 1000
+
+
+def allNeighborsOfEveryBlock():
+    for atomicBlock in atomicBlocks:
+        atomicBlock.allNeighbors
+
+
+def isNeighborForEveryEdge():
+    for atomicBlock in atomicBlocks:
+        for neighbor in atomicBlock.allNeighbors:
+            neighbor.isNeighbor(atomicBlock)
+
+
+def removeAndAddEveryEdge():
+    for atomicBlock in atomicBlocks:
+        for direction, neighbors in ((CardinalDirection.north, atomicBlock.northernNeighbors),
+                                     (CardinalDirection.west, atomicBlock.westernNeighbors),
+                                     (CardinalDirection.east, atomicBlock.easternNeighbors),
+                                     (CardinalDirection.south, atomicBlock.southernNeighbors)):
+            for neighbor in neighbors:
+                atomicBlock.removeNeighbor(neighbor)
+                atomicBlock.addNeighbor(neighbor, direction=direction)
+
+
+def validateEveryBlock():
+    for atomicBlock in atomicBlocks:
+        atomicBlock.validateNeighborLists()
+
+
+print('*** Neighbor operations on the Charlevoix fixture: {0} atomic blocks, {1} edges ***'.format(
+    len(atomicBlocks), sum(len(atomicBlock.allNeighbors) for atomicBlock in atomicBlocks)))
+for description, function in (('allNeighbors', allNeighborsOfEveryBlock),
+                              ('isNeighbor', isNeighborForEveryEdge),
+                              ('remove and add', removeAndAddEveryEdge),
+                              ('validateNeighborLists', validateEveryBlock)):
+    print('{0:>24}: {1:8.2f} ms'.format(description, timeCall(function)))
@@ -0,0 +1,61 @@
+import random
+import resource
+import subprocess
+import sys
+import time
+from censusData.censusBlock import CensusBlock
+from geographyHelper import convertGeoJSONToShapely
+
+
+def syntheticBlockGeometries(numberOfBlocks, pointsPerRing=40):
+    random.seed(0)
+    blockGeometries = []
+    for i in range(numberOfBlocks):
+        x = -86 + (i % 1000) * 0.001
+        y = 42 + (i // 1000) * 0.001
+        ring = [[x + 0.0005 * random.random(), y + 0.001 * j / pointsPerRing] for j in range(pointsPerRing)] + \
+               [[x + 0.001, y + 0.001], [x + 0.001, y]]
+        blockGeometries.append({'type': 'Polygon', 'coordinates': [ring]})
+    return blockGeometries
+
+
+def loadBlocks(blockGeometries, createBlock):
+    startTime = time.perf_counter()
+    blocks = [createBlock(blockGeometry) for blockGeometry in blockGeometries]
+    return blocks, time.perf_counter() - startTime
+
+
+def createBlock(blockGeometry):
+    return CensusBlock(countyFIPS='029', tractFIPS='970100', blockFIPS='1000', population=1, isWater=False,
+                       geoJSONGeometry=blockGeometry)
+
+
+def createEagerBlock(blockGeometry):
+    return CensusBlock(countyFIPS='029', tractFIPS='970100', blockFIPS='1000', population=1, isWater=False,
+                       geometry=convertGeoJSONToShapely(blockGeometry))
+
+
+if len(sys.argv) == 3:
+    # one measurement per process, so peak memory isn't shared between runs
+    blockCount = int(sys.argv[2])
+    blockGeometries = syntheticBlockGeometries(blockCount)
+    baselineKilobytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.argv[1] == 'eager':
+        blocks, elapsedSeconds = loadBlocks(blockGeometries, createEagerBlock)
+    else:
+        blocks, elapsedSeconds = loadBlocks(blockGeometries, createBlock)
+    peakMegabytes = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baselineKilobytes) / 1e3
+    print('{0} {1}'.format(elapsedSeconds, peakMegabytes))
+else:
+    print('*** Loading blocks from GeoJSON ***')
+    print('{0:>10} {1:>12} {2:>12} {3:>16} {4:>16}'.format('Blocks', 'Eager sec', 'Lazy sec', 'Eager peak MB',
+                                                            'Lazy peak MB'))
+    for blockCount in [10000, 50000, 200000]:
+        measurements = {}
+        for mode in ('eager', 'lazy'):
+            output = subprocess.run([sys.executable, __file__, mode, str(blockCount)], capture_output=True, text=True,
+                                    check=True).stdout.split()
+            measurements[mode] = (float(output[-2]), float(output[-1]))
+        print('{0:>10} {1:>12.3f} {2:>12.3f} {3:>16.1f} {4:>16.1f}'.format(
+            blockCount, measurements['eager'][0], measurements['lazy'][0], measurements['eager'][1],
+            measurements['lazy'][1]))
@@ -0,0 +1,90 @@
+from censusData.geoid import packGEOIDFromFIPS, formatGEOID
+
+
+def blockKeyFromFIPS(stateFIPS, countyFIPS, tractFIPS, blockFIPS):
+    return packGEOIDFromFIPS(stateFIPS=stateFIPS, countyFIPS=countyFIPS, tractFIPS=tractFIPS, blockFIPS=blockFIPS)
+
+
+def blockKeyFromBlockData(blockData):
+    return blockKeyFromFIPS(stateFIPS=blockData['state'],
+                            countyFIPS=blockData['county'],
+                            tractFIPS=blockData['tract'],
+                            blockFIPS=blockData['block'])
+
+
+def blockKeyFromGeometryProperties(geometryProperties):
+    return blockKeyFromFIPS(stateFIPS=geometryProperties['STATE'],
+                            countyFIPS=geometryProperties['COUNTY'],
+                            tractFIPS=geometryProperties['TRACT'],
+                            blockFIPS=geometryProperties['BLOCK'])
+
+
+def createBlockJoinMismatches():
+    return {'duplicateBlockData': [],
+            'blockDataWithoutGeometry': [],
+            'geometriesWithoutBlockData': [],
+            'geometriesMatchedMoreThanOnce': []}
+
+
+def createBlockDataIndex(blockDataList, blockJoinMismatches=None):
+    blockDataIndex = {}
+    for blockData in blockDataList:
+        blockKey = blockKeyFromBlockData(blockData)
+        if blockKey in blockDataIndex:
+            if blockJoinMismatches is not None:
+                blockJoinMismatches['duplicateBlockData'].append(blockKey)
+        else:
+            blockDataIndex[blockKey] = blockData
+    return blockDataIndex
+
+
+def joinBlockGeometryToBlockData(blockGeometry, blockDataIndex, matchedBlockKeys, blockJoinMismatches):
+    blockKey = blockKeyFromGeometryProperties(blockGeometry['properties'])
+    matchingBlockData = blockDataIndex.get(blockKey)
+    if matchingBlockData is None:
+        blockJoinMismatches['geometriesWithoutBlockData'].append(blockKey)
+        return None
+    elif blockKey in matchedBlockKeys:
+        blockJoinMismatches['geometriesMatchedMoreThanOnce'].append(blockKey)
+        return None
+    matchedBlockKeys.add(blockKey)
+    matchingBlockData['geometry'] = blockGeometry['geometry']
+    return matchingBlockData
+
+
+def joinBlockGeometriesToBlockData(blockGeometries, blockDataIndex, matchedBlockKeys, blockJoinMismatches):
+    joinedBlockData = []
+    for blockGeometry in blockGeometries:
+        matchingBlockData = joinBlockGeometryToBlockData(blockGeometry=blockGeometry,
+                                                         blockDataIndex=blockDataIndex,
+                                                         matchedBlockKeys=matchedBlockKeys,
+                                                         blockJoinMismatches=blockJoinMismatches)
+        if matchingBlockData is not None:
+            joinedBlockData.append(matchingBlockData)
+    return joinedBlockData
+
+
+def findBlockDataWithoutGeometry(blockDataIndex, matchedBlockKeys, blockJoinMismatches):
+    blockJoinMismatches['blockDataWithoutGeometry'].extend(
+        blockKey for blockKey in blockDataIndex.keys() if blockKey not in matchedBlockKeys)
+
+
+def hasBlockJoinMismatches(blockJoinMismatches):
+    return any(len(mismatchedKeys) > 0 for mismatchedKeys in blockJoinMismatches.values())
+
+
+def describeBlockJoinMismatches(blockJoinMismatches, maxExamples=5):
+    descriptions = []
+    for mismatchType, mismatchedKeys in blockJoinMismatches.items():
+        if mismatchedKeys:
+            descriptions.append('{0}: {1} (e.g. {2})'.format(mismatchType,
+                                                             len(mismatchedKeys),
+                                                             [formatGEOID(blockKey) for blockKey in
+                                                              mismatchedKeys[:maxExamples]]))
+    return '; '.join(descriptions)
+
+
+def extendBlockJoinMismatches(blockJoinMismatches, otherBlockJoinMismatches):
+    for mismatchType, mismatchedKeys in otherBlockJoinMismatches.items():
+        blockJoinMismatches[mismatchType].extend(mismatchedKeys)
+
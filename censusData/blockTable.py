@@ -0,0 +1,198 @@
+import numpy as np
+from censusData.encodedGeometry import DecodedGeometryCache, decodeGeometry, polygonsFromWKB, \
+    boundsCentroidAndAreaForPolygonLists
+from censusData.fipsHierarchyIndex import FIPSHierarchyIndex
+from censusData.geoid import packGEOIDFromFIPS, geoidField, replaceGEOIDField, fipsCode, stateShift, stateBits, \
+    countyShift, countyBits, tractShift, tractBits, blockShift, blockBits, splitPartShift, splitPartBits
+
+fipsFields = (('state', stateShift, stateBits),
+              ('county', countyShift, countyBits),
+              ('tract', tractShift, tractBits),
+              ('block', blockShift, blockBits))
+
+
+def fipsFromCodeAndWidth(code, width):
+    if width == 0:
+        return None
+    return '{0:0{1}}'.format(int(code), int(width))
+
+
+class BlockTable:
+    # column store for census blocks, so a state's worth of blocks doesn't need a full Python object per block
+    def __init__(self, initialCapacity=1024, decodedGeometryCacheSize=None):
+        self.numberOfRows = 0
+        self.capacity = 0
+        self.population = np.zeros(0, dtype=np.int64)
+        self.isWater = np.zeros(0, dtype=bool)
+        self.isReleased = np.zeros(0, dtype=bool)
+        self.geoid = np.zeros(0, dtype=np.uint64)
+        # digits in each of state/county/tract/block FIPS, since codes like '0123' need their leading zeros back
+        self.fipsWidths = np.zeros((0, len(fipsFields)), dtype=np.uint8)
+        # bounds, centroid and area are filled in for many rows at once, the first time they're asked for
+        self.boundsColumn = np.zeros((0, 4), dtype=np.float64)
+        self.centroidColumn = np.zeros((0, 2), dtype=np.float64)
+        self.areaColumn = np.zeros(0, dtype=np.float64)
+        self.rowsWithStaleGeometryStats = set()
+        self.geometry = []
+        self.blocks = []
+        self.cachedFIPSHierarchyIndex = None
+        self.decodedGeometryCache = None
+        if decodedGeometryCacheSize is not None:
+            self.decodedGeometryCache = DecodedGeometryCache(maxSize=decodedGeometryCacheSize)
+        self.growToCapacity(initialCapacity)
+
+    def __len__(self):
+        return self.numberOfRows
+
+    def growToCapacity(self, capacity):
+        if capacity <= self.capacity:
+            return
+        for columnName in ('population', 'isWater', 'isReleased', 'geoid', 'fipsWidths', 'boundsColumn',
+                           'centroidColumn', 'areaColumn'):
+            column = getattr(self, columnName)
+            grownColumn = np.zeros((capacity,) + column.shape[1:], dtype=column.dtype)
+            grownColumn[:self.numberOfRows] = column[:self.numberOfRows]
+            setattr(self, columnName, grownColumn)
+        self.capacity = capacity
+
+    def appendRow(self, block, stateFIPS, countyFIPS, tractFIPS, blockFIPS, splitPart, population, isWater,
+                  geometry):
+        if self.numberOfRows == self.capacity:
+            # double the columns so appends stay amortized O(1)
+            self.growToCapacity(max(1, self.capacity * 2))
+        rowIndex = self.numberOfRows
+        self.cachedFIPSHierarchyIndex = None
+        self.geoid[rowIndex] = packGEOIDFromFIPS(stateFIPS=stateFIPS,
+                                                 countyFIPS=countyFIPS,
+                                                 tractFIPS=tractFIPS,
+                                                 blockFIPS=blockFIPS,
+                                                 splitPart=splitPart)
+        self.numberOfRows += 1
+        self.geometry.append(None)
+        self.blocks.append(block)
+        for fieldIndex, FIPS in enumerate((stateFIPS, countyFIPS, tractFIPS, blockFIPS)):
+            self.fipsWidths[rowIndex, fieldIndex] = 0 if FIPS is None else len(str(FIPS))
+        self.population[rowIndex] = population
+        self.isWater[rowIndex] = isWater
+        self.setGeometry(rowIndex, geometry)
+        return rowIndex
+
+    def GEOID(self, rowIndex):
+        return int(self.geoid[rowIndex])
+
+    def FIPS(self, rowIndex, fieldIndex):
+        fieldName, shift, bits = fipsFields[fieldIndex]
+        return fipsFromCodeAndWidth(code=geoidField(self.GEOID(rowIndex), shift, bits),
+                                    width=self.fipsWidths[rowIndex, fieldIndex])
+
+    def setFIPS(self, rowIndex, fieldIndex, FIPS):
+        fieldName, shift, bits = fipsFields[fieldIndex]
+        code = fipsCode(FIPS)
+        if code >= (1 << bits):
+            raise ValueError('{0} code {1} does not fit in {2} bits'.format(fieldName, code, bits))
+        self.cachedFIPSHierarchyIndex = None
+        self.geoid[rowIndex] = replaceGEOIDField(self.GEOID(rowIndex), shift, bits, code)
+        self.fipsWidths[rowIndex, fieldIndex] = 0 if FIPS is None else len(str(FIPS))
+
+    def splitPart(self, rowIndex):
+        return geoidField(self.GEOID(rowIndex), splitPartShift, splitPartBits)
+
+    def setGeometry(self, rowIndex, geometry):
+        # geometry can be a shapely geometry or WKB bytes, which are only decoded when the geometry is asked for
+        self.geometry[rowIndex] = geometry
+        if self.decodedGeometryCache is not None:
+            self.decodedGeometryCache.discard(rowIndex)
+        self.rowsWithStaleGeometryStats.add(rowIndex)
+
+    def updateGeometryStats(self):
+        if not self.rowsWithStaleGeometryStats:
+            return
+        staleRows = sorted(self.rowsWithStaleGeometryStats)
+        self.rowsWithStaleGeometryStats = set()
+
+        encodedRows = []
+        encodedPolygonLists = []
+        for rowIndex in staleRows:
+            geometry = self.geometry[rowIndex]
+            polygons = polygonsFromWKB(geometry) if type(geometry) is bytes else None
+            if polygons is not None:
+                encodedRows.append(rowIndex)
+                encodedPolygonLists.append(polygons)
+                continue
+            if type(geometry) is bytes:
+                geometry = decodeGeometry(geometry)
+            if geometry is None or geometry.is_empty:
+                self.boundsColumn[rowIndex] = np.nan
+                self.centroidColumn[rowIndex] = np.nan
+                self.areaColumn[rowIndex] = 0
+            else:
+                centroid = geometry.centroid
+                self.boundsColumn[rowIndex] = geometry.bounds
+                self.centroidColumn[rowIndex] = (centroid.x, centroid.y)
+                self.areaColumn[rowIndex] = geometry.area
+
+        # geometries that are still encoded don't need to be decoded, their stats come straight from the WKB
+        if encodedRows:
+            bounds, centroids, areas = boundsCentroidAndAreaForPolygonLists(encodedPolygonLists)
+            self.boundsColumn[encodedRows] = bounds
+            self.centroidColumn[encodedRows] = centroids
+            self.areaColumn[encodedRows] = areas
+
+    @property
+    def bounds(self):
+        self.updateGeometryStats()
+        return self.boundsColumn
+
+    @property
+    def centroid(self):
+        self.updateGeometryStats()
+        return self.centroidColumn
+
+    @property
+    def area(self):
+        self.updateGeometryStats()
+        return self.areaColumn
+
+    def geometryForRow(self, rowIndex):
+        geometry = self.geometry[rowIndex]
+        if type(geometry) is bytes:
+            if self.decodedGeometryCache is None:
+                # without a cache, decode once and keep the shapely geometry from then on
+                geometry = decodeGeometry(geometry)
+                self.geometry[rowIndex] = geometry
+            else:
+                geometry = self.decodedGeometryCache.get(rowIndex, geometry)
+        return geometry
+
+    def storedGeometryForRow(self, rowIndex):
+        # WKB bytes if the geometry hasn't been decoded yet
+        return self.geometry[rowIndex]
+
+    def releaseRows(self, rowIndices):
+        # drops the blocks and geometries of rows nothing uses anymore. Rows aren't reused, only their numbers stay
+        for rowIndex in rowIndices:
+            self.geometry[rowIndex] = None
+            self.blocks[rowIndex] = None
+            self.rowsWithStaleGeometryStats.discard(rowIndex)
+            if self.decodedGeometryCache is not None:
+                self.decodedGeometryCache.discard(rowIndex)
+        self.isReleased[rowIndices] = True
+        self.cachedFIPSHierarchyIndex = None
+
+    def liveRowIndices(self):
+        return np.flatnonzero(~self.isReleased[:self.numberOfRows])
+
+    def fipsHierarchyIndex(self):
+        # built once and reused until blocks are added, released or their FIPS codes change
+        if self.cachedFIPSHierarchyIndex is None:
+            if self.isReleased[:self.numberOfRows].any():
+                self.cachedFIPSHierarchyIndex = FIPSHierarchyIndex(self.geoid[:self.numberOfRows],
+                                                                   rowIndices=self.liveRowIndices())
+            else:
+                self.cachedFIPSHierarchyIndex = FIPSHierarchyIndex(self.geoid[:self.numberOfRows])
+        return self.cachedFIPSHierarchyIndex
+
+    def totalPopulation(self, rowIndices=None):
+        if rowIndices is None:
+            return int(self.population[:self.numberOfRows][~self.isReleased[:self.numberOfRows]].sum())
+        return int(self.population[rowIndices].sum())
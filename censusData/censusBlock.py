@@ -1,23 +1,128 @@
+import numpy as np
+from operator import attrgetter
 from tqdm import tqdm
-from censusData.censusGeography import CensusGeography
+from censusData.blockTable import BlockTable, fipsFromCodeAndWidth
+from censusData.censusGeography import CensusGeography, encodedGeometryFromArguments
+from censusData.geoid import unpackGEOID, fipsCode
 
 
 class CensusBlock(CensusGeography):
-    def __init__(self, countyFIPS, tractFIPS, blockFIPS, population, isWater, geoJSONGeometry=None, geometry=None):
-        CensusGeography.__init__(self, FIPS=blockFIPS, geoJSONGeometry=geoJSONGeometry, geometry=geometry)
-        self.id = uniqueBlockIdentifierFromFIPS(countyFIPS, tractFIPS, self.FIPS)
-        self.countyFIPS = countyFIPS
-        self.tractFIPS = tractFIPS
-        self.population = population
-        self.isWater = isWater
-        self.neighboringBlocks = []
-        CensusBlock.blockList.append(self)
+    # a view onto a row of a BlockTable, which is where the block's data actually lives
+    __slots__ = ('table', 'rowIndex')
 
-    blockList = []
+    def __init__(self, countyFIPS, tractFIPS, blockFIPS, population, isWater, geoJSONGeometry=None, geometry=None,
+                 stateFIPS=None, splitPart=0, blockTable=None):
+        self.table = CensusBlock.blockTable if blockTable is None else blockTable
+        self.rowIndex = self.table.appendRow(block=self,
+                                             stateFIPS=stateFIPS,
+                                             countyFIPS=countyFIPS,
+                                             tractFIPS=tractFIPS,
+                                             blockFIPS=blockFIPS,
+                                             splitPart=splitPart,
+                                             population=population,
+                                             isWater=isWater,
+                                             geometry=encodedGeometryFromArguments(geoJSONGeometry=geoJSONGeometry,
+                                                                                   geometry=geometry))
 
+    blockTable = BlockTable()
 
-def uniqueBlockIdentifierFromFIPS(countyFIPS, tractFIPS, blockFIPS):
-    return '{0}-{1}-{2}'.format(countyFIPS, tractFIPS, blockFIPS)
+    def __getstate__(self):
+        return {'GEOID': self.id,
+                'fipsWidths': tuple(int(width) for width in self.table.fipsWidths[self.rowIndex]),
+                'population': self.population,
+                'isWater': self.isWater,
+                'geometry': self.table.storedGeometryForRow(self.rowIndex)}
+
+    def __setstate__(self, state):
+        if 'GEOID' in state:
+            stateCode, countyCode, tractCode, blockCode, splitPart = unpackGEOID(state['GEOID'])
+            stateFIPS, countyFIPS, tractFIPS, blockFIPS = [
+                fipsFromCodeAndWidth(code, width)
+                for code, width in zip((stateCode, countyCode, tractCode, blockCode), state['fipsWidths'])]
+        else:
+            # older pickles have FIPS strings, with split parts appended to the block FIPS.
+            # they also have 'id' and 'neighboringBlocks', which are derived or no longer used
+            stateFIPS = None
+            countyFIPS = state['countyFIPS']
+            tractFIPS = state['tractFIPS']
+            blockFIPS = state['FIPS']
+            splitPart = 0
+            if len(blockFIPS) > 4:
+                blockFIPS, splitPart = blockFIPS[:4], int(blockFIPS[4:])
+        self.table = CensusBlock.blockTable
+        self.rowIndex = self.table.appendRow(block=self,
+                                             stateFIPS=stateFIPS,
+                                             countyFIPS=countyFIPS,
+                                             tractFIPS=tractFIPS,
+                                             blockFIPS=blockFIPS,
+                                             splitPart=splitPart,
+                                             population=state['population'],
+                                             isWater=state['isWater'],
+                                             geometry=state['geometry'])
+
+    @property
+    def stateFIPS(self):
+        return self.table.FIPS(self.rowIndex, 0)
+
+    @stateFIPS.setter
+    def stateFIPS(self, stateFIPS):
+        self.table.setFIPS(self.rowIndex, 0, stateFIPS)
+
+    @property
+    def countyFIPS(self):
+        return self.table.FIPS(self.rowIndex, 1)
+
+    @countyFIPS.setter
+    def countyFIPS(self, countyFIPS):
+        self.table.setFIPS(self.rowIndex, 1, countyFIPS)
+
+    @property
+    def tractFIPS(self):
+        return self.table.FIPS(self.rowIndex, 2)
+
+    @tractFIPS.setter
+    def tractFIPS(self, tractFIPS):
+        self.table.setFIPS(self.rowIndex, 2, tractFIPS)
+
+    @property
+    def FIPS(self):
+        return self.table.FIPS(self.rowIndex, 3)
+
+    @FIPS.setter
+    def FIPS(self, FIPS):
+        self.table.setFIPS(self.rowIndex, 3, FIPS)
+
+    @property
+    def splitPart(self):
+        return self.table.splitPart(self.rowIndex)
+
+    @property
+    def id(self):
+        return self.table.GEOID(self.rowIndex)
+
+    @property
+    def population(self):
+        return int(self.table.population[self.rowIndex])
+
+    @population.setter
+    def population(self, population):
+        self.table.population[self.rowIndex] = population
+
+    @property
+    def isWater(self):
+        return bool(self.table.isWater[self.rowIndex])
+
+    @isWater.setter
+    def isWater(self, isWater):
+        self.table.isWater[self.rowIndex] = isWater
+
+    @property
+    def geometry(self):
+        return self.table.geometryForRow(self.rowIndex)
+
+    @geometry.setter
+    def geometry(self, geometry):
+        self.table.setGeometry(self.rowIndex, geometry)
 
 
 def createCensusBlocksFromRawData(rawBlockData):
@@ -35,8 +140,38 @@ def createCensusBlocksFromRawData(rawBlockData):
 
 
 def populationFromBlocks(blockList):
+    try:
+        blockTables = set(map(attrgetter('table'), blockList))
+        rowIndices = np.fromiter(map(attrgetter('rowIndex'), blockList), dtype=np.int64, count=len(blockList))
+    except AttributeError:
+        # not census blocks, e.g. atomic blocks or redistricting groups
+        return sum(block.population for block in blockList)
+    if len(blockTables) == 1:
+        return blockTables.pop().totalPopulation(rowIndices)
     return sum(block.population for block in blockList)
 
 
-def getAllBlocksWithCountyFIPS(countyFIPS):
-    return [block for block in CensusBlock.blockList if block.countyFIPS == countyFIPS]
\ No newline at end of file
+def getAllBlocksWithCountyFIPS(countyFIPS, stateFIPS=None):
+    blockTable = CensusBlock.blockTable
+    fipsHierarchyIndex = blockTable.fipsHierarchyIndex()
+    if stateFIPS is None:
+        rowIndices = fipsHierarchyIndex.rowsWithCountyCode(fipsCode(countyFIPS))
+    else:
+        rowIndices = fipsHierarchyIndex.rowsInCounty(stateCode=fipsCode(stateFIPS), countyCode=fipsCode(countyFIPS))
+    return [blockTable.blocks[rowIndex] for rowIndex in rowIndices]
+
+
+def getAllBlocksWithTractFIPS(stateFIPS, countyFIPS, tractFIPS):
+    blockTable = CensusBlock.blockTable
+    rowIndices = blockTable.fipsHierarchyIndex().rowsInTract(stateCode=fipsCode(stateFIPS),
+                                                             countyCode=fipsCode(countyFIPS),
+                                                             tractCode=fipsCode(tractFIPS))
+    return [blockTable.blocks[rowIndex] for rowIndex in rowIndices]
+
+
+def getBlockWithGEOID(geoid):
+    blockTable = CensusBlock.blockTable
+    rowIndex = blockTable.fipsHierarchyIndex().rowWithGEOID(geoid)
+    if rowIndex is None:
+        return None
+    return blockTable.blocks[rowIndex]
@@ -3,12 +3,14 @@ from censusData.censusGeography import CensusGeography
 
 class County(CensusGeography):
     def __init__(self, countyName, countyFIPS, countyGeoJSONGeometry):
-        CensusGeography.__init__(self, FIPS=countyFIPS, geoJSONGeometry=countyGeoJSONGeometry)
+        CensusGeography.__init__(self, FIPS=countyFIPS, geoJSONGeometry=countyGeoJSONGeometry, geometry=None)
         self.name = countyName
         self.blocks = []
         County.countyList.append(self)
+        County.countyDict[countyFIPS] = self
 
     countyList = []
+    countyDict = {}
 
 
 def createCountiesFromRawData(rawCountyData):
@@ -24,5 +26,5 @@ def createCountiesFromRawData(rawCountyData):
 
 
 def getCountyWithFIPS(countyFIPS):
-    return next((item for item in County.countyList if item.FIPS == countyFIPS), None)
+    return County.countyDict.get(countyFIPS)
 
@@ -1,15 +1,39 @@
-import geographyHelper
+from censusData.encodedGeometry import encodeGeoJSONGeometry, decodeGeometry
 
 class CensusGeography:
-    def __init__(self, FIPS, geoJSONGeometry, geometry):
-        if geoJSONGeometry is None and geometry is None:
-            raise RuntimeError('Need to init with a geometry')
-        if geoJSONGeometry is not None and geometry is not None:
-            raise RuntimeError('Need to init with a single geometry')
+    # no instance dict here, so subclasses like CensusBlock can be slot-only
+    __slots__ = ()
 
+    def __init__(self, FIPS, geoJSONGeometry, geometry):
         self.FIPS = FIPS
+        self.geometry = encodedGeometryFromArguments(geoJSONGeometry=geoJSONGeometry, geometry=geometry)
+
+    def __setstate__(self, state):
+        # older pickles have the decoded geometry under 'geometry'
+        if 'geometry' in state:
+            state = dict(state)
+            state['storedGeometry'] = state.pop('geometry')
+        self.__dict__.update(state)
+
+    @property
+    def geometry(self):
+        # geometries are stored as WKB until first use
+        if type(self.storedGeometry) is bytes:
+            self.storedGeometry = decodeGeometry(self.storedGeometry)
+        return self.storedGeometry
+
+    @geometry.setter
+    def geometry(self, geometry):
+        self.storedGeometry = geometry
+
+
+def encodedGeometryFromArguments(geoJSONGeometry, geometry):
+    if geoJSONGeometry is None and geometry is None:
+        raise RuntimeError('Need to init with a geometry')
+    if geoJSONGeometry is not None and geometry is not None:
+        raise RuntimeError('Need to init with a single geometry')
 
-        if geometry is None:
-            self.geometry = geographyHelper.convertGeoJSONToShapely(geoJSONGeometry)
-        else:
-            self.geometry = geometry
+    if geometry is None:
+        return encodeGeoJSONGeometry(geoJSONGeometry)
+    else:
+        return geometry
@@ -0,0 +1,123 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+censusAPIBaseURL = 'https://api.census.gov/data'
+tigerWebBlockLayerURL = \
+    'https://tigerweb.geo.census.gov/arcgis/rest/services/Census2010/tigerWMS_Census2010/MapServer/14'
+
+
+def requestJSON(url, parameters, timeout):
+    requestURL = '{0}?{1}'.format(url, urlencode(parameters))
+    with urlopen(requestURL, timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def isRetryableRequestError(error):
+    if isinstance(error, HTTPError):
+        # 4xx errors won't get better by asking again, except when we're being rate limited
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (URLError, TimeoutError, ConnectionError, json.JSONDecodeError))
+
+
+def callWithExponentialBackoff(function, maxRetries=4, initialBackoffSeconds=1.0, backoffMultiplier=2.0):
+    backoffSeconds = initialBackoffSeconds
+    attempt = 0
+    while True:
+        try:
+            return function()
+        except Exception as error:
+            if attempt >= maxRetries or not isRetryableRequestError(error):
+                raise
+            print('   Request failed ({0}). Retrying in {1} seconds'.format(error, backoffSeconds))
+            time.sleep(backoffSeconds)
+            backoffSeconds *= backoffMultiplier
+            attempt += 1
+
+
+def getBlocksInCountyFromCensusAPI(stateFIPSCode, countyFIPSCode, censusYear, apiKey,
+                                   timeout=120, maxRetries=4, initialBackoffSeconds=1.0,
+                                   baseURL=censusAPIBaseURL):
+    # P001001 is the total population as defined by: https://api.census.gov/data/2010/dec/sf1/variables.html
+    url = '{0}/{1}/dec/sf1'.format(baseURL, censusYear)
+    parameters = {'get': 'P001001',
+                  'for': 'block:*',
+                  'in': 'state:{0} county:{1}'.format(stateFIPSCode, countyFIPSCode)}
+    if apiKey:
+        parameters['key'] = apiKey
+    rows = callWithExponentialBackoff(lambda: requestJSON(url=url, parameters=parameters, timeout=timeout),
+                                      maxRetries=maxRetries,
+                                      initialBackoffSeconds=initialBackoffSeconds)
+    # first row is the header, same shape as what census.Census returns
+    header = rows[0]
+    return [dict(zip(header, row)) for row in rows[1:]]
+
+
+def getBlockGeometriesInCountyFromTIGERweb(stateFIPSCode, countyFIPSCode, timeout=120, maxRetries=4,
+                                           initialBackoffSeconds=1.0, pageSize=1000,
+                                           layerURL=tigerWebBlockLayerURL):
+    url = '{0}/query'.format(layerURL)
+    blockGeometries = []
+    resultOffset = 0
+    while True:
+        parameters = {'where': 'STATE=\'{0}\' AND COUNTY=\'{1}\''.format(stateFIPSCode, countyFIPSCode),
+                      'orderByFields': 'TRACT, BLKGRP, BLOCK',
+                      'outFields': '*',
+                      'returnGeometry': 'true',
+                      'outSR': 4326,
+                      'resultOffset': resultOffset,
+                      'resultRecordCount': pageSize,
+                      'f': 'geojson'}
+        page = callWithExponentialBackoff(lambda: requestJSON(url=url, parameters=parameters, timeout=timeout),
+                                          maxRetries=maxRetries,
+                                          initialBackoffSeconds=initialBackoffSeconds)
+        if 'error' in page:
+            raise RuntimeError('TIGERweb returned an error for county {0}: {1}'.format(countyFIPSCode,
+                                                                                     page['error']))
+        features = page.get('features', [])
+        blockGeometries.extend(features)
+
+        exceededTransferLimit = page.get('exceededTransferLimit', False) or \
+                                page.get('properties', {}).get('exceededTransferLimit', False)
+        if not features or not exceededTransferLimit:
+            break
+        resultOffset += len(features)
+    return blockGeometries
+
+
+def fetchCountiesConcurrently(countyList, fetchCounty, maxConcurrentRequests=8, onCountyFetched=None):
+    def timedFetchCounty(county):
+        startTime = time.perf_counter()
+        result = fetchCounty(county)
+        return result, time.perf_counter() - startTime
+
+    startTimeForAllCounties = time.perf_counter()
+    resultsForCounties = {}
+    failedCounties = []
+    with ThreadPoolExecutor(max_workers=maxConcurrentRequests) as executor:
+        futureCounties = {executor.submit(timedFetchCounty, county): county for county in countyList}
+        for future in as_completed(futureCounties):
+            county = futureCounties[future]
+            try:
+                result, elapsedSeconds = future.result()
+            except Exception as error:
+                print('   Failed to get {0}: {1}'.format(county['NAME'], error))
+                failedCounties.append((county, error))
+                continue
+
+            print('   {0} took {1:.1f} seconds'.format(county['NAME'], elapsedSeconds))
+            if onCountyFetched is not None:
+                onCountyFetched(county, result)
+            resultsForCounties[county['county']] = result
+
+    print('It took {0:.1f} total seconds to get {1} counties'.format(time.perf_counter() - startTimeForAllCounties,
+                                                                    len(resultsForCounties)))
+    if failedCounties:
+        raise RuntimeError('Failed to get {0} counties: {1}'.format(
+            len(failedCounties), [(county['NAME'], str(error)) for county, error in failedCounties]))
+
+    # return results in the order the counties were requested, not the order they finished
+    return [resultsForCounties[county['county']] for county in countyList]
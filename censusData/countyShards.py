@@ -0,0 +1,47 @@
+import glob
+from os import path, makedirs, replace, remove
+from exportData.exportData import saveDataToFile, loadDataFromFile
+
+
+def countyShardDirectoryPath(censusYear, stateName, descriptionOfInfo):
+    return path.expanduser('~/Documents/{0}-{1}-{2}CountyShards'.format(censusYear, stateName, descriptionOfInfo))
+
+
+def countyShardFilePath(directoryPath, countyFIPS):
+    return '{0}/{1}.redistdata'.format(directoryPath, countyFIPS)
+
+
+def saveCountyShard(data, directoryPath, countyFIPS):
+    if not path.exists(directoryPath):
+        makedirs(directoryPath)
+    filePath = countyShardFilePath(directoryPath=directoryPath, countyFIPS=countyFIPS)
+    # write to a partial file first so a run that dies mid-save never leaves a shard that looks finished
+    partialFilePath = '{0}.partial'.format(filePath)
+    saveDataToFile(data=data, filePath=partialFilePath)
+    replace(partialFilePath, filePath)
+
+
+def loadCountyShard(directoryPath, countyFIPS):
+    return loadDataFromFile(filePath=countyShardFilePath(directoryPath=directoryPath, countyFIPS=countyFIPS))
+
+
+def completedCountyFIPSCodes(directoryPath):
+    shardFilePaths = glob.glob(countyShardFilePath(directoryPath=directoryPath, countyFIPS='*'))
+    return set(path.basename(shardFilePath)[:-len('.redistdata')] for shardFilePath in shardFilePaths)
+
+
+def removeCountyShards(directoryPath, countyFIPSCodes):
+    for countyFIPS in countyFIPSCodes:
+        filePath = countyShardFilePath(directoryPath=directoryPath, countyFIPS=countyFIPS)
+        if path.exists(filePath):
+            remove(filePath)
+
+
+def loadCountyShardsInOrder(directoryPath, countyList):
+    completedCounties = completedCountyFIPSCodes(directoryPath)
+    missingCounties = [county['NAME'] for county in countyList if county['county'] not in completedCounties]
+    if missingCounties:
+        raise RuntimeError('Missing county shards for: {0}'.format(missingCounties))
+
+    for county in countyList:
+        yield county, loadCountyShard(directoryPath=directoryPath, countyFIPS=county['county'])
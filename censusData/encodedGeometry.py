@@ -0,0 +1,160 @@
+import struct
+from itertools import chain
+from collections import OrderedDict
+import numpy as np
+from shapely import wkb
+from shapely.geometry import shape
+
+# Geometries are kept as WKB bytes until something actually needs the shapely object. GeoJSON polygons are written
+# straight to WKB, so blocks that are never looked at never get a shapely object
+wkbPolygonType = 3
+wkbMultiPolygonType = 6
+
+
+def ringWKB(coordinates):
+    ring = [(point[0], point[1]) for point in coordinates]
+    if ring and ring[0] != ring[-1]:
+        ring.append(ring[0])
+    return struct.pack('<I{0}d'.format(2 * len(ring)), len(ring), *chain.from_iterable(ring))
+
+
+def polygonWKB(rings):
+    return b''.join([struct.pack('<BII', 1, wkbPolygonType, len(rings))] + [ringWKB(ring) for ring in rings])
+
+
+def encodeGeoJSONGeometry(geoJSONGeometry):
+    geometryType = geoJSONGeometry['type']
+    if geometryType == 'Polygon':
+        return polygonWKB(geoJSONGeometry['coordinates'])
+    elif geometryType == 'MultiPolygon':
+        polygons = geoJSONGeometry['coordinates']
+        return b''.join([struct.pack('<BII', 1, wkbMultiPolygonType, len(polygons))] +
+                        [polygonWKB(polygon) for polygon in polygons])
+    else:
+        # blocks are always (multi)polygons, let shapely handle anything else
+        return shape(geoJSONGeometry).wkb
+
+
+def decodeGeometry(encodedGeometry):
+    return wkb.loads(encodedGeometry)
+
+
+def polygonsFromWKB(encodedGeometry):
+    # returns None for anything that isn't a (multi)polygon
+    def readPolygon(offset):
+        byteOrder = '<' if encodedGeometry[offset] == 1 else '>'
+        geometryType, numberOfRings = struct.unpack_from('{0}II'.format(byteOrder), encodedGeometry, offset + 1)
+        offset += 9
+        polygon = []
+        for _ in range(numberOfRings):
+            numberOfPoints = struct.unpack_from('{0}I'.format(byteOrder), encodedGeometry, offset)[0]
+            offset += 4
+            polygon.append(np.frombuffer(encodedGeometry, dtype='{0}f8'.format(byteOrder),
+                                         count=numberOfPoints * 2, offset=offset).reshape(-1, 2))
+            offset += numberOfPoints * 16
+        return polygon, offset
+
+    byteOrder = '<' if encodedGeometry[0] == 1 else '>'
+    geometryType = struct.unpack_from('{0}I'.format(byteOrder), encodedGeometry, 1)[0]
+    if geometryType == wkbPolygonType:
+        return [readPolygon(0)[0]]
+    elif geometryType == wkbMultiPolygonType:
+        numberOfPolygons = struct.unpack_from('{0}I'.format(byteOrder), encodedGeometry, 5)[0]
+        offset = 9
+        polygons = []
+        for _ in range(numberOfPolygons):
+            polygon, offset = readPolygon(offset)
+            polygons.append(polygon)
+        return polygons
+    return None
+
+
+def boundsCentroidAndAreaForPolygonLists(polygonLists):
+    # bounds, centroids and areas for many (multi)polygons at once, each given as a list of polygons made of rings
+    numberOfGeometries = len(polygonLists)
+    bounds = np.full((numberOfGeometries, 4), np.nan)
+    centroids = np.full((numberOfGeometries, 2), np.nan)
+    areas = np.zeros(numberOfGeometries)
+
+    rings = []
+    ringGeometryIndices = []
+    ringIsExterior = []
+    for geometryIndex, polygons in enumerate(polygonLists):
+        for polygon in polygons:
+            for ringIndex, ring in enumerate(polygon):
+                if len(ring) > 0:
+                    rings.append(ring)
+                    ringGeometryIndices.append(geometryIndex)
+                    ringIsExterior.append(ringIndex == 0)
+    if not rings:
+        return bounds, centroids, areas
+    ringGeometryIndices = np.array(ringGeometryIndices)
+    ringIsExterior = np.array(ringIsExterior)
+    ringLengths = np.fromiter((len(ring) for ring in rings), dtype=np.int64, count=len(rings))
+    ringStarts = np.cumsum(ringLengths) - ringLengths
+    allPoints = np.concatenate(rings)
+
+    ringMinimums = np.minimum.reduceat(allPoints, ringStarts)
+    ringMaximums = np.maximum.reduceat(allPoints, ringStarts)
+    exteriorGeometryIndices = ringGeometryIndices[ringIsExterior]
+    minimums = np.full((numberOfGeometries, 2), np.inf)
+    maximums = np.full((numberOfGeometries, 2), -np.inf)
+    np.minimum.at(minimums, exteriorGeometryIndices, ringMinimums[ringIsExterior])
+    np.maximum.at(maximums, exteriorGeometryIndices, ringMaximums[ringIsExterior])
+    hasExterior = np.isfinite(minimums[:, 0])
+    bounds[hasExterior] = np.hstack([minimums, maximums])[hasExterior]
+
+    # shoelace formula relative to each geometry's corner, so small blocks far from (0, 0) keep their precision
+    origins = np.where(hasExterior[:, None], minimums, 0)
+    pointOrigins = np.repeat(origins[ringGeometryIndices], ringLengths, axis=0)
+    x = allPoints[:, 0] - pointOrigins[:, 0]
+    y = allPoints[:, 1] - pointOrigins[:, 1]
+    cross = np.zeros(len(allPoints))
+    cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+    momentX = np.zeros(len(allPoints))
+    momentX[:-1] = (x[:-1] + x[1:]) * cross[:-1]
+    momentY = np.zeros(len(allPoints))
+    momentY[:-1] = (y[:-1] + y[1:]) * cross[:-1]
+    # the last point of one ring and the first of the next aren't a segment
+    ringLastPoints = ringStarts + ringLengths - 1
+    cross[ringLastPoints] = 0
+    momentX[ringLastPoints] = 0
+    momentY[ringLastPoints] = 0
+
+    ringAreas = np.add.reduceat(cross, ringStarts) / 2
+    # rings can wind either way, exteriors add area and holes take it away
+    signs = np.sign(ringAreas) * np.where(ringIsExterior, 1, -1)
+    areas = np.bincount(ringGeometryIndices, weights=ringAreas * signs, minlength=numberOfGeometries)
+    momentsX = np.bincount(ringGeometryIndices, weights=np.add.reduceat(momentX, ringStarts) * signs,
+                           minlength=numberOfGeometries)
+    momentsY = np.bincount(ringGeometryIndices, weights=np.add.reduceat(momentY, ringStarts) * signs,
+                           minlength=numberOfGeometries)
+    hasArea = areas > 0
+    centroids[hasArea, 0] = momentsX[hasArea] / (6 * areas[hasArea]) + origins[hasArea, 0]
+    centroids[hasArea, 1] = momentsY[hasArea] / (6 * areas[hasArea]) + origins[hasArea, 1]
+    areas[~hasArea] = 0
+    return bounds, centroids, areas
+
+
+class DecodedGeometryCache:
+    # bounded least-recently-used cache of decoded geometries
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.decodedGeometries = OrderedDict()
+
+    def __len__(self):
+        return len(self.decodedGeometries)
+
+    def get(self, key, encodedGeometry):
+        decodedGeometry = self.decodedGeometries.get(key)
+        if decodedGeometry is None:
+            decodedGeometry = decodeGeometry(encodedGeometry)
+            self.decodedGeometries[key] = decodedGeometry
+            if len(self.decodedGeometries) > self.maxSize:
+                self.decodedGeometries.popitem(last=False)
+        else:
+            self.decodedGeometries.move_to_end(key)
+        return decodedGeometry
+
+    def discard(self, key):
+        self.decodedGeometries.pop(key, None)
@@ -0,0 +1,65 @@
+import numpy as np
+from censusData.geoid import countyShift, countyBits, tractShift, stateShift
+
+
+class FIPSHierarchyIndex:
+    # state -> county -> tract -> block index over GEOIDs. Rows are sorted by GEOID, so every county and tract is a
+    # contiguous range of the sorted rows
+    def __init__(self, geoids, rowIndices=None):
+        # rowIndices limits the index to some of the rows, e.g. leaving out rows that were released
+        geoids = np.asarray(geoids, dtype=np.uint64)
+        if rowIndices is None:
+            self.rowOrder = np.argsort(geoids, kind='stable')
+        else:
+            rowIndices = np.asarray(rowIndices, dtype=np.int64)
+            self.rowOrder = rowIndices[np.argsort(geoids[rowIndices], kind='stable')]
+        self.sortedGEOIDs = geoids[self.rowOrder]
+        self.rowForGEOID = dict(zip(self.sortedGEOIDs.tolist(), self.rowOrder.tolist()))
+        self.countyRanges = rangesForPrefixes(self.sortedGEOIDs >> countyShift)
+        self.tractRanges = rangesForPrefixes(self.sortedGEOIDs >> tractShift)
+
+        self.countyPrefixesForCountyCode = {}
+        for countyPrefix in self.countyRanges.keys():
+            countyCode = countyPrefix & ((1 << countyBits) - 1)
+            self.countyPrefixesForCountyCode.setdefault(countyCode, []).append(countyPrefix)
+
+    def __len__(self):
+        return len(self.rowOrder)
+
+    def rowsInRange(self, rowRange):
+        if rowRange is None:
+            return self.rowOrder[0:0]
+        start, end = rowRange
+        return self.rowOrder[start:end]
+
+    def countyRange(self, stateCode, countyCode):
+        return self.countyRanges.get((stateCode << (stateShift - countyShift)) | countyCode)
+
+    def tractRange(self, stateCode, countyCode, tractCode):
+        countyPrefix = (stateCode << (stateShift - countyShift)) | countyCode
+        return self.tractRanges.get((countyPrefix << (countyShift - tractShift)) | tractCode)
+
+    def rowsInCounty(self, stateCode, countyCode):
+        return self.rowsInRange(self.countyRange(stateCode=stateCode, countyCode=countyCode))
+
+    def rowsInTract(self, stateCode, countyCode, tractCode):
+        return self.rowsInRange(self.tractRange(stateCode=stateCode, countyCode=countyCode, tractCode=tractCode))
+
+    def rowsWithCountyCode(self, countyCode):
+        # for when the state isn't known, e.g. blocks created without a state FIPS
+        countyPrefixes = self.countyPrefixesForCountyCode.get(countyCode, [])
+        if len(countyPrefixes) == 1:
+            return self.rowsInRange(self.countyRanges[countyPrefixes[0]])
+        return np.concatenate([self.rowsInRange(self.countyRanges[countyPrefix]) for countyPrefix in countyPrefixes] +
+                              [self.rowOrder[0:0]])
+
+    def rowWithGEOID(self, geoid):
+        return self.rowForGEOID.get(geoid)
+
+
+def rangesForPrefixes(sortedPrefixes):
+    if len(sortedPrefixes) == 0:
+        return {}
+    prefixes, starts = np.unique(sortedPrefixes, return_index=True)
+    ends = np.append(starts[1:], len(sortedPrefixes))
+    return dict(zip(prefixes.tolist(), zip(starts.tolist(), ends.tolist())))
@@ -0,0 +1,72 @@
+# Block GEOIDs packed into one 64-bit integer, most significant field first so sorting GEOIDs sorts blocks by
+# state, county, tract, block and then split part
+# | state (7 bits) | county (10 bits) | tract (20 bits) | block (14 bits) | split part (8 bits) |
+splitPartBits = 8
+blockBits = 14
+tractBits = 20
+countyBits = 10
+stateBits = 7
+
+splitPartShift = 0
+blockShift = splitPartShift + splitPartBits
+tractShift = blockShift + blockBits
+countyShift = tractShift + tractBits
+stateShift = countyShift + countyBits
+
+# split parts are numbered from 1, 0 means the block wasn't split
+maxSplitPart = (1 << splitPartBits) - 1
+
+
+def geoidField(geoid, shift, bits):
+    # works on plain ints as well as NumPy arrays of GEOIDs
+    return (geoid >> shift) & ((1 << bits) - 1)
+
+
+def replaceGEOIDField(geoid, shift, bits, code):
+    mask = ((1 << bits) - 1) << shift
+    return (geoid & ~mask) | (code << shift)
+
+
+def packGEOID(stateCode, countyCode, tractCode, blockCode, splitPart=0):
+    for fieldName, code, bits in (('state', stateCode, stateBits),
+                                  ('county', countyCode, countyBits),
+                                  ('tract', tractCode, tractBits),
+                                  ('block', blockCode, blockBits),
+                                  ('split part', splitPart, splitPartBits)):
+        if code < 0 or code >= (1 << bits):
+            raise ValueError('{0} code {1} does not fit in {2} bits'.format(fieldName, code, bits))
+    return (stateCode << stateShift) | (countyCode << countyShift) | (tractCode << tractShift) | \
+           (blockCode << blockShift) | (splitPart << splitPartShift)
+
+
+def fipsCode(FIPS):
+    if FIPS is None:
+        return 0
+    FIPS = str(FIPS)
+    if not FIPS.isdigit():
+        raise ValueError('FIPS codes need to be numeric: {0}'.format(FIPS))
+    return int(FIPS)
+
+
+def packGEOIDFromFIPS(stateFIPS, countyFIPS, tractFIPS, blockFIPS, splitPart=0):
+    return packGEOID(stateCode=fipsCode(stateFIPS),
+                     countyCode=fipsCode(countyFIPS),
+                     tractCode=fipsCode(tractFIPS),
+                     blockCode=fipsCode(blockFIPS),
+                     splitPart=splitPart)
+
+
+def unpackGEOID(geoid):
+    return (geoidField(geoid, stateShift, stateBits),
+            geoidField(geoid, countyShift, countyBits),
+            geoidField(geoid, tractShift, tractBits),
+            geoidField(geoid, blockShift, blockBits),
+            geoidField(geoid, splitPartShift, splitPartBits))
+
+
+def formatGEOID(geoid):
+    stateCode, countyCode, tractCode, blockCode, splitPart = unpackGEOID(geoid)
+    formattedGEOID = '{0:02}{1:03}{2:06}{3:04}'.format(stateCode, countyCode, tractCode, blockCode)
+    if splitPart:
+        formattedGEOID = '{0}-{1}'.format(formattedGEOID, splitPart)
+    return formattedGEOID
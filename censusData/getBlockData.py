@@ -3,8 +3,17 @@ from us import states
 import math
 from esridump.dumper import EsriDumper
 import time
+from os import remove
 from censusData import apiKeys
-from exportData.exportData import saveDataToFileWithDescription
+from censusData.blockDataJoin import createBlockDataIndex, createBlockJoinMismatches, \
+    joinBlockGeometriesToBlockData, findBlockDataWithoutGeometry, hasBlockJoinMismatches, describeBlockJoinMismatches, \
+    extendBlockJoinMismatches
+from censusData.countyFetchEngine import fetchCountiesConcurrently, getBlocksInCountyFromCensusAPI, \
+    getBlockGeometriesInCountyFromTIGERweb
+from censusData.countyShards import countyShardDirectoryPath, saveCountyShard, completedCountyFIPSCodes, \
+    removeCountyShards, loadCountyShardsInOrder
+from exportData.exportData import saveDataToFileWithDescription, saveRecordsToChunkedFileWithDescription, \
+    chunkedRecordFilePathWithDescription
 
 
 def getCountiesInState(stateFIPSCode, maxNumberOfCounties=math.inf, specificCountiesOnly=None):
@@ -38,77 +47,61 @@ def getBlocksInCounty(stateFIPSCode, countyFIPSCode):
     # DEPRECATED: P0010001 is the total population as defined by: https://api.census.gov/data/2010/sf1/variables.html
     # The API now defaults to: https://api.census.gov/data/2010/dec/sf1/variables.html
     # Which now uses: P001001 for total population
-    countyBlocks = censusRequest.sf1.get(fields=('P001001'),
-                                         geo={'for': 'block:*', 'in': 'state:{0} county:{1}'.format(
-                                             stateFIPSCode, countyFIPSCode)})
+    countyBlocks = getBlocksInCountyFromCensusAPI(stateFIPSCode=stateFIPSCode,
+                                                  countyFIPSCode=countyFIPSCode,
+                                                  censusYear=censusYear,
+                                                  apiKey=apiKeys.censusAPIKey,
+                                                  timeout=requestTimeoutInSeconds)
     return countyBlocks
 
 
-def getAllBlocksInState(countyList, maxNumberOfCounties=math.inf):
-    fullBlockList = []
-
-    # getting population counts and Block names for each county
-    print('*** Getting all blocks and population counts in state ***')
-    count = 0
-    for county in countyList:
-        if count >= maxNumberOfCounties:
-            break
-        countyFIPS = county['county']
-        blocksInCounty = getBlocksInCounty(stateFIPSCode=county['state'], countyFIPSCode=countyFIPS)
-        fullBlockList += blocksInCounty
-        print('Got all blocks and population counts in {0}'.format(county['NAME']))
-        count += 1
-
-    return fullBlockList
-
-
-def allGeoDataForEachBlock(countyInfoList, existingBlockData):
-    if (len(existingBlockData) > 0):
-        print('*** Getting geo info on all blocks ***')
-        stateFIPSCode = existingBlockData[0]['state']
-
-        startTimeForProcessingState = time.localtime()
-        fullBlockListWithGeo = []
-        for county in countyInfoList:
-            print('Getting all geo info in {0}'.format(county['NAME']))
-            startTimeForProcessingCounty = time.localtime()
-            countyFIPSCode = county['county']
-
-            blockGeometries = EsriDumper(
-                url='https://tigerweb.geo.census.gov/arcgis/rest/services/Census2010/tigerWMS_Census2010/MapServer/14',
-                extra_query_args={'where': 'STATE=\'{0}\' AND COUNTY=\'{1}\''.format(stateFIPSCode, countyFIPSCode),
-                                  'orderByFields': 'TRACT, BLKGRP, BLOCK'},
-                timeout=120)  # extending timeout because there were some long load times
-            # https://github.com/openaddresses/pyesridump
-
-            for blockGeometry in blockGeometries:
-                blockGeoProperties = blockGeometry['properties']
-                blockGeoStateFIPS = blockGeoProperties['STATE']
-                blockGeoCountyFIPS = blockGeoProperties['COUNTY']
-                blockGeoTractFIPS = blockGeoProperties['TRACT']
-                blockGeoBlockFIPS = blockGeoProperties['BLOCK']
-
-                matchingBlockData = next((item for item in existingBlockData if
-                                          item['state'] == blockGeoStateFIPS and
-                                          item['county'] == blockGeoCountyFIPS and
-                                          item['tract'] == blockGeoTractFIPS and
-                                          item['block'] == blockGeoBlockFIPS), None)
-                matchingBlockData['geometry'] = blockGeometry['geometry']
-                fullBlockListWithGeo.append(matchingBlockData)
-
-            endTimeForProcessingCounty = time.localtime()
-            elapsedSecondsForProcessingCounty = (
-                    time.mktime(endTimeForProcessingCounty) - time.mktime(startTimeForProcessingCounty))
-            print('   {0} took {1} seconds'.format(county['NAME'], elapsedSecondsForProcessingCounty))
-
-        endTimeForProcessingState = time.localtime()
-        elapsedMinutesForProcessingState = (time.mktime(endTimeForProcessingState) - time.mktime(
-            startTimeForProcessingState)) / 60
-        print('It took {0} total minutes to get all the requested block geo data'.format(
-            elapsedMinutesForProcessingState))
-        return fullBlockListWithGeo
-    else:
-        return None
+def getBlockDataForCounty(county):
+    blocksInCounty = getBlocksInCounty(stateFIPSCode=county['state'], countyFIPSCode=county['county'])
+    blockGeometries = getBlockGeometriesInCountyFromTIGERweb(stateFIPSCode=county['state'],
+                                                             countyFIPSCode=county['county'],
+                                                             timeout=requestTimeoutInSeconds)
+
+    blockJoinMismatches = createBlockJoinMismatches()
+    blockDataIndex = createBlockDataIndex(blockDataList=blocksInCounty, blockJoinMismatches=blockJoinMismatches)
+    matchedBlockKeys = set()
+    blockDataWithGeo = joinBlockGeometriesToBlockData(blockGeometries=blockGeometries,
+                                                      blockDataIndex=blockDataIndex,
+                                                      matchedBlockKeys=matchedBlockKeys,
+                                                      blockJoinMismatches=blockJoinMismatches)
+    findBlockDataWithoutGeometry(blockDataIndex=blockDataIndex,
+                                 matchedBlockKeys=matchedBlockKeys,
+                                 blockJoinMismatches=blockJoinMismatches)
+    return {'blockData': blockDataWithGeo, 'blockJoinMismatches': blockJoinMismatches}
+
+
+def iterateAllBlockDataInStateWithCheckpoints(countyInfoList, shardDirectoryPath, blockJoinMismatches,
+                                              countiesToRefetch=None):
+    if countiesToRefetch:
+        print('*** Re-fetching counties: {0} ***'.format(countiesToRefetch))
+        removeCountyShards(directoryPath=shardDirectoryPath, countyFIPSCodes=countiesToRefetch)
+
+    completedCounties = completedCountyFIPSCodes(shardDirectoryPath)
+    remainingCounties = [county for county in countyInfoList if county['county'] not in completedCounties]
+    print('*** Getting all block data in state. {0} counties already saved, {1} remaining ***'.format(
+        len(countyInfoList) - len(remainingCounties), len(remainingCounties)))
+
+    # each county is saved as soon as it arrives, so a failed run can pick up where it left off
+    fetchCountiesConcurrently(
+        countyList=remainingCounties,
+        fetchCounty=getBlockDataForCounty,
+        maxConcurrentRequests=maxConcurrentCountyRequests,
+        onCountyFetched=lambda county, countyBlockData: saveCountyShard(data=countyBlockData,
+                                                                        directoryPath=shardDirectoryPath,
+                                                                        countyFIPS=county['county']))
+
+    # stream one county shard at a time instead of building the whole state in memory
+    print('*** Merging county shards ***')
+    for county, countyBlockData in loadCountyShardsInOrder(directoryPath=shardDirectoryPath,
+                                                           countyList=countyInfoList):
+        extendBlockJoinMismatches(blockJoinMismatches=blockJoinMismatches,
+                                  otherBlockJoinMismatches=countyBlockData['blockJoinMismatches'])
+        for blockData in countyBlockData['blockData']:
+            yield blockData
 
 
 def allGeoDataForEachCounty(existingCountyData):
@@ -157,6 +150,9 @@ stateAbbreviation = 'MI'
 stateInfo = states.lookup(stateAbbreviation)
 censusYear = 2010
 descriptionToWorkWith = 'All'
+maxConcurrentCountyRequests = 8
+requestTimeoutInSeconds = 120  # extending timeout because there were some long load times
+countiesToRefetch = []  # county FIPS codes to download again, e.g. ['163']
 
 censusRequest = Census(apiKeys.censusAPIKey, year=censusYear)
 countyInfoList = getCountiesInState(stateFIPSCode=stateInfo.fips, maxNumberOfCounties=math.inf)
@@ -165,8 +161,22 @@ allCountyGeosInState = allGeoDataForEachCounty(existingCountyData=countyInfoList
 saveDataToFileWithDescription(data=allCountyGeosInState, censusYear=censusYear, stateName=stateInfo.name,
                               descriptionOfInfo='{0}County'.format(descriptionToWorkWith))
 
-allBlocksInState = getAllBlocksInState(countyList=countyInfoList)
-allBlockGeosInState = allGeoDataForEachBlock(countyInfoList=countyInfoList, existingBlockData=allBlocksInState)
+blockShardDirectoryPath = countyShardDirectoryPath(censusYear=censusYear, stateName=stateInfo.name,
+                                                   descriptionOfInfo='{0}Block'.format(descriptionToWorkWith))
+blockJoinMismatches = createBlockJoinMismatches()
+allBlockGeosInState = iterateAllBlockDataInStateWithCheckpoints(countyInfoList=countyInfoList,
+                                                                shardDirectoryPath=blockShardDirectoryPath,
+                                                                blockJoinMismatches=blockJoinMismatches,
+                                                                countiesToRefetch=countiesToRefetch)
 # save block data to file
-saveDataToFileWithDescription(data=allBlockGeosInState, censusYear=censusYear, stateName=stateInfo.name,
-                              descriptionOfInfo='{0}Block'.format(descriptionToWorkWith))
+saveRecordsToChunkedFileWithDescription(records=allBlockGeosInState, censusYear=censusYear, stateName=stateInfo.name,
+                                        descriptionOfInfo='{0}Block'.format(descriptionToWorkWith))
+if hasBlockJoinMismatches(blockJoinMismatches):
+    remove(chunkedRecordFilePathWithDescription(censusYear=censusYear, stateName=stateInfo.name,
+                                                descriptionOfInfo='{0}Block'.format(descriptionToWorkWith)))
+    saveDataToFileWithDescription(data=blockJoinMismatches,
+                                  censusYear='',
+                                  stateName='',
+                                  descriptionOfInfo='ErrorCase-BlockGeometryJoinMismatches')
+    raise RuntimeError("Couldn't join all block geometries to block data. {0}".format(
+        describeBlockJoinMismatches(blockJoinMismatches)))
@@ -0,0 +1,37 @@
+from os import path, remove
+from us import states
+from censusData.blockDataJoin import createBlockJoinMismatches, hasBlockJoinMismatches, describeBlockJoinMismatches
+from censusData.localBlockData import iterateBlockDataFromLocalFiles
+from exportData.exportData import saveDataToFileWithDescription, saveRecordsToChunkedFileWithDescription, \
+    chunkedRecordFilePathWithDescription
+
+# Reads block geometries and population counts from bulk files on disk instead of the Census APIs.
+# Block geometries: TIGER/Line tabulation block shapefiles (https://www2.census.gov/geo/tiger/TIGER2010/TABBLOCK/2010/)
+#   or GeoJSON (FeatureCollection, or one feature per line in .geojsonl)
+# Population: a CSV/JSON table with block FIPS (or GEOID) and P001001 columns.
+#   Not needed for population-and-housing block files (e.g. tabblock2010_26_pophu.shp) since they include POP10.
+
+stateAbbreviation = 'MI'
+stateInfo = states.lookup(stateAbbreviation)
+censusYear = 2010
+descriptionToWorkWith = 'All'
+blockGeometryFilePath = path.expanduser('~/Documents/tabblock2010_26_pophu/tabblock2010_26_pophu.shp')
+populationTableFilePath = None
+
+print('*** Reading all block data in state from local files ***')
+blockJoinMismatches = createBlockJoinMismatches()
+allBlockGeosInState = iterateBlockDataFromLocalFiles(blockGeometryFilePath=blockGeometryFilePath,
+                                                     blockJoinMismatches=blockJoinMismatches,
+                                                     populationTableFilePath=populationTableFilePath)
+# save block data to file as it's read
+saveRecordsToChunkedFileWithDescription(records=allBlockGeosInState, censusYear=censusYear, stateName=stateInfo.name,
+                                        descriptionOfInfo='{0}Block'.format(descriptionToWorkWith))
+if hasBlockJoinMismatches(blockJoinMismatches):
+    remove(chunkedRecordFilePathWithDescription(censusYear=censusYear, stateName=stateInfo.name,
+                                                descriptionOfInfo='{0}Block'.format(descriptionToWorkWith)))
+    saveDataToFileWithDescription(data=blockJoinMismatches,
+                                  censusYear='',
+                                  stateName='',
+                                  descriptionOfInfo='ErrorCase-BlockGeometryJoinMismatches')
+    raise RuntimeError("Couldn't join all block geometries to block data. {0}".format(
+        describeBlockJoinMismatches(blockJoinMismatches)))
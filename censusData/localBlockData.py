@@ -0,0 +1,119 @@
+import csv
+import json
+from os import path
+from censusData.blockDataJoin import createBlockDataIndex, joinBlockGeometryToBlockData, findBlockDataWithoutGeometry
+
+# TIGERweb, TIGER/Line 2010 and TIGER/Line 2020 all name the block FIPS fields differently
+stateFIPSPropertyNames = ('STATE', 'state', 'STATEFP10', 'STATEFP20', 'STATEFP')
+countyFIPSPropertyNames = ('COUNTY', 'county', 'COUNTYFP10', 'COUNTYFP20', 'COUNTYFP')
+tractFIPSPropertyNames = ('TRACT', 'tract', 'TRACTCE10', 'TRACTCE20', 'TRACTCE')
+blockFIPSPropertyNames = ('BLOCK', 'block', 'BLOCKCE10', 'BLOCKCE20', 'BLOCKCE')
+geoIdPropertyNames = ('GEOID', 'GEOID10', 'GEOID20', 'GEO_ID', 'BLOCKID10')
+populationPropertyNames = ('P001001', 'P0010001', 'POP10', 'POP20', 'POP100')
+
+
+def valueForFirstMatchingName(values, names):
+    for name in names:
+        value = values.get(name)
+        if value is not None and value != '':
+            return value
+    return None
+
+
+def blockFIPSFromValues(values):
+    stateFIPS = valueForFirstMatchingName(values, stateFIPSPropertyNames)
+    countyFIPS = valueForFirstMatchingName(values, countyFIPSPropertyNames)
+    tractFIPS = valueForFirstMatchingName(values, tractFIPSPropertyNames)
+    blockFIPS = valueForFirstMatchingName(values, blockFIPSPropertyNames)
+    if None in (stateFIPS, countyFIPS, tractFIPS, blockFIPS):
+        geoId = valueForFirstMatchingName(values, geoIdPropertyNames)
+        if geoId is None:
+            raise ValueError('Could not find block FIPS fields in: {0}'.format(sorted(values.keys())))
+        # full block GEOIDs end with SSCCCTTTTTTBBBB, e.g. 1000000US261630001001000
+        geoId = str(geoId)[-15:]
+        stateFIPS, countyFIPS, tractFIPS, blockFIPS = geoId[0:2], geoId[2:5], geoId[5:11], geoId[11:15]
+    return str(stateFIPS), str(countyFIPS), str(tractFIPS), str(blockFIPS)
+
+
+def normalizedBlockGeometry(feature):
+    stateFIPS, countyFIPS, tractFIPS, blockFIPS = blockFIPSFromValues(feature['properties'])
+    properties = dict(feature['properties'])
+    properties.update({'STATE': stateFIPS, 'COUNTY': countyFIPS, 'TRACT': tractFIPS, 'BLOCK': blockFIPS})
+    return {'properties': properties, 'geometry': feature['geometry']}
+
+
+def blockDataFromPopulationRow(populationRow):
+    stateFIPS, countyFIPS, tractFIPS, blockFIPS = blockFIPSFromValues(populationRow)
+    population = valueForFirstMatchingName(populationRow, populationPropertyNames)
+    if population is None:
+        raise ValueError('Could not find a total population field in: {0}'.format(sorted(populationRow.keys())))
+    return {'P001001': str(int(float(population))),
+            'state': stateFIPS,
+            'county': countyFIPS,
+            'tract': tractFIPS,
+            'block': blockFIPS}
+
+
+def iterateBlockGeometriesFromFile(filePath):
+    fileExtension = path.splitext(filePath)[1].lower()
+    if fileExtension == '.shp':
+        # pyshp is only needed for reading shapefiles
+        import shapefile
+        with shapefile.Reader(filePath) as shapefileReader:
+            for shapeRecord in shapefileReader.iterShapeRecords():
+                yield {'properties': shapeRecord.record.as_dict(),
+                       'geometry': shapeRecord.shape.__geo_interface__}
+    elif fileExtension in ('.geojsonl', '.geojsons', '.ndjson'):
+        # one feature per line, so we never hold the whole state in memory
+        with open(filePath, 'r') as geoJSONFile:
+            for line in geoJSONFile:
+                line = line.strip().lstrip('\x1e')
+                if line:
+                    yield json.loads(line)
+    else:
+        with open(filePath, 'r') as geoJSONFile:
+            featureCollection = json.load(geoJSONFile)
+        for feature in featureCollection['features']:
+            yield feature
+
+
+def iteratePopulationRowsFromFile(filePath):
+    fileExtension = path.splitext(filePath)[1].lower()
+    if fileExtension == '.json':
+        # same format the Census API returns: a header row followed by value rows
+        with open(filePath, 'r') as jsonFile:
+            rows = json.load(jsonFile)
+        header = rows[0]
+        for row in rows[1:]:
+            yield dict(zip(header, row))
+    else:
+        with open(filePath, 'r', newline='') as csvFile:
+            for row in csv.DictReader(csvFile):
+                yield row
+
+
+def iterateBlockDataFromLocalFiles(blockGeometryFilePath, blockJoinMismatches, populationTableFilePath=None):
+    if populationTableFilePath is None:
+        # population-and-housing block files (e.g. tabblock2010_26_pophu) carry the population with the geometry
+        for feature in iterateBlockGeometriesFromFile(blockGeometryFilePath):
+            blockData = blockDataFromPopulationRow(feature['properties'])
+            blockData['geometry'] = feature['geometry']
+            yield blockData
+        return
+
+    blockDataIndex = createBlockDataIndex(
+        blockDataList=(blockDataFromPopulationRow(populationRow)
+                       for populationRow in iteratePopulationRowsFromFile(populationTableFilePath)),
+        blockJoinMismatches=blockJoinMismatches)
+    matchedBlockKeys = set()
+    for feature in iterateBlockGeometriesFromFile(blockGeometryFilePath):
+        matchingBlockData = joinBlockGeometryToBlockData(blockGeometry=normalizedBlockGeometry(feature),
+                                                         blockDataIndex=blockDataIndex,
+                                                         matchedBlockKeys=matchedBlockKeys,
+                                                         blockJoinMismatches=blockJoinMismatches)
+        if matchingBlockData is not None:
+            yield matchingBlockData
+
+    findBlockDataWithoutGeometry(blockDataIndex=blockDataIndex,
+                                 matchedBlockKeys=matchedBlockKeys,
+                                 blockJoinMismatches=blockJoinMismatches)
@@ -1,7 +1,9 @@
 from shapely.geometry import mapping, Polygon, MultiPolygon
 from collections import OrderedDict
-from os import path, makedirs
+from os import path, makedirs, replace, listdir, remove
+from shutil import rmtree
 import glob
+import numpy as np
 import pickle
 import json
 from tqdm import tqdm
@@ -56,6 +58,104 @@ def saveDataToFile(data, filePath):
     tqdm.write('*** Saved: {0} ***'.format(filePath))
 
 
+def chunkedRecordFilePathWithDescription(censusYear, stateName, descriptionOfInfo):
+    return path.expanduser('~/Documents/{0}-{1}-{2}Info.redistrecords'.format(censusYear, stateName, descriptionOfInfo))
+
+
+def saveRecordsToChunkedFileWithDescription(records, censusYear, stateName, descriptionOfInfo, chunkSize=10000):
+    filePath = chunkedRecordFilePathWithDescription(censusYear=censusYear, stateName=stateName,
+                                                    descriptionOfInfo=descriptionOfInfo)
+    return saveRecordsToChunkedFile(records=records, filePath=filePath, chunkSize=chunkSize)
+
+
+def saveRecordsToChunkedFile(records, filePath, chunkSize=10000):
+    # records are appended one chunk at a time, so this never holds more than a chunk. How much is in memory overall
+    # depends on where the records come from, e.g. block data is fetched a county shard at a time
+    tqdm.write('*** Attempting to save: {0} ***'.format(filePath))
+    partialFilePath = '{0}.partial'.format(filePath)
+    numberOfRecords = 0
+    try:
+        with open(partialFilePath, 'wb') as file:
+            chunk = []
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= chunkSize:
+                    pickle.dump(chunk, file, protocol=pickle.HIGHEST_PROTOCOL)
+                    numberOfRecords += len(chunk)
+                    chunk = []
+            if chunk:
+                pickle.dump(chunk, file, protocol=pickle.HIGHEST_PROTOCOL)
+                numberOfRecords += len(chunk)
+        replace(partialFilePath, filePath)
+    finally:
+        # a failed write doesn't leave a partial file behind
+        if path.exists(partialFilePath):
+            remove(partialFilePath)
+    tqdm.write('*** Saved {0} records: {1} ***'.format(numberOfRecords, filePath))
+    return numberOfRecords
+
+
+def iterateRecordsFromChunkedFileWithDescription(censusYear, stateName, descriptionOfInfo):
+    filePath = chunkedRecordFilePathWithDescription(censusYear=censusYear, stateName=stateName,
+                                                    descriptionOfInfo=descriptionOfInfo)
+    return iterateRecordsFromChunkedFile(filePath)
+
+
+def iterateRecordsFromChunkedFile(filePath):
+    tqdm.write('*** Streaming records from: {0} ***'.format(filePath))
+    with open(filePath, 'rb') as file:
+        while True:
+            try:
+                chunk = pickle.load(file)
+            except EOFError:
+                break
+            for record in chunk:
+                yield record
+
+
+def arrayDirectoryPathWithDescription(censusYear, stateName, descriptionOfInfo):
+    return path.expanduser('~/Documents/{0}-{1}-{2}Info.redistarrays'.format(censusYear, stateName, descriptionOfInfo))
+
+
+def saveArraysToDirectoryWithDescription(arrays, censusYear, stateName, descriptionOfInfo):
+    directoryPath = arrayDirectoryPathWithDescription(censusYear=censusYear, stateName=stateName,
+                                                      descriptionOfInfo=descriptionOfInfo)
+    saveArraysToDirectory(arrays=arrays, directoryPath=directoryPath)
+
+
+def saveArraysToDirectory(arrays, directoryPath):
+    # one .npy file per array, so each array can be memory-mapped on its own when loading
+    tqdm.write('*** Attempting to save: {0} ***'.format(directoryPath))
+    partialDirectoryPath = '{0}.partial'.format(directoryPath)
+    if path.exists(partialDirectoryPath):
+        rmtree(partialDirectoryPath)
+    makedirs(partialDirectoryPath)
+    for arrayName, array in arrays.items():
+        np.save(path.join(partialDirectoryPath, '{0}.npy'.format(arrayName)), np.ascontiguousarray(array))
+    if path.exists(directoryPath):
+        rmtree(directoryPath)
+    replace(partialDirectoryPath, directoryPath)
+    tqdm.write('*** Saved: {0} ***'.format(directoryPath))
+
+
+def loadArraysFromDirectoryWithDescription(censusYear, stateName, descriptionOfInfo, mmapMode='r'):
+    directoryPath = arrayDirectoryPathWithDescription(censusYear=censusYear, stateName=stateName,
+                                                      descriptionOfInfo=descriptionOfInfo)
+    return loadArraysFromDirectory(directoryPath=directoryPath, mmapMode=mmapMode)
+
+
+def loadArraysFromDirectory(directoryPath, mmapMode='r'):
+    # memory-mapped read-only by default, so processes loading the same arrays share the pages instead of copying
+    tqdm.write('*** Attempting to load: {0} ***'.format(directoryPath))
+    arrays = {}
+    for fileName in sorted(listdir(directoryPath)):
+        arrayName, fileExtension = path.splitext(fileName)
+        if fileExtension == '.npy':
+            arrays[arrayName] = np.load(path.join(directoryPath, fileName), mmap_mode=mmapMode)
+    tqdm.write('*** Loaded: {0} ***'.format(directoryPath))
+    return arrays
+
+
 def saveGeoJSONToDirectoryWithDescription(geographyList, censusYear, stateName, descriptionOfInfo):
     directoryPath = path.expanduser('~/Documents/{0}-{1}-{2}Info'.format(censusYear, stateName, descriptionOfInfo))
     if not path.exists(directoryPath):
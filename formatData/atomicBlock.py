@@ -1,10 +1,11 @@
-from shapely.geometry import MultiPolygon
+from shapely.geometry import MultiPolygon, Polygon
 from censusData.censusBlock import CensusBlock
 from exportData.displayShapes import plotPolygons
 from exportData.exportData import saveDataToFileWithDescription
 from formatData.graphObject import GraphObject
 from formatData.censusContainer import CensusContainer
-from geographyHelper import doesGeographyContainTheOther, intersectingGeometries
+from geographyHelper import doesGeographyContainTheOther, EnvelopeIndex, \
+    findSharedBoundaryLengths
 from tqdm import tqdm
 import math
 
@@ -16,8 +17,19 @@ class AtomicBlock(CensusContainer, GraphObject):
         GraphObject.__init__(self, self.geometry.centroid)
         self.isWater = self.getWaterPropertyFromBlocks()
         AtomicBlock.atomicBlockList.append(self)
+        self.registerChildrenBlocks()
 
     atomicBlockList = []
+    atomicBlockForBlock = {}
+
+    def __setstate__(self, state):
+        GraphObject.__setstate__(self, state)
+        AtomicBlock.atomicBlockList.append(self)
+        self.registerChildrenBlocks()
+
+    def registerChildrenBlocks(self):
+        for block in self.children:
+            AtomicBlock.atomicBlockForBlock[block] = self
 
     def updateBlockContainerData(self):
         super(AtomicBlock, self).updateBlockContainerData()
@@ -25,6 +37,7 @@ class AtomicBlock(CensusContainer, GraphObject):
 
     def importCensusBlock(self, censusBlock):
         self.children.append(censusBlock)
+        AtomicBlock.atomicBlockForBlock[censusBlock] = self
         self.isWater = self.getWaterPropertyFromBlocks()
         self.updateBlockContainerData()
 
@@ -34,11 +47,17 @@ class AtomicBlock(CensusContainer, GraphObject):
 
 def assignNeighborBlocksFromCandidateBlocks(block, candidateBlocks, progressObject=None):
     block.clearNeighborGraphObjects()
-    neighborBlocks = []
+    minX, minY, maxX, maxY = block.geometry.bounds
+    nearbyBlocks = []
     for candidateBlock in candidateBlocks:
         if candidateBlock is not block:
-            if intersectingGeometries(block, candidateBlock):
-                neighborBlocks.append(candidateBlock)
+            candidateMinX, candidateMinY, candidateMaxX, candidateMaxY = candidateBlock.geometry.bounds
+            if candidateMinX <= maxX and candidateMaxX >= minX and candidateMinY <= maxY and candidateMaxY >= minY:
+                nearbyBlocks.append(candidateBlock)
+    sharedBoundaryLengths = findSharedBoundaryLengths([block.geometry] +
+                                                      [nearbyBlock.geometry for nearbyBlock in nearbyBlocks])
+    neighborBlocks = [nearbyBlocks[secondIndex - 1] for firstIndex, secondIndex in sorted(sharedBoundaryLengths.keys())
+                      if firstIndex == 0]
     block.addNeighbors(neighbors=neighborBlocks)
 
     for neighborBlock in neighborBlocks:
@@ -54,8 +73,14 @@ def createAtomicBlockFromCensusBlock(censusBlock):
     return newAtomicBlock
 
 
-def atomicBlockWithBlock(block, atomicBlockList):
-    return next((atomicBlock for atomicBlock in atomicBlockList if block in atomicBlock.children), None)
+def atomicBlockWithBlock(block):
+    return AtomicBlock.atomicBlockForBlock.get(block)
+
+
+def polygonsOfGeometry(geometry):
+    if type(geometry) is MultiPolygon:
+        return list(geometry)
+    return [geometry]
 
 
 def createAtomicBlocksFromBlockList(blockList):
@@ -75,10 +100,12 @@ def createAtomicBlocksFromBlockList(blockList):
                     if blockPolygons.index(blockPolygon) == len(blockPolygons) - 1:
                         diffInPop = block.population - popTotalSoFar
                         popSplit += diffInPop
-                    newFIPS = block.FIPS + str(i)
-                    splitBlock = CensusBlock(countyFIPS=block.countyFIPS,
+                    # the split part keeps each piece's GEOID unique without changing the block FIPS
+                    splitBlock = CensusBlock(stateFIPS=block.stateFIPS,
+                                             countyFIPS=block.countyFIPS,
                                              tractFIPS=block.tractFIPS,
-                                             blockFIPS=newFIPS,
+                                             blockFIPS=block.FIPS,
+                                             splitPart=i,
                                              population=int(popSplit),
                                              isWater=block.isWater,
                                              geometry=blockPolygon)
@@ -89,28 +116,58 @@ def createAtomicBlocksFromBlockList(blockList):
             pbar.update(1)
 
     tqdm.write('       *** Creating Atomic Blocks ***')
+    outermostContainerIndices = findOutermostContainerIndices(updatedBlocks)
+    containedBlocksForContainer = {}
+    for i in reversed(range(len(updatedBlocks))):
+        containerIndex = outermostContainerIndices.get(i)
+        if containerIndex is not None:
+            containedBlocksForContainer.setdefault(containerIndex, []).append(updatedBlocks[i])
+
     atomicBlockList = []
     with tqdm(total=len(updatedBlocks)) as pbar:
         for i in reversed(range(len(updatedBlocks))):
-            block = updatedBlocks[i]
-            convertedAtomicBlock = createAtomicBlockFromCensusBlock(block)
-            atomicBlockList.append(convertedAtomicBlock)
-            for j in reversed(range(len(updatedBlocks))):
-                otherBlock = updatedBlocks[j]
-                if block != otherBlock:
-                    if doesGeographyContainTheOther(container=block, target=otherBlock):
-                        convertedAtomicBlock.importCensusBlock(otherBlock)
-                        del updatedBlocks[updatedBlocks.index(otherBlock)]
-
-                        atomicBlockThatAlreadyExists = atomicBlockWithBlock(block=otherBlock,
-                                                                            atomicBlockList=atomicBlockList)
-                        if atomicBlockThatAlreadyExists:
-                            del atomicBlockList[atomicBlockList.index(atomicBlockThatAlreadyExists)]
+            if i not in outermostContainerIndices:
+                childrenBlocks = [updatedBlocks[i]] + containedBlocksForContainer.get(i, [])
+                atomicBlockList.append(AtomicBlock(childrenBlocks=childrenBlocks))
             pbar.update(1)
 
     return atomicBlockList
 
 
+def findOutermostContainerIndices(blockList):
+    # blocks are only ever inside another block's holes, so only the holes need to be searched for contained blocks
+    envelopeIndex = EnvelopeIndex([block.geometry for block in blockList])
+    exteriorAreas = [sum(Polygon(polygon.exterior).area for polygon in polygonsOfGeometry(block.geometry))
+                     for block in blockList]
+
+    # bigger blocks first, so a block that's inside a block that's inside another one ends up with the outermost
+    outermostContainerIndices = {}
+    for containerIndex in sorted(reversed(range(len(blockList))), key=lambda index: -exteriorAreas[index]):
+        container = blockList[containerIndex]
+        candidateIndices = set()
+        for containerPolygon in polygonsOfGeometry(container.geometry):
+            if containerPolygon.interiors:
+                for interior in containerPolygon.interiors:
+                    candidateIndices.update(envelopeIndex.indicesWithinBounds(interior.bounds))
+            else:
+                candidateIndices.update(envelopeIndex.indicesWithinBounds(containerPolygon.bounds))
+
+        rootIndex = outermostContainerIndices.get(containerIndex, containerIndex)
+        for candidateIndex in sorted(candidateIndices, reverse=True):
+            if candidateIndex == containerIndex or candidateIndex == rootIndex or \
+                    candidateIndex in outermostContainerIndices:
+                continue
+            if doesGeographyContainTheOther(container=container, target=blockList[candidateIndex]):
+                outermostContainerIndices[candidateIndex] = rootIndex
+
+    # blocks with identical shapes can contain each other, make sure everything points at the outermost block
+    for blockIndex, rootIndex in outermostContainerIndices.items():
+        while rootIndex in outermostContainerIndices:
+            rootIndex = outermostContainerIndices[rootIndex]
+        outermostContainerIndices[blockIndex] = rootIndex
+    return outermostContainerIndices
+
+
 def validateAllAtomicBlocks():
     for atomicBlock in AtomicBlock.atomicBlockList:
         atomicBlock.validateNeighborLists()
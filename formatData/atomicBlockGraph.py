@@ -0,0 +1,152 @@
+import numpy as np
+from geographyHelper import CardinalDirection, findSharedBoundaryLengths, findDirectionsOfShapesFromPoint
+
+atomicBlockGraphArrayNames = ('graphIds', 'groupIds', 'offsets', 'neighbors', 'directions', 'sharedEdgeLengths',
+                              'populations', 'centroids')
+neighborsForDirection = ((CardinalDirection.north, 'northernNeighbors'),
+                         (CardinalDirection.west, 'westernNeighbors'),
+                         (CardinalDirection.east, 'easternNeighbors'),
+                         (CardinalDirection.south, 'southernNeighbors'))
+directionOrder = {direction: order for order, (direction, neighborPropertyName) in enumerate(neighborsForDirection)}
+
+
+class AtomicBlockGraph:
+    # the atomic block graph in compressed sparse row form. Node i's neighbors are
+    # neighbors[offsets[i]:offsets[i + 1]], with the matching directions (CardinalDirection values) and shared edge
+    # lengths at the same positions. Nodes are sorted by graph id.
+    # The arrays can be memory-mapped, so many processes can read one graph without copying it
+    def __init__(self, arrays):
+        missingArrayNames = [arrayName for arrayName in atomicBlockGraphArrayNames if arrayName not in arrays]
+        if missingArrayNames:
+            raise ValueError('Atomic block graph is missing arrays: {0}'.format(missingArrayNames))
+        self.graphIds = arrays['graphIds']
+        self.groupIds = arrays['groupIds']
+        self.offsets = arrays['offsets']
+        self.neighbors = arrays['neighbors']
+        self.directions = arrays['directions']
+        self.sharedEdgeLengths = arrays['sharedEdgeLengths']
+        self.populations = arrays['populations']
+        self.centroids = arrays['centroids']
+
+    def __len__(self):
+        return len(self.graphIds)
+
+    @property
+    def arrays(self):
+        return {arrayName: getattr(self, arrayName) for arrayName in atomicBlockGraphArrayNames}
+
+    def nodeIndexForGraphId(self, graphId):
+        nodeIndex = int(np.searchsorted(self.graphIds, graphId))
+        if nodeIndex == len(self.graphIds) or self.graphIds[nodeIndex] != graphId:
+            return None
+        return nodeIndex
+
+    def nodeIndicesForGraphIds(self, graphIds):
+        graphIds = np.asarray(graphIds, dtype=np.int64)
+        nodeIndices = np.searchsorted(self.graphIds, graphIds)
+        isFound = nodeIndices < len(self.graphIds)
+        isFound[isFound] = self.graphIds[nodeIndices[isFound]] == graphIds[isFound]
+        if not isFound.all():
+            raise ValueError('Graph ids are not part of this atomic block graph')
+        return nodeIndices
+
+    def cutEdgeLengths(self, labels):
+        # for each label, the length of edge its nodes share with nodes of other labels, e.g. each district's border
+        # with the other districts. Nodes labeled -1 aren't counted
+        edgeSources = np.repeat(np.arange(len(self.graphIds), dtype=np.int64), np.diff(self.offsets))
+        sourceLabels = labels[edgeSources]
+        neighborLabels = labels[self.neighbors]
+        isCut = (sourceLabels >= 0) & (neighborLabels >= 0) & (sourceLabels != neighborLabels)
+        return np.bincount(sourceLabels[isCut], weights=self.sharedEdgeLengths[isCut],
+                           minlength=int(labels.max()) + 1 if len(labels) else 0)
+
+    def neighborIndices(self, nodeIndex):
+        return self.neighbors[self.offsets[nodeIndex]:self.offsets[nodeIndex + 1]]
+
+    def neighborDirections(self, nodeIndex):
+        return self.directions[self.offsets[nodeIndex]:self.offsets[nodeIndex + 1]]
+
+    def neighborSharedEdgeLengths(self, nodeIndex):
+        return self.sharedEdgeLengths[self.offsets[nodeIndex]:self.offsets[nodeIndex + 1]]
+
+    def totalPopulation(self, nodeIndices=None):
+        if nodeIndices is None:
+            return int(self.populations.sum())
+        return int(self.populations[nodeIndices].sum())
+
+
+def createAtomicBlockGraphFromRedistrictingGroups(redistrictingGroupList):
+    atomicBlocksWithGroupIds = [(atomicBlock, redistrictingGroup.graphId)
+                                for redistrictingGroup in redistrictingGroupList
+                                for atomicBlock in redistrictingGroup.children]
+    atomicBlocksWithGroupIds.sort(key=lambda atomicBlockWithGroupId: atomicBlockWithGroupId[0].graphId)
+    nodeIndexForGraphId = {atomicBlock.graphId: nodeIndex
+                           for nodeIndex, (atomicBlock, groupId) in enumerate(atomicBlocksWithGroupIds)}
+
+    # each group's blocks are measured together with the border blocks of its neighboring groups, so edges between
+    # groups get shared lengths too. Neighbors that were attached without sharing an edge (e.g. orphans) get a
+    # shared edge length of zero
+    sharedEdgeLengthForGraphIds = {}
+    crossGroupNeighborsForGraphId = {}
+    for redistrictingGroup in redistrictingGroupList:
+        children = redistrictingGroup.children
+        childGraphIds = {atomicBlock.graphId for atomicBlock in children}
+        neighborGroupBorderBlocks = list({borderBlock.graphId: borderBlock
+                                          for neighborGroup in redistrictingGroup.iterateNeighbors()
+                                          for borderBlock in neighborGroup.borderChildren
+                                          if borderBlock.graphId in nodeIndexForGraphId and
+                                          borderBlock.graphId not in childGraphIds}.values())
+        measuredBlocks = children + neighborGroupBorderBlocks
+        sharedBoundaryLengths = findSharedBoundaryLengths([atomicBlock.geometry for atomicBlock in measuredBlocks])
+        for (firstIndex, secondIndex), length in sharedBoundaryLengths.items():
+            if firstIndex >= len(children):
+                # both are in other groups, they're measured with their own groups
+                continue
+            firstBlock = measuredBlocks[firstIndex]
+            secondBlock = measuredBlocks[secondIndex]
+            sharedEdgeLengthForGraphIds[(firstBlock.graphId, secondBlock.graphId)] = length
+            sharedEdgeLengthForGraphIds[(secondBlock.graphId, firstBlock.graphId)] = length
+            if secondIndex >= len(children):
+                crossGroupNeighborsForGraphId.setdefault(firstBlock.graphId, {})[secondBlock.graphId] = secondBlock
+                crossGroupNeighborsForGraphId.setdefault(secondBlock.graphId, {})[firstBlock.graphId] = firstBlock
+
+    offsets = [0]
+    neighbors = []
+    directions = []
+    sharedEdgeLengths = []
+    for atomicBlock, groupId in atomicBlocksWithGroupIds:
+        neighborsWithDirections = [(neighbor, direction) for direction, neighborPropertyName in neighborsForDirection
+                                   for neighbor in getattr(atomicBlock, neighborPropertyName)]
+        # blocks in other groups aren't block neighbors, they're placed in direction order after the block neighbors
+        crossGroupNeighbors = [neighbor
+                               for neighbor in crossGroupNeighborsForGraphId.get(atomicBlock.graphId, {}).values()
+                               if not atomicBlock.isNeighbor(neighbor)]
+        if crossGroupNeighbors:
+            crossGroupDirections = findDirectionsOfShapesFromPoint(
+                basePoint=atomicBlock.centerOfObject,
+                targetShapes=[neighbor.geometry for neighbor in crossGroupNeighbors])
+            neighborsWithDirections += sorted(zip(crossGroupNeighbors, crossGroupDirections),
+                                              key=lambda neighborWithDirection:
+                                              directionOrder[neighborWithDirection[1]])
+        for neighbor, direction in neighborsWithDirections:
+            neighborIndex = nodeIndexForGraphId.get(neighbor.graphId)
+            if neighborIndex is None:
+                continue
+            neighbors.append(neighborIndex)
+            directions.append(direction.value)
+            sharedEdgeLengths.append(sharedEdgeLengthForGraphIds.get((atomicBlock.graphId, neighbor.graphId), 0.0))
+        offsets.append(len(neighbors))
+
+    return AtomicBlockGraph({
+        'graphIds': np.array([atomicBlock.graphId for atomicBlock, groupId in atomicBlocksWithGroupIds],
+                             dtype=np.int64),
+        'groupIds': np.array([groupId for atomicBlock, groupId in atomicBlocksWithGroupIds], dtype=np.int64),
+        'offsets': np.array(offsets, dtype=np.int64),
+        'neighbors': np.array(neighbors, dtype=np.int64),
+        'directions': np.array(directions, dtype=np.uint8),
+        'sharedEdgeLengths': np.array(sharedEdgeLengths, dtype=np.float64),
+        'populations': np.array([atomicBlock.population for atomicBlock, groupId in atomicBlocksWithGroupIds],
+                                dtype=np.int64),
+        'centroids': np.array([(atomicBlock.geometry.centroid.x, atomicBlock.geometry.centroid.y)
+                               for atomicBlock, groupId in atomicBlocksWithGroupIds],
+                              dtype=np.float64).reshape(-1, 2)})
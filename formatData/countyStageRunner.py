@@ -0,0 +1,100 @@
+from multiprocessing import Pool
+from os import cpu_count
+from tqdm import tqdm
+from censusData.encodedGeometry import encodeGeoJSONGeometry, polygonsFromWKB
+from formatData.graphContext import GraphContext
+from formatData.graphObject import GraphObject, reserveGraphIdRange
+from formatData.redistrictingGroup import RedistrictingGroup, censusBlockFromCensusBlockDict, \
+    convertAllCensusBlocksToAtomicBlocks, removeWaterBlocksFromRedistrictingGroups, \
+    assignNeighboringBlocksToBlocksForRedistrictingGroups, splitNonContiguousRedistrictingGroups
+
+
+def groupCensusDataByCounty(censusData):
+    # geometries are encoded as they come in, so they're cheap to hold and to send to the workers
+    censusBlockDictsForCountyFIPS = {}
+    for censusBlockDict in censusData:
+        censusBlockDict = dict(censusBlockDict)
+        if type(censusBlockDict['geometry']) is not bytes:
+            censusBlockDict['geometry'] = encodeGeoJSONGeometry(censusBlockDict['geometry'])
+        censusBlockDictsForCountyFIPS.setdefault(censusBlockDict['county'], []).append(censusBlockDict)
+    # counties are in the order they first appeared in the census data
+    return list(censusBlockDictsForCountyFIPS.values())
+
+
+def graphIdsNeededForCounty(censusBlockDicts):
+    # usually enough: one atomic block per polygon, plus a redistricting group for the county and one for each atomic
+    # block if the county has to be split up. A county that needs more is prepared again in the parent process
+    numberOfPolygons = 0
+    for censusBlockDict in censusBlockDicts:
+        polygons = polygonsFromWKB(censusBlockDict['geometry'])
+        numberOfPolygons += 1 if polygons is None else max(1, len(polygons))
+    return 1 + 2 * numberOfPolygons
+
+
+def prepareRedistrictingGroupsForCounty(censusBlockDicts, shouldRemoveWaterBlocks=True):
+    redistrictingGroup = RedistrictingGroup(childrenBlocks=[], allowEmpty=True)
+    for censusBlockDict in censusBlockDicts:
+        redistrictingGroup.children.append(censusBlockFromCensusBlockDict(censusBlockDict))
+    redistrictingGroupList = [redistrictingGroup]
+
+    convertAllCensusBlocksToAtomicBlocks(redistrictingGroupList)
+    if shouldRemoveWaterBlocks:
+        removeWaterBlocksFromRedistrictingGroups(redistrictingGroupList)
+    assignNeighboringBlocksToBlocksForRedistrictingGroups(redistrictingGroupList)
+    splitNonContiguousRedistrictingGroups(redistrictingGroupList)
+    return redistrictingGroupList
+
+
+def prepareRedistrictingGroupsForCountyInWorker(task):
+    censusBlockDicts, firstGraphId, endGraphId, shouldRemoveWaterBlocks = task
+    # workers can be forked from a process that already has graph objects, start each county from a clean slate
+    with GraphContext(firstGraphId=firstGraphId, endGraphId=endGraphId):
+        try:
+            return prepareRedistrictingGroupsForCounty(censusBlockDicts=censusBlockDicts,
+                                                       shouldRemoveWaterBlocks=shouldRemoveWaterBlocks)
+        except RuntimeError:
+            if GraphObject.nextGraphId < endGraphId:
+                raise
+            # the county ran out of graph ids, hand it back so it can be prepared without a range
+            return None
+
+
+def prepareRedistrictingGroupsForCounties(censusData, shouldRemoveWaterBlocks=True, numberOfProcesses=None):
+    # counties don't depend on each other until their redistricting groups are connected, so everything up to that
+    # point runs with one county per worker process
+    tqdm.write('\n')
+    tqdm.write('*** Preparing Redistricting Groups for each County ***')
+    censusBlockDictsForCounties = groupCensusDataByCounty(censusData)
+    if numberOfProcesses is None:
+        numberOfProcesses = cpu_count()
+
+    if numberOfProcesses <= 1 or len(censusBlockDictsForCounties) <= 1:
+        redistrictingGroupList = []
+        for censusBlockDicts in censusBlockDictsForCounties:
+            redistrictingGroupList.extend(prepareRedistrictingGroupsForCounty(
+                censusBlockDicts=censusBlockDicts, shouldRemoveWaterBlocks=shouldRemoveWaterBlocks))
+        return redistrictingGroupList
+
+    # each county gets its own range of graph ids, so nothing collides when the results come back
+    tasks = []
+    for censusBlockDicts in censusBlockDictsForCounties:
+        firstGraphId, endGraphId = reserveGraphIdRange(graphIdsNeededForCounty(censusBlockDicts))
+        tasks.append((censusBlockDicts, firstGraphId, endGraphId, shouldRemoveWaterBlocks))
+
+    redistrictingGroupsForCounties = []
+    with Pool(processes=min(numberOfProcesses, len(tasks))) as processPool:
+        with tqdm(total=len(tasks)) as pbar:
+            # unpickling the results registers their graph objects and blocks in this process
+            for redistrictingGroupsForCounty in processPool.imap(prepareRedistrictingGroupsForCountyInWorker, tasks):
+                redistrictingGroupsForCounties.append(redistrictingGroupsForCounty)
+                pbar.update(1)
+
+    redistrictingGroupList = []
+    for censusBlockDicts, redistrictingGroupsForCounty in zip(censusBlockDictsForCounties,
+                                                              redistrictingGroupsForCounties):
+        if redistrictingGroupsForCounty is None:
+            # ids here come after every reserved range, so they can't collide with the other counties
+            redistrictingGroupsForCounty = prepareRedistrictingGroupsForCounty(
+                censusBlockDicts=censusBlockDicts, shouldRemoveWaterBlocks=shouldRemoveWaterBlocks)
+        redistrictingGroupList.extend(redistrictingGroupsForCounty)
+    return redistrictingGroupList
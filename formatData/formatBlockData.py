@@ -1,43 +1,47 @@
 from us import states
 from exportData.displayShapes import plotBlocksForRedistrictingGroups
 from exportData.exportData import saveDataToFileWithDescription,\
-    loadDataFromFileWithDescription  # , exportGeographiesToShapefile
-from formatData.redistrictingGroup import createRedistrictingGroupsWithAtomicBlocksFromCensusData, \
-    prepareGraphsForRedistrictingGroups, prepareBlockGraphsForRedistrictingGroups, mergeContiguousRedistrictingGroups
+    iterateRecordsFromChunkedFileWithDescription, saveArraysToDirectoryWithDescription  # , exportGeographiesToShapefile
+from formatData.atomicBlockGraph import createAtomicBlockGraphFromRedistrictingGroups
+from formatData.countyStageRunner import prepareRedistrictingGroupsForCounties
+from formatData.redistrictingGroup import prepareGraphsForRedistrictingGroups, mergeContiguousRedistrictingGroups
 
 stateAbbreviation = 'MI'
 stateInfo = states.lookup(stateAbbreviation)
 censusYear = 2010
 descriptionToWorkWith = 'All'
 
-censusData = loadDataFromFileWithDescription(censusYear=censusYear,
-                                             stateName=stateInfo.name,
-                                             descriptionOfInfo='{0}Block'.format(descriptionToWorkWith))
-redistrictingGroupList = createRedistrictingGroupsWithAtomicBlocksFromCensusData(censusData=censusData)
-# exportGeographiesToShapefile(geographyList=AtomicBlock.atomicBlockList, descriptionOfInfo='AtomicGroups')
-saveDataToFileWithDescription(data=redistrictingGroupList,
-                              censusYear=censusYear,
-                              stateName=stateInfo.name,
-                              descriptionOfInfo='{0}RedistrictingGroupPreGraph'.format(descriptionToWorkWith))
+# counties are prepared in worker processes, which re-import this file on platforms that spawn them
+if __name__ == '__main__':
+    censusData = iterateRecordsFromChunkedFileWithDescription(censusYear=censusYear,
+                                                              stateName=stateInfo.name,
+                                                              descriptionOfInfo='{0}Block'.format(
+                                                                  descriptionToWorkWith))
+    # atomic blocks, water block removal, block neighbors and non-contiguous splits, one county per process
+    redistrictingGroupList = prepareRedistrictingGroupsForCounties(censusData=censusData)
+    # exportGeographiesToShapefile(geographyList=AtomicBlock.atomicBlockList, descriptionOfInfo='AtomicGroups')
+    saveDataToFileWithDescription(data=redistrictingGroupList,
+                                  censusYear=censusYear,
+                                  stateName=stateInfo.name,
+                                  descriptionOfInfo='{0}RedistrictingGroupBlockGraphsPrepared'
+                                  .format(descriptionToWorkWith))
 
-redistrictingGroupList = prepareBlockGraphsForRedistrictingGroups(redistrictingGroupList)
-saveDataToFileWithDescription(data=redistrictingGroupList,
-                              censusYear=censusYear,
-                              stateName=stateInfo.name,
-                              descriptionOfInfo='{0}RedistrictingGroupBlockGraphsPrepared'
-                              .format(descriptionToWorkWith))
+    redistrictingGroupList = prepareGraphsForRedistrictingGroups(redistrictingGroupList)
+    saveDataToFileWithDescription(data=redistrictingGroupList,
+                                  censusYear=censusYear,
+                                  stateName=stateInfo.name,
+                                  descriptionOfInfo='{0}RedistrictingGroup'.format(descriptionToWorkWith))
+    atomicBlockGraph = createAtomicBlockGraphFromRedistrictingGroups(redistrictingGroupList)
+    saveArraysToDirectoryWithDescription(arrays=atomicBlockGraph.arrays,
+                                         censusYear=censusYear,
+                                         stateName=stateInfo.name,
+                                         descriptionOfInfo='{0}AtomicBlockGraph'.format(descriptionToWorkWith))
 
-redistrictingGroupList = prepareGraphsForRedistrictingGroups(redistrictingGroupList)
-saveDataToFileWithDescription(data=redistrictingGroupList,
-                              censusYear=censusYear,
-                              stateName=stateInfo.name,
-                              descriptionOfInfo='{0}RedistrictingGroup'.format(descriptionToWorkWith))
+    redistrictingGroupList = mergeContiguousRedistrictingGroups(redistrictingGroupList)
+    saveDataToFileWithDescription(data=redistrictingGroupList,
+                                  censusYear=censusYear,
+                                  stateName=stateInfo.name,
+                                  descriptionOfInfo='{0}MergedRedistrictingGroup'.format(descriptionToWorkWith))
 
-redistrictingGroupList = mergeContiguousRedistrictingGroups(redistrictingGroupList)
-saveDataToFileWithDescription(data=redistrictingGroupList,
-                              censusYear=censusYear,
-                              stateName=stateInfo.name,
-                              descriptionOfInfo='{0}MergedRedistrictingGroup'.format(descriptionToWorkWith))
-
-plotBlocksForRedistrictingGroups(redistrictingGroups=redistrictingGroupList,
-                                 showDistrictNeighborConnections=True)
+    plotBlocksForRedistrictingGroups(redistrictingGroups=redistrictingGroupList,
+                                     showDistrictNeighborConnections=True)
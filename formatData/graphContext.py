@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from censusData.blockTable import BlockTable
+from censusData.censusBlock import CensusBlock
+from censusData.censusCounty import County
+from formatData.atomicBlock import AtomicBlock
+from formatData.graphObject import GraphObject
+
+# the class-level registries a graph context owns. While a context is active they hold that context's registries,
+# so everything that reads them (e.g. GraphObject.graphObjectDict lookups) stays a plain attribute access
+registryAttributes = ((GraphObject, 'graphObjectDict'),
+                      (GraphObject, 'nextGraphId'),
+                      (GraphObject, 'graphIdRange'),
+                      (AtomicBlock, 'atomicBlockList'),
+                      (AtomicBlock, 'atomicBlockForBlock'),
+                      (CensusBlock, 'blockTable'),
+                      (County, 'countyList'),
+                      (County, 'countyDict'))
+
+
+class GraphContext:
+    # owns the graph object, atomic block, census block and county registries for one run or one worker
+    def __init__(self, firstGraphId=0, endGraphId=None, adoptActiveRegistries=False):
+        if adoptActiveRegistries:
+            self.registries = {(owner, attributeName): getattr(owner, attributeName)
+                               for owner, attributeName in registryAttributes}
+        else:
+            self.registries = {(GraphObject, 'graphObjectDict'): {},
+                               (GraphObject, 'nextGraphId'): firstGraphId,
+                               (GraphObject, 'graphIdRange'): (firstGraphId, endGraphId),
+                               (AtomicBlock, 'atomicBlockList'): [],
+                               (AtomicBlock, 'atomicBlockForBlock'): {},
+                               (CensusBlock, 'blockTable'): BlockTable(),
+                               (County, 'countyList'): [],
+                               (County, 'countyDict'): {}}
+        self.isActive = adoptActiveRegistries
+        self.previousContexts = []
+        self.pinnedGraphObjects = []
+
+    activeContext = None
+
+    def __enter__(self):
+        self.activate()
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.deactivate()
+
+    def activate(self):
+        if self.isActive:
+            raise RuntimeError('Graph context is already active')
+        previousContext = GraphContext.activeContext
+        if previousContext is not None:
+            previousContext.storeRegistries()
+        self.previousContexts.append(previousContext)
+        for (owner, attributeName), registry in self.registries.items():
+            setattr(owner, attributeName, registry)
+        self.isActive = True
+        GraphContext.activeContext = self
+
+    def deactivate(self):
+        if GraphContext.activeContext is not self:
+            raise RuntimeError('Only the most recently activated graph context can be deactivated')
+        self.storeRegistries()
+        previousContext = self.previousContexts.pop()
+        if previousContext is not None:
+            for (owner, attributeName), registry in previousContext.registries.items():
+                setattr(owner, attributeName, registry)
+            previousContext.isActive = True
+        GraphContext.activeContext = previousContext
+
+    def storeRegistries(self):
+        # registries can be rebound while active (e.g. the id counter), so take whatever is current
+        self.registries = {(owner, attributeName): getattr(owner, attributeName)
+                           for owner, attributeName in registryAttributes}
+        self.isActive = False
+
+    def checkIsActive(self):
+        if GraphContext.activeContext is not self:
+            raise RuntimeError('Graph context needs to be active')
+
+    @contextmanager
+    def pinned(self, graphObjects):
+        # pinned objects, and everything they reach, survive releaseUnreachable even when they aren't in its roots
+        self.pinnedGraphObjects.append(list(graphObjects))
+        try:
+            yield
+        finally:
+            self.pinnedGraphObjects.pop()
+
+    def release(self, graphObjects):
+        self.checkIsActive()
+        releasedIds = set()
+        for graphObject in graphObjects:
+            if GraphObject.graphObjectDict.get(graphObject.graphId) is graphObject:
+                del GraphObject.graphObjectDict[graphObject.graphId]
+                releasedIds.add(id(graphObject))
+        if releasedIds:
+            AtomicBlock.atomicBlockList = [atomicBlock for atomicBlock in AtomicBlock.atomicBlockList
+                                           if id(atomicBlock) not in releasedIds]
+            AtomicBlock.atomicBlockForBlock = {block: atomicBlock
+                                               for block, atomicBlock in AtomicBlock.atomicBlockForBlock.items()
+                                               if id(atomicBlock) not in releasedIds}
+        return len(releasedIds)
+
+    def releaseUnreachable(self, rootGraphObjects):
+        # drops every graph object, and every census block's row, that can't be reached from the roots or pinned
+        # objects through children and neighbors. Returns the number of graph objects released
+        self.checkIsActive()
+        reachableObjectIds = set()
+        reachableBlocks = set()
+        objectsToVisit = list(rootGraphObjects)
+        for pinnedGraphObjects in self.pinnedGraphObjects:
+            objectsToVisit.extend(pinnedGraphObjects)
+        while objectsToVisit:
+            graphObject = objectsToVisit.pop()
+            if id(graphObject) in reachableObjectIds:
+                continue
+            reachableObjectIds.add(id(graphObject))
+            if isinstance(graphObject, GraphObject):
+                for neighborId in graphObject.neighborGraphIds:
+                    neighbor = GraphObject.graphObjectDict.get(neighborId)
+                    if neighbor is not None:
+                        objectsToVisit.append(neighbor)
+            if isinstance(graphObject, AtomicBlock):
+                reachableBlocks.update(graphObject.children)
+            else:
+                objectsToVisit.extend(getattr(graphObject, 'children', []))
+
+        unreachableGraphObjects = [graphObject for graphObject in GraphObject.graphObjectDict.values()
+                                   if id(graphObject) not in reachableObjectIds]
+        releasedCount = self.release(unreachableGraphObjects)
+        # atomic blocks that were loaded again are registered under the same id, so their older copies are only
+        # left in the atomic block list
+        AtomicBlock.atomicBlockList = [atomicBlock for atomicBlock in AtomicBlock.atomicBlockList
+                                       if id(atomicBlock) in reachableObjectIds]
+
+        blockTable = CensusBlock.blockTable
+        unreachableRows = [rowIndex for rowIndex in blockTable.liveRowIndices().tolist()
+                           if blockTable.blocks[rowIndex] not in reachableBlocks]
+        if unreachableRows:
+            blockTable.releaseRows(unreachableRows)
+        return releasedCount
+
+
+GraphContext.activeContext = GraphContext(adoptActiveRegistries=True)
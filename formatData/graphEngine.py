@@ -0,0 +1,114 @@
+import numpy as np
+
+
+class GraphEngine:
+    # a set of graph objects as arrays: node i is graphObjects[i], with its population, a label and (worked out the
+    # first time they're asked for) its bounds. Neighbors are in compressed sparse row form, node i's are
+    # neighbors[offsets[i]:offsets[i + 1]] in allNeighbors order, and only neighbors inside the engine are kept.
+    # Labels mark groups of nodes, e.g. what a fill has taken, and the population of each label is kept up to date as
+    # nodes are relabeled. The graph objects keep their own neighbors, so build a new engine when those change
+    def __init__(self, graphObjects):
+        self.graphObjects = list(graphObjects)
+        self.nodeIndexForGraphId = {graphObject.graphId: nodeIndex
+                                    for nodeIndex, graphObject in enumerate(self.graphObjects)}
+        if len(self.nodeIndexForGraphId) != len(self.graphObjects):
+            raise ValueError('Graph engine was given the same graph object more than once')
+        numberOfNodes = len(self.graphObjects)
+        self.populations = np.fromiter((graphObject.population for graphObject in self.graphObjects),
+                                       dtype=np.int64, count=numberOfNodes)
+        self.labels = np.zeros(numberOfNodes, dtype=np.int64)
+        self.populationForLabel = {0: int(self.populations.sum())}
+        self.cachedBounds = None
+
+        offsets = [0]
+        neighbors = []
+        for graphObject in self.graphObjects:
+            for neighborId in graphObject.iterateNeighborGraphIds():
+                neighborIndex = self.nodeIndexForGraphId.get(neighborId)
+                if neighborIndex is not None:
+                    neighbors.append(neighborIndex)
+            offsets.append(len(neighbors))
+        self.offsets = np.array(offsets, dtype=np.int64)
+        self.neighbors = np.array(neighbors, dtype=np.int64)
+        self.edgeSources = np.repeat(np.arange(numberOfNodes, dtype=np.int64), np.diff(self.offsets))
+
+    def __len__(self):
+        return len(self.graphObjects)
+
+    @property
+    def bounds(self):
+        if self.cachedBounds is None:
+            self.cachedBounds = np.array([graphObject.geometry.bounds for graphObject in self.graphObjects],
+                                         dtype=np.float64).reshape(-1, 4)
+        return self.cachedBounds
+
+    def nodeIndicesForGraphObjects(self, graphObjects):
+        nodeIndices = np.fromiter((self.nodeIndexForGraphId.get(graphObject.graphId, -1)
+                                   for graphObject in graphObjects), dtype=np.int64)
+        if (nodeIndices < 0).any():
+            raise ValueError('Graph objects are not part of this graph engine')
+        return nodeIndices
+
+    def maskForGraphObjects(self, graphObjects):
+        # graph objects that aren't part of the engine are left out, like a membership test would
+        nodeIndices = np.fromiter((self.nodeIndexForGraphId.get(graphObject.graphId, -1)
+                                   for graphObject in graphObjects), dtype=np.int64)
+        mask = np.zeros(len(self.graphObjects), dtype=bool)
+        mask[nodeIndices[nodeIndices >= 0]] = True
+        return mask
+
+    def graphObjectsForNodes(self, nodes):
+        # nodes are either a mask or node indices
+        nodeIndices = np.flatnonzero(nodes) if nodes.dtype == bool else nodes
+        return [self.graphObjects[nodeIndex] for nodeIndex in nodeIndices.tolist()]
+
+    def populationOfGraphObjects(self, graphObjects):
+        return int(self.populations[self.nodeIndicesForGraphObjects(graphObjects)].sum())
+
+    def populationOfLabel(self, label):
+        return self.populationForLabel.get(label, 0)
+
+    def setLabels(self, nodeIndices, label):
+        nodeIndices = np.unique(nodeIndices)
+        previousLabels = self.labels[nodeIndices]
+        for previousLabel in np.unique(previousLabels).tolist():
+            self.populationForLabel[previousLabel] -= int(self.populations[nodeIndices[previousLabels ==
+                                                                                       previousLabel]].sum())
+        self.populationForLabel[label] = self.populationOfLabel(label) + int(self.populations[nodeIndices].sum())
+        self.labels[nodeIndices] = label
+
+    def clearLabels(self):
+        self.labels[:] = 0
+        self.populationForLabel = {0: int(self.populations.sum())}
+
+    def neighborsOfNodes(self, nodeIndices, nodeMask=None):
+        # each node's neighbors in turn, only those in the mask if there is one. A neighbor of more than one of the
+        # nodes shows up more than once
+        if len(nodeIndices) == 0:
+            return np.empty(0, dtype=np.int64)
+        neighbors = np.concatenate([self.neighbors[self.offsets[nodeIndex]:self.offsets[nodeIndex + 1]]
+                                    for nodeIndex in nodeIndices.tolist()])
+        if nodeMask is not None:
+            neighbors = neighbors[nodeMask[neighbors]]
+        return neighbors
+
+    def undirectedNeighborLists(self, nodeMask):
+        # the masked nodes' neighbors among themselves, taken to go both ways. Masked nodes are renumbered by their
+        # position in nodeIndices, and each list is sorted
+        nodeIndices = np.flatnonzero(nodeMask)
+        positionForNode = np.full(len(self.graphObjects), -1, dtype=np.int64)
+        positionForNode[nodeIndices] = np.arange(len(nodeIndices), dtype=np.int64)
+        sources = positionForNode[self.edgeSources]
+        targets = positionForNode[self.neighbors]
+        isKept = (sources >= 0) & (targets >= 0) & (sources != targets)
+        sources, targets = sources[isKept], targets[isKept]
+        sources, targets = np.concatenate((sources, targets)), np.concatenate((targets, sources))
+        order = np.lexsort((targets, sources))
+        sources, targets = sources[order], targets[order]
+        isFirst = np.ones(len(sources), dtype=bool)
+        isFirst[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+        sources, targets = sources[isFirst], targets[isFirst]
+        ends = np.cumsum(np.bincount(sources, minlength=len(nodeIndices))).tolist()
+        targets = targets.tolist()
+        neighborLists = [targets[start:end] for start, end in zip([0] + ends[:-1], ends)]
+        return nodeIndices, positionForNode, neighborLists
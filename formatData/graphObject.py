@@ -1,113 +1,147 @@
-from geographyHelper import findDirectionOfShapeFromPoint, CardinalDirection, intersectingGeometries
+from geographyHelper import findDirectionOfShapeFromPoint, findDirectionsOfShapesFromPoint, CardinalDirection, \
+    intersectingPolygonPairs
+
+
+neighborDirectionOrder = (CardinalDirection.north, CardinalDirection.west, CardinalDirection.east,
+                          CardinalDirection.south)
+legacyNeighborListNames = ((CardinalDirection.north, '_GraphObject__northernNeighbors'),
+                           (CardinalDirection.west, '_GraphObject__westernNeighbors'),
+                           (CardinalDirection.east, '_GraphObject__easternNeighbors'),
+                           (CardinalDirection.south, '_GraphObject__southernNeighbors'))
 
 
 class GraphObject:
     def __init__(self, centerOfObject):
         self.graphId = getNextUniqueId()
         GraphObject.graphObjectDict[self.graphId] = self
-        self.__northernNeighbors = []
-        self.__westernNeighbors = []
-        self.__easternNeighbors = []
-        self.__southernNeighbors = []
+        # neighbor graph id -> direction of the neighbor, in the order the neighbors were added
+        self.__neighborDirections = {}
+        self.__neighborIdsInDirection = neighborIdsInDirectionFromNeighborDirections(self.__neighborDirections)
         self.populationEnergy = 0
         self.updateCenterOfObject(centerOfObject)
 
     graphObjectDict = {}
+    graphIdRange = (0, None)
+    # ids are never reused, so this only ever goes up, including past the ids of unpickled objects
+    nextGraphId = 0
+
 
+    def __getstate__(self):
+        # the neighbor ids in each direction are rebuilt from the neighbor directions when unpickling
+        state = self.__dict__.copy()
+        state.pop('_GraphObject__neighborIdsInDirection', None)
+        return state
 
     def __setstate__(self, state):
         GraphObject.graphObjectDict[state['graphId']] = self
+        GraphObject.nextGraphId = max(GraphObject.nextGraphId, state['graphId'] + 1)
+        if '_GraphObject__neighborDirections' not in state:
+            # older pickles have a list of neighbor ids for each direction
+            neighborDirections = {}
+            for direction, legacyNeighborListName in legacyNeighborListNames:
+                for neighborId in state.pop(legacyNeighborListName, []):
+                    neighborDirections.setdefault(neighborId, direction)
+            state['_GraphObject__neighborDirections'] = neighborDirections
         self.__dict__ = state
+        self.__neighborIdsInDirection = neighborIdsInDirectionFromNeighborDirections(self.__neighborDirections)
 
 
     @property
     def hasNeighbors(self):
-        if self.northernNeighbors or \
-                self.westernNeighbors or \
-                self.easternNeighbors or \
-                self.southernNeighbors:
-            return True
-        else:
-            return False
+        return len(self.__neighborDirections) > 0
 
+    def neighborsInDirection(self, direction):
+        return [GraphObject.graphObjectDict[neighborId] for neighborId in self.__neighborIdsInDirection[direction]]
 
     @property
     def northernNeighbors(self):
-        return [GraphObject.graphObjectDict[_] for _ in self.__northernNeighbors]
+        return self.neighborsInDirection(CardinalDirection.north)
 
     @property
     def westernNeighbors(self):
-        return [GraphObject.graphObjectDict[_] for _ in self.__westernNeighbors]
+        return self.neighborsInDirection(CardinalDirection.west)
 
     @property
     def easternNeighbors(self):
-        return [GraphObject.graphObjectDict[_] for _ in self.__easternNeighbors]
+        return self.neighborsInDirection(CardinalDirection.east)
 
     @property
     def southernNeighbors(self):
-        return [GraphObject.graphObjectDict[_] for _ in self.__southernNeighbors]
+        return self.neighborsInDirection(CardinalDirection.south)
 
     @property
     def allNeighbors(self):
-        return self.northernNeighbors + self.westernNeighbors + self.easternNeighbors + self.southernNeighbors
+        # northern, then western, eastern and southern neighbors, each in the order they were added
+        return list(self.iterateNeighbors())
+
+    def iterateNeighbors(self):
+        # allNeighbors without building a list, for walks over the graph
+        graphObjectDict = GraphObject.graphObjectDict
+        for neighborId in self.iterateNeighborGraphIds():
+            yield graphObjectDict[neighborId]
+
+    def iterateNeighborGraphIds(self):
+        # the ids of allNeighbors, in the same order
+        for neighborIds in self.__neighborIdsInDirection.values():
+            yield from neighborIds
+
+    @property
+    def neighborGraphIds(self):
+        # a live view, for when only the ids are needed
+        return self.__neighborDirections.keys()
+
+    def directionOfNeighbor(self, graphObject):
+        return self.__neighborDirections.get(graphObject.graphId)
+
+    @property
+    def centerOfObject(self):
+        return self.__centerOfObject
 
     def updateCenterOfObject(self, center):
         self.__centerOfObject = center
 
     def isNeighbor(self, graphObject):
-        if graphObject in self.northernNeighbors or \
-                graphObject in self.westernNeighbors or \
-                graphObject in self.easternNeighbors or \
-                graphObject in self.southernNeighbors:
-            return True
-        else:
-            return False
+        return graphObject.graphId in self.__neighborDirections
 
     def clearNeighborGraphObjects(self):
-        self.__northernNeighbors = []
-        self.__westernNeighbors = []
-        self.__easternNeighbors = []
-        self.__southernNeighbors = []
-
-    def addNeighbors(self, neighbors):
-        for neighbor in neighbors:
-            self.addNeighbor(graphObject=neighbor)
+        self.__neighborDirections = {}
+        self.__neighborIdsInDirection = neighborIdsInDirectionFromNeighborDirections(self.__neighborDirections)
+
+    def addNeighbors(self, neighbors, directions=None):
+        if directions is None:
+            # directions for all the new neighbors in one go
+            neighbors = [neighbor for neighbor in neighbors if neighbor.graphId not in self.__neighborDirections]
+            directions = findDirectionsOfShapesFromPoint(basePoint=self.__centerOfObject,
+                                                         targetShapes=[neighbor.geometry for neighbor in neighbors])
+        for neighbor, direction in zip(neighbors, directions):
+            self.addNeighbor(graphObject=neighbor, direction=direction)
 
     def addNeighbor(self, graphObject, direction=None):
+        if graphObject.graphId in self.__neighborDirections:
+            return
         if direction is None:
             direction = findDirectionOfShapeFromPoint(basePoint=self.__centerOfObject,
                                                       targetShape=graphObject.geometry)
-        if graphObject not in self.allNeighbors:
-            if direction == CardinalDirection.north:
-                self.__northernNeighbors.append(graphObject.graphId)
-            elif direction == CardinalDirection.west:
-                self.__westernNeighbors.append(graphObject.graphId)
-            elif direction == CardinalDirection.east:
-                self.__easternNeighbors.append(graphObject.graphId)
-            elif direction == CardinalDirection.south:
-                self.__southernNeighbors.append(graphObject.graphId)
+        if direction in neighborDirectionOrder:
+            self.__neighborDirections[graphObject.graphId] = direction
+            self.__neighborIdsInDirection[direction][graphObject.graphId] = None
 
     def removeNeighbors(self, neighbors):
         for neighbor in neighbors:
             self.removeNeighbor(neighbor)
 
     def removeNeighbor(self, neighbor):
-        for northernNeighbor in self.northernNeighbors:
-            if neighbor is northernNeighbor:
-                self.__northernNeighbors.remove(neighbor.graphId)
-        for westernNeighbor in self.westernNeighbors:
-            if neighbor is westernNeighbor:
-                self.__westernNeighbors.remove(neighbor.graphId)
-        for easternNeighbor in self.easternNeighbors:
-            if neighbor is easternNeighbor:
-                self.__easternNeighbors.remove(neighbor.graphId)
-        for southernNeighbor in self.southernNeighbors:
-            if neighbor is southernNeighbor:
-                self.__southernNeighbors.remove(neighbor.graphId)
+        direction = self.__neighborDirections.pop(neighbor.graphId, None)
+        if direction is not None:
+            del self.__neighborIdsInDirection[direction][neighbor.graphId]
 
     def removeNonIntersectingNeighbors(self):
-        for neighbor in self.allNeighbors:
-            if not intersectingGeometries(self, neighbor):
+        neighbors = self.allNeighbors
+        isIntersecting, _ = intersectingPolygonPairs(aPolygons=[self.geometry] * len(neighbors),
+                                                     bPolygons=[neighbor.geometry for neighbor in neighbors],
+                                                     shouldFindSharedEdgeLengths=False)
+        for neighbor, isNeighborIntersecting in zip(neighbors, isIntersecting.tolist()):
+            if not isNeighborIntersecting:
                 self.removeNeighbor(neighbor)
 
     def removeNeighborConnections(self):
@@ -116,10 +150,39 @@ class GraphObject:
         self.clearNeighborGraphObjects()
 
     def validateNeighborLists(self):
-        if len(self.allNeighbors) != len(set(self.allNeighbors)):
-            raise ValueError('Found a duplicate neighbor for GraphObject:{0}'.format(self.graphId))
+        # neighbors are keyed by graph id so they can't be duplicated, but they can point at something unregistered
+        for neighborId in self.__neighborDirections:
+            if neighborId == self.graphId or neighborId not in GraphObject.graphObjectDict:
+                raise ValueError('Found an invalid neighbor {0} for GraphObject:{1}'.format(neighborId, self.graphId))
+
+
+def neighborIdsInDirectionFromNeighborDirections(neighborDirections):
+    # direction -> neighbor ids in that direction, in the order they were added. Values are unused, the dicts are
+    # ordered sets
+    neighborIdsInDirection = {direction: {} for direction in neighborDirectionOrder}
+    for neighborId, direction in neighborDirections.items():
+        neighborIdsInDirection[direction][neighborId] = None
+    return neighborIdsInDirection
+
+
+def reserveGraphIdRange(numberOfGraphIds):
+    # hands a block of ids to someone else, e.g. a worker process, so ids stay unique when their objects come back
+    firstGraphId = getNextUniqueId()
+    endGraphId = firstGraphId + numberOfGraphIds
+    GraphObject.nextGraphId = endGraphId
+    return firstGraphId, endGraphId
+
+
+def useGraphIdRange(firstGraphId, endGraphId=None):
+    # parallel workers each get their own range of graph ids, so their graph objects can be merged afterwards
+    GraphObject.graphIdRange = (firstGraphId, endGraphId)
+    GraphObject.nextGraphId = firstGraphId
+
 
 def getNextUniqueId():
-    if GraphObject.graphObjectDict:
-        return max(GraphObject.graphObjectDict.keys()) + 1
-    return 0
+    firstGraphId, endGraphId = GraphObject.graphIdRange
+    nextUniqueId = max(GraphObject.nextGraphId, firstGraphId)
+    if endGraphId is not None and nextUniqueId >= endGraphId:
+        raise RuntimeError('Ran out of graph ids in the range {0} to {1}'.format(firstGraphId, endGraphId))
+    GraphObject.nextGraphId = nextUniqueId + 1
+    return nextUniqueId
@@ -1,18 +1,19 @@
 from exportData.displayShapes import plotGraphObjectGroups, plotPolygons, plotRedistrictingGroups, \
     plotBlocksForRedistrictingGroup
 from shapely.geometry import MultiPolygon
+import numpy as np
 from exportData.exportData import saveDataToFileWithDescription
 from formatData.atomicBlock import createAtomicBlocksFromBlockList, validateAllAtomicBlocks, \
     assignNeighborBlocksFromCandidateBlocks
 from formatData.blockBorderGraph import BlockBorderGraph
 from formatData.graphObject import GraphObject
-from geographyHelper import findContiguousGroupsOfGraphObjects, findClosestGeometry, intersectingGeometries, Alignment, \
+from geographyHelper import findContiguousGroupsOfGraphObjects, findClosestGeometry, Alignment, \
     mostCardinalOfGeometries, CardinalDirection, polygonFromMultipleGeometries, polygonFromMultiplePolygons, \
-    doesPolygonContainTheOther, getPolygonThatContainsGeometry, intersectingPolygons, allIntersectingPolygons
+    getPolygonThatContainsGeometry, intersectingPolygons, allIntersectingPolygons, \
+    findSharedBoundaryLengths, findDirections, cardinalDirectionsFromValues, findIntersectingPolygonPairs, \
+    ContainerGeometryCache, classifyGeometriesIntoContainers
 from enum import Enum
 from censusData import censusBlock
-from multiprocessing.dummy import Pool
-from itertools import repeat
 from tqdm import tqdm
 
 
@@ -251,28 +252,26 @@ class RedistrictingGroup(BlockBorderGraph, GraphObject):
             seamOnEdge = False
             seamSplitPolygon = polygonSplitResult[2]
 
-        aSplit = []
-        bSplit = []
-        seamSplit = []
-        for block in self.children:
-            if doesPolygonContainTheOther(container=aSplitPolygon, target=block.geometry, ignoreInteriors=False):
-                aSplit.append(block)
-            elif doesPolygonContainTheOther(container=bSplitPolygon, target=block.geometry, ignoreInteriors=False):
-                bSplit.append(block)
-            elif not seamOnEdge and doesPolygonContainTheOther(container=seamSplitPolygon, target=block.geometry,
-                                                               ignoreInteriors=False):
-                seamSplit.append(block)
-            # elif allIntersectingPolygons(seamSplitPolygon, block.geometry):
-            #     seamSplit.append(block)
-            #     plotPolygons([block.geometry])
-            else:
-                saveDataToFileWithDescription(data=[self, alignment, aSplitPolygon, bSplitPolygon, seamSplitPolygon,
-                                                    block.geometry, seamOnEdge, polygonSplitResultType],
-                                              censusYear='',
-                                              stateName='',
-                                              descriptionOfInfo='ErrorCase-CouldNotFindContainerForBlock')
-                plotPolygons([aSplitPolygon, bSplitPolygon, seamSplitPolygon, block.geometry])
-                raise RuntimeError("Couldn't find a container for block: {0}".format(block.geometry))
+        splitPolygons = [aSplitPolygon, bSplitPolygon]
+        if not seamOnEdge:
+            splitPolygons.append(seamSplitPolygon)
+        # first of the a, b and seam polygons that contains each block
+        splitIndices = classifyGeometriesIntoContainers(containers=splitPolygons,
+                                                        targetGeometries=[block.geometry for block in self.children],
+                                                        ignoreInteriors=False)
+        if (splitIndices < 0).any():
+            block = self.children[int(np.flatnonzero(splitIndices < 0)[0])]
+            saveDataToFileWithDescription(data=[self, alignment, aSplitPolygon, bSplitPolygon, seamSplitPolygon,
+                                                block.geometry, seamOnEdge, polygonSplitResultType],
+                                          censusYear='',
+                                          stateName='',
+                                          descriptionOfInfo='ErrorCase-CouldNotFindContainerForBlock')
+            plotPolygons([aSplitPolygon, bSplitPolygon, seamSplitPolygon, block.geometry])
+            raise RuntimeError("Couldn't find a container for block: {0}".format(block.geometry))
+        splitIndices = splitIndices.tolist()
+        aSplit = [block for block, splitIndex in zip(self.children, splitIndices) if splitIndex == 0]
+        bSplit = [block for block, splitIndex in zip(self.children, splitIndices) if splitIndex == 1]
+        seamSplit = [block for block, splitIndex in zip(self.children, splitIndices) if splitIndex == 2]
 
         aSplitPopulation = sum(block.population for block in aSplit)
         bSplitPopulation = sum(block.population for block in bSplit)
@@ -338,12 +337,15 @@ class RedistrictingGroup(BlockBorderGraph, GraphObject):
             bSplitRepresentativeBlock = mostCardinalOfGeometries(geometryList=borderChildrenRepresentativeCandidates,
                                                                  direction=bSplitRepresentativeBlockDirection)
 
+            splitPolygonCache = ContainerGeometryCache()
             aSplitPolygon = getPolygonThatContainsGeometry(polygonList=splitPolygons,
                                                            targetGeometry=aSplitRepresentativeBlock,
-                                                           useTargetRepresentativePoint=True)
+                                                           useTargetRepresentativePoint=True,
+                                                           containerGeometryCache=splitPolygonCache)
             bSplitPolygon = getPolygonThatContainsGeometry(polygonList=splitPolygons,
                                                            targetGeometry=bSplitRepresentativeBlock,
-                                                           useTargetRepresentativePoint=True)
+                                                           useTargetRepresentativePoint=True,
+                                                           containerGeometryCache=splitPolygonCache)
             leftOverPolygons = [geometry for geometry in splitPolygons if
                                 geometry is not aSplitPolygon and geometry is not bSplitPolygon]
             if aSplitPolygon is None or bSplitPolygon is None:
@@ -492,12 +494,31 @@ class RedistrictingGroup(BlockBorderGraph, GraphObject):
                 raise RuntimeError("Some blocks have neighbor connections with block outside the redistricting group")
 
     def assignNeighboringBlocksToBlocks(self):
-        with tqdm(total=len(self.children)) as pbar:
-            threadPool = Pool(4)
-            threadPool.starmap(assignNeighborBlocksFromCandidateBlocks,
-                               zip(self.children,
-                                   repeat(self.children),
-                                   repeat(pbar)))
+        # blocks are neighbors when they share a boundary segment, found for all the blocks in one pass
+        children = self.children
+        sharedBoundaryLengths = findSharedBoundaryLengths([block.geometry for block in children])
+        neighborsForBlock = {block: [] for block in children}
+        for firstIndex, secondIndex in sorted(sharedBoundaryLengths.keys()):
+            neighborsForBlock[children[firstIndex]].append(children[secondIndex])
+            neighborsForBlock[children[secondIndex]].append(children[firstIndex])
+
+        # directions for every neighbor pair in one call, from each block's center to its neighbor's centroid
+        centroidForBlock = {block: (centroid.x, centroid.y)
+                            for block, centroid in zip(children, [block.geometry.centroid for block in children])}
+        centerForBlock = {block: (center.x, center.y)
+                          for block, center in zip(children, [block.centerOfObject for block in children])}
+        basePoints = [centerForBlock[block] for block in children for _ in neighborsForBlock[block]]
+        targetPoints = [centroidForBlock[neighbor] for block in children for neighbor in neighborsForBlock[block]]
+        directions = iter(cardinalDirectionsFromValues(findDirections(basePoints=basePoints,
+                                                                      targetPoints=targetPoints)))
+
+        with tqdm(total=len(children)) as pbar:
+            for block in children:
+                block.clearNeighborGraphObjects()
+                neighborsOfBlock = neighborsForBlock[block]
+                block.addNeighbors(neighbors=neighborsOfBlock,
+                                   directions=[next(directions) for _ in neighborsOfBlock])
+                pbar.update(1)
 
     def __lt__(self, other):
         if isinstance(other, RedistrictingGroup):
@@ -677,13 +698,20 @@ def assignNeighboringRedistrictingGroupsToRedistrictingGroups(changedRedistricti
 
     tqdm.write('\n')
     tqdm.write('*** Assign Neighbors to Changed Redistricting Groups ***')
+    # which changed groups touch which candidates only depends on their geometries, so find them all up front
+    intersectingPairs = findIntersectingPolygonPairs(
+        aPolygons=[changedRedistrictingGroup.geometry for changedRedistrictingGroup in changedRedistrictingGroups],
+        bPolygons=[redistrictingGroup.geometry for redistrictingGroup in allNeighborCandidates])
+    intersectingCandidatesForChangedGroup = [[] for _ in changedRedistrictingGroups]
+    for changedGroupIndex, candidateIndex in intersectingPairs:
+        intersectingCandidatesForChangedGroup[changedGroupIndex].append(allNeighborCandidates[candidateIndex])
     with tqdm(total=len(changedRedistrictingGroups)) as pbar:
         # assign neighbors to changed groups and those that they touch
-        for changedRedistrictingGroup in changedRedistrictingGroups:
+        for changedRedistrictingGroup, intersectingCandidates in zip(changedRedistrictingGroups,
+                                                                     intersectingCandidatesForChangedGroup):
             changedRedistrictingGroup.clearNeighborGraphObjects()
-            for redistrictingGroupToCheckAgainst in [aGroup for aGroup in allNeighborCandidates
-                                                     if aGroup is not changedRedistrictingGroup]:
-                if intersectingGeometries(changedRedistrictingGroup, redistrictingGroupToCheckAgainst):
+            for redistrictingGroupToCheckAgainst in intersectingCandidates:
+                if redistrictingGroupToCheckAgainst is not changedRedistrictingGroup:
                     changedRedistrictingGroup.addNeighbors([redistrictingGroupToCheckAgainst])
                     redistrictingGroupToCheckAgainst.addNeighbors([changedRedistrictingGroup])
             pbar.update(1)
@@ -731,11 +759,6 @@ def mergeGroupsOfRedistrictingGroups(groupsOfRedistrictingGroups):
     return mergedRedistrictingGroups
 
 
-def getRedistrictingGroupWithCountyFIPS(countyFIPS, redistrictingGroupList):
-    # for use when first loading redistricting group
-    return next((item for item in redistrictingGroupList if item.FIPS == countyFIPS), None)
-
-
 def convertAllCensusBlocksToAtomicBlocks(redistrictingGroupList):
     tqdm.write('\n')
     tqdm.write('*** Converting All Census Blocks to Atomic Blocks ***')
@@ -774,34 +797,43 @@ def validateContiguousRedistrictingGroups(groupList):
             len(contiguousRegions)))
 
 
+def censusBlockFromCensusBlockDict(censusBlockDict):
+    isWater = False
+    if censusBlockDict['block'][0] == '0':
+        isWater = True
+    # the geometry is GeoJSON straight from the census data, or WKB if it was already encoded
+    geometry = censusBlockDict['geometry']
+    if type(geometry) is bytes:
+        geometryArguments = {'geometry': geometry}
+    else:
+        geometryArguments = {'geoJSONGeometry': geometry}
+    return censusBlock.CensusBlock(stateFIPS=censusBlockDict.get('state'),
+                                   countyFIPS=censusBlockDict['county'],
+                                   tractFIPS=censusBlockDict['tract'],
+                                   blockFIPS=censusBlockDict['block'],
+                                   population=int(censusBlockDict['P001001']),
+                                   isWater=isWater,
+                                   **geometryArguments)
+
+
 def createRedistrictingGroupsWithAtomicBlocksFromCensusData(censusData):
-    redistrictingGroupList = []
+    redistrictingGroupForCountyFIPS = {}
     tqdm.write('\n')
     tqdm.write('*** Creating Redistricting Groups from Census Data ***')
-    with tqdm(total=len(censusData)) as pbar:
+    # census data can be streamed from a chunked record file, in which case we don't know how many blocks there are
+    totalNumberOfBlocks = len(censusData) if hasattr(censusData, '__len__') else None
+    with tqdm(total=totalNumberOfBlocks) as pbar:
         for censusBlockDict in censusData:
-            redistrictingGroupWithCountyFIPS = getRedistrictingGroupWithCountyFIPS(censusBlockDict['county'],
-                                                                                   redistrictingGroupList)
+            redistrictingGroupWithCountyFIPS = redistrictingGroupForCountyFIPS.get(censusBlockDict['county'])
             if redistrictingGroupWithCountyFIPS is None:
                 redistrictingGroupWithCountyFIPS = RedistrictingGroup(childrenBlocks=[], allowEmpty=True)
-                redistrictingGroupWithCountyFIPS.FIPS = censusBlockDict['county']
-                redistrictingGroupList.append(redistrictingGroupWithCountyFIPS)
-
-            isWater = False
-            if censusBlockDict['block'][0] == '0':
-                isWater = True
-            blockFromData = censusBlock.CensusBlock(countyFIPS=censusBlockDict['county'],
-                                                    tractFIPS=censusBlockDict['tract'],
-                                                    blockFIPS=censusBlockDict['block'],
-                                                    population=int(censusBlockDict['P001001']),
-                                                    isWater=isWater,
-                                                    geoJSONGeometry=censusBlockDict['geometry'])
-            redistrictingGroupWithCountyFIPS.children.append(blockFromData)
+                redistrictingGroupForCountyFIPS[censusBlockDict['county']] = redistrictingGroupWithCountyFIPS
+
+            redistrictingGroupWithCountyFIPS.children.append(censusBlockFromCensusBlockDict(censusBlockDict))
             pbar.update(1)
 
-    # remove FIPS info from the groups to not pollute data later
-    for redistrictingGroup in redistrictingGroupList:
-        del redistrictingGroup.FIPS
+    # groups are in the order their counties first appeared in the census data
+    redistrictingGroupList = list(redistrictingGroupForCountyFIPS.values())
 
     # convert census blocks to atomic blocks
     convertAllCensusBlocksToAtomicBlocks(redistrictingGroupList)
@@ -1,14 +1,20 @@
 from shapely.geometry import shape, mapping, Point, Polygon, MultiPolygon, LineString, MultiLineString
 from shapely.geometry.base import BaseGeometry
 from shapely.ops import shared_paths, nearest_points, cascaded_union
+from shapely.prepared import prep
+from shapely.strtree import STRtree
 from geopy.distance import distance as distanceOnEarth
 from enum import Enum
-from math import atan2, degrees, pi, pow, inf
+from math import atan2, degrees, pi, pow, inf, nan
 from sys import float_info
 from json import dumps
 from itertools import groupby
+from heapq import heappush, heappop, heapify
+from collections import deque
+import numpy as np
 from tqdm import tqdm
 from exportData.displayShapes import plotGraphObjectGroups
+from formatData.graphEngine import GraphEngine
 
 
 # On Windows, I needed to install Shapely manually
@@ -43,6 +49,62 @@ def intersectingPolygons(a, b):
         return False
 
 
+def intersectingPolygonPairs(aPolygons, bPolygons, shouldFindSharedEdgeLengths=True):
+    # intersectingPolygons for each (aPolygons[i], bPolygons[i]) pair. Returns whether each pair is intersecting, and
+    # the length of boundary each pair shares (None if not asked for)
+    numberOfPairs = len(aPolygons)
+    isIntersecting = np.zeros(numberOfPairs, dtype=bool)
+    sharedEdgeLengths = np.zeros(numberOfPairs, dtype=np.float64) if shouldFindSharedEdgeLengths else None
+    if numberOfPairs == 0:
+        return isIntersecting, sharedEdgeLengths
+    aBounds = np.array([polygon.bounds if not polygon.is_empty else (inf, inf, -inf, -inf) for polygon in aPolygons],
+                       dtype=np.float64)
+    bBounds = np.array([polygon.bounds if not polygon.is_empty else (inf, inf, -inf, -inf) for polygon in bPolygons],
+                       dtype=np.float64)
+    isNearby = (aBounds[:, 0] <= bBounds[:, 2]) & (aBounds[:, 2] >= bBounds[:, 0]) & \
+               (aBounds[:, 1] <= bBounds[:, 3]) & (aBounds[:, 3] >= bBounds[:, 1])
+    for pairIndex in np.flatnonzero(isNearby).tolist():
+        a = aPolygons[pairIndex]
+        b = bPolygons[pairIndex]
+        relation = a.relate(b)
+        if relation[0] == 'F' and relation[1] == 'F' and relation[3] == 'F' and relation[4] == 'F':
+            continue
+        # boundaries meeting along a line is a shared edge
+        if relation[4] == '1':
+            isIntersecting[pairIndex] = True
+            if shouldFindSharedEdgeLengths:
+                sharedEdgeLengths[pairIndex] = a.boundary.intersection(b.boundary).length
+        else:
+            isIntersecting[pairIndex] = doesEitherPolygonContainTheOther(a, b)
+    return isIntersecting, sharedEdgeLengths
+
+
+def findIntersectingPolygonPairs(aPolygons, bPolygons, shouldFindSharedEdgeLengths=False):
+    # every (i, j) where intersectingPolygons(aPolygons[i], bPolygons[j]), in order, with the shared edge lengths if
+    # asked for. Only pairs whose bounds overlap get looked at
+    bIndicesForPolygon = {}
+    for bIndex, bPolygon in enumerate(bPolygons):
+        bIndicesForPolygon.setdefault(id(bPolygon), []).append(bIndex)
+    bPolygonTree = STRtree([bPolygons[bIndices[0]] for bIndices in bIndicesForPolygon.values()
+                            if not bPolygons[bIndices[0]].is_empty])
+    candidatePairs = []
+    for aIndex, aPolygon in enumerate(aPolygons):
+        if aPolygon.is_empty:
+            continue
+        bIndices = sorted(bIndex for candidate in bPolygonTree.query(aPolygon)
+                          for bIndex in bIndicesForPolygon[id(candidate)])
+        candidatePairs.extend((aIndex, bIndex) for bIndex in bIndices)
+    isIntersecting, sharedEdgeLengths = intersectingPolygonPairs(
+        aPolygons=[aPolygons[aIndex] for aIndex, bIndex in candidatePairs],
+        bPolygons=[bPolygons[bIndex] for aIndex, bIndex in candidatePairs],
+        shouldFindSharedEdgeLengths=shouldFindSharedEdgeLengths)
+    intersectingPairs = [candidatePair for candidatePair, isPairIntersecting in
+                         zip(candidatePairs, isIntersecting.tolist()) if isPairIntersecting]
+    if shouldFindSharedEdgeLengths:
+        return intersectingPairs, sharedEdgeLengths[isIntersecting]
+    return intersectingPairs
+
+
 def allIntersectingPolygons(a, b):
     aPolygons = []
     bPolygons = []
@@ -84,12 +146,13 @@ def getPolygonThatIntersectsGeometry(polygonList, targetGeometry):
 
 
 def getPolygonThatContainsGeometry(polygonList, targetGeometry, useTargetRepresentativePoint=False,
-                                   ignoreInteriors=True):
+                                   ignoreInteriors=True, containerGeometryCache=None):
     for polygon in polygonList:
         if doesPolygonContainTheOther(container=polygon,
                                       target=targetGeometry.geometry,
                                       ignoreInteriors=ignoreInteriors,
-                                      useTargetRepresentativePoint=useTargetRepresentativePoint):
+                                      useTargetRepresentativePoint=useTargetRepresentativePoint,
+                                      containerGeometryCache=containerGeometryCache):
             return polygon
     return None
 
@@ -101,33 +164,100 @@ def doesGeographyContainTheOther(container, target, useTargetRepresentativePoint
     return containsTargetBoundary
 
 
-def doesPolygonContainTheOther(container, target, ignoreInteriors=True, useTargetRepresentativePoint=False):
+def doesPolygonContainTheOther(container, target, ignoreInteriors=True, useTargetRepresentativePoint=False,
+                               containerGeometryCache=None):
+    if containerGeometryCache is None:
+        containerParts = preparedContainerParts(container, ignoreInteriors=ignoreInteriors)
+    else:
+        containerParts = containerGeometryCache.partsForContainer(container, ignoreInteriors=ignoreInteriors)
+    return doContainerPartsContainTarget(containerParts=containerParts,
+                                         target=target,
+                                         useTargetRepresentativePoint=useTargetRepresentativePoint)
+
+
+def preparedContainerParts(container, ignoreInteriors=True):
+    # a (prepared polygon, is exterior only) for each polygon of the container. Polygons with holes are tested by
+    # their exterior when interiors are ignored
     if type(container) is MultiPolygon:
         containerPolygons = list(container)
     else:
         containerPolygons = [container]
+    containerParts = []
+    for containerPolygon in containerPolygons:
+        if containerPolygon.interiors and ignoreInteriors:
+            containerParts.append((prep(Polygon(containerPolygon.exterior)), True))
+        else:
+            containerParts.append((prep(containerPolygon), False))
+    return containerParts
+
+
+def doContainerPartsContainTarget(containerParts, target, useTargetRepresentativePoint=False):
     if type(target) is MultiPolygon:
         targetPolygons = list(target)
     else:
         targetPolygons = [target]
-    containsTarget = False
-    for containerPolygon in containerPolygons:
+    for preparedContainerPolygon, isExteriorOnly in containerParts:
         for targetPolygon in targetPolygons:
-            if containerPolygon.interiors and ignoreInteriors:
-                containerPolygonExterior = Polygon(containerPolygon.exterior)
-                targetPolygonExterior = Polygon(targetPolygon.exterior)
-
-                if useTargetRepresentativePoint:
-                    containsTarget = containsTarget or containerPolygonExterior.contains(
-                        targetPolygon.representative_point())
-                else:
-                    containsTarget = containsTarget or containerPolygonExterior.contains(targetPolygonExterior)
+            if useTargetRepresentativePoint:
+                targetToTest = targetPolygon.representative_point()
+            elif isExteriorOnly:
+                targetToTest = Polygon(targetPolygon.exterior)
             else:
-                if useTargetRepresentativePoint:
-                    containsTarget = containsTarget or containerPolygon.contains(targetPolygon.representative_point())
-                else:
-                    containsTarget = containsTarget or containerPolygon.contains(targetPolygon)
-    return containsTarget
+                targetToTest = targetPolygon
+            if preparedContainerPolygon.contains(targetToTest):
+                return True
+    return False
+
+
+class ContainerGeometryCache:
+    # prepared container parts keyed by container identity, for containers that get tested against many targets.
+    # The containers are kept here too, so their ids can't be reused while they're cached
+    def __init__(self):
+        self.containerPartsForKey = {}
+
+    def partsForContainer(self, container, ignoreInteriors=True):
+        key = (id(container), ignoreInteriors)
+        cachedEntry = self.containerPartsForKey.get(key)
+        if cachedEntry is None:
+            cachedEntry = (container, preparedContainerParts(container, ignoreInteriors=ignoreInteriors))
+            self.containerPartsForKey[key] = cachedEntry
+        return cachedEntry[1]
+
+
+def classifyGeometriesIntoContainers(containers, targetGeometries, ignoreInteriors=True,
+                                     useTargetRepresentativePoint=False, containerGeometryCache=None):
+    # the index of the first container that contains each target (doesPolygonContainTheOther), or -1 if none do.
+    # Containers whose bounds can't hold a target aren't tested against it
+    if containerGeometryCache is None:
+        containerGeometryCache = ContainerGeometryCache()
+    containerParts = [containerGeometryCache.partsForContainer(container, ignoreInteriors=ignoreInteriors)
+                      for container in containers]
+    containerBounds = np.array([boundsOfGeometry(container) for container in containers],
+                               dtype=np.float64).reshape(-1, 4)
+    # a target counts as contained when any of its parts (or their representative points) is, so its bounds only
+    # have to overlap the container's
+    targetBounds = np.array([boundsOfGeometry(targetGeometry) for targetGeometry in targetGeometries],
+                            dtype=np.float64).reshape(-1, 4)
+    couldContain = (containerBounds[None, :, 0] <= targetBounds[:, None, 2]) & \
+                   (containerBounds[None, :, 2] >= targetBounds[:, None, 0]) & \
+                   (containerBounds[None, :, 1] <= targetBounds[:, None, 3]) & \
+                   (containerBounds[None, :, 3] >= targetBounds[:, None, 1])
+
+    containerIndices = np.full(len(targetGeometries), -1, dtype=np.int64)
+    for targetIndex, targetGeometry in enumerate(targetGeometries):
+        for containerIndex in np.flatnonzero(couldContain[targetIndex]).tolist():
+            if doContainerPartsContainTarget(containerParts=containerParts[containerIndex],
+                                             target=targetGeometry,
+                                             useTargetRepresentativePoint=useTargetRepresentativePoint):
+                containerIndices[targetIndex] = containerIndex
+                break
+    return containerIndices
+
+
+def boundsOfGeometry(geometry):
+    if geometry is None or geometry.is_empty:
+        return nan, nan, nan, nan
+    return geometry.bounds
 
 
 def isBoundaryGeometry(parent, child):
@@ -159,6 +289,27 @@ def polygonFromMultiplePolygons(polygonList, useEnvelope=False, simplificationTo
     return union
 
 
+class EnvelopeIndex:
+    # STR-tree over the bounding boxes of a list of geometries, answering with list indices
+    def __init__(self, geometries):
+        self.bounds = [geometry.bounds for geometry in geometries]
+        self.envelopes = [Polygon.from_bounds(*bounds) for bounds in self.bounds]
+        self.indexForEnvelope = {id(envelope): index for index, envelope in enumerate(self.envelopes)}
+        self.tree = STRtree(self.envelopes) if self.envelopes else None
+
+    def indicesIntersectingBounds(self, bounds):
+        if self.tree is None:
+            return []
+        queryEnvelope = Polygon.from_bounds(*bounds)
+        return sorted(self.indexForEnvelope[id(envelope)] for envelope in self.tree.query(queryEnvelope))
+
+    def indicesWithinBounds(self, bounds):
+        minX, minY, maxX, maxY = bounds
+        return [index for index in self.indicesIntersectingBounds(bounds)
+                if self.bounds[index][0] >= minX and self.bounds[index][1] >= minY and
+                self.bounds[index][2] <= maxX and self.bounds[index][3] <= maxY]
+
+
 class CardinalDirection(Enum):
     north = 1
     west = 3
@@ -166,6 +317,9 @@ class CardinalDirection(Enum):
     south = 4
 
 
+cardinalDirectionForValue = {direction.value: direction for direction in CardinalDirection}
+
+
 class Alignment(Enum):
     northSouth = 1
     westEast = 2
@@ -184,6 +338,119 @@ def findCommonEdges(a, b):
     return edgesInCommon
 
 
+def polygonRingCoordinates(geometry):
+    if type(geometry) is MultiPolygon:
+        polygons = list(geometry)
+    elif type(geometry) is Polygon:
+        polygons = [geometry]
+    else:
+        polygons = []
+    return [np.asarray(ring.coords)[:, :2] for polygon in polygons
+            for ring in [polygon.exterior] + list(polygon.interiors)]
+
+
+def findSharedBoundaryLengths(geometries, quantization=1e-7):
+    # breaks every boundary into segments and hashes the segments' endpoints, snapped to a grid of size quantization.
+    # neighboring geometries are the ones with a segment in common, so there's no need to compare every pair.
+    # returns {(i, j): length of shared boundary} for the indices i < j of geometries that share an edge
+    segmentList = []
+    ownerList = []
+    for geometryIndex, geometry in enumerate(geometries):
+        for ring in polygonRingCoordinates(geometry):
+            points = np.round(ring / quantization).astype(np.int64)
+            segments = np.hstack([points[:-1], points[1:]])
+            segments = segments[(segments[:, 0] != segments[:, 2]) | (segments[:, 1] != segments[:, 3])]
+            segmentList.append(segments)
+            ownerList.append(np.full(len(segments), geometryIndex, dtype=np.int64))
+    if not segmentList:
+        return {}
+    segments = np.concatenate(segmentList)
+    owners = np.concatenate(ownerList)
+
+    # the same edge runs in opposite directions around two neighbors, so always store it from its lowest point
+    isReversed = (segments[:, 0] > segments[:, 2]) | ((segments[:, 0] == segments[:, 2]) &
+                                                      (segments[:, 1] > segments[:, 3]))
+    segments[isReversed] = segments[isReversed][:, [2, 3, 0, 1]]
+
+    order = np.lexsort((owners, segments[:, 3], segments[:, 2], segments[:, 1], segments[:, 0]))
+    segments = segments[order]
+    owners = owners[order]
+    isSameSegmentAsPrevious = np.zeros(len(segments), dtype=bool)
+    isSameSegmentAsPrevious[1:] = np.all(segments[1:] == segments[:-1], axis=1)
+    isDuplicate = np.zeros(len(segments), dtype=bool)
+    isDuplicate[1:] = isSameSegmentAsPrevious[1:] & (owners[1:] == owners[:-1])
+    segments = segments[~isDuplicate]
+    owners = owners[~isDuplicate]
+    isSameSegmentAsPrevious = isSameSegmentAsPrevious[~isDuplicate]
+
+    segmentLengths = np.hypot(segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1]) * quantization
+    runStarts = np.flatnonzero(~isSameSegmentAsPrevious)
+    runLengths = np.diff(np.append(runStarts, len(segments)))
+
+    sharedBoundaryLengths = {}
+
+    def addSharedLength(firstIndex, secondIndex, length):
+        key = (firstIndex, secondIndex) if firstIndex < secondIndex else (secondIndex, firstIndex)
+        sharedBoundaryLengths[key] = sharedBoundaryLengths.get(key, 0.0) + length
+
+    # almost every shared segment belongs to exactly two geometries
+    pairStarts = runStarts[runLengths == 2]
+    pairOwners = np.sort(np.stack([owners[pairStarts], owners[pairStarts + 1]], axis=1), axis=1)
+    if len(pairStarts):
+        pairCodes = pairOwners[:, 0] * len(geometries) + pairOwners[:, 1]
+        uniquePairCodes, pairInverse = np.unique(pairCodes, return_inverse=True)
+        pairLengths = np.bincount(pairInverse, weights=segmentLengths[pairStarts])
+        for pairCode, length in zip(uniquePairCodes.tolist(), pairLengths.tolist()):
+            addSharedLength(pairCode // len(geometries), pairCode % len(geometries), length)
+    for runStart, runLength in zip(runStarts[runLengths > 2].tolist(), runLengths[runLengths > 2].tolist()):
+        runOwners = owners[runStart:runStart + runLength].tolist()
+        for firstPosition, firstIndex in enumerate(runOwners):
+            for secondIndex in runOwners[firstPosition + 1:]:
+                addSharedLength(firstIndex, secondIndex, segmentLengths[runStart])
+
+    # a neighbor's vertex can be missing where two other geometries meet along its edge (e.g. after a union), so
+    # segments nobody else has are checked for overlapping along the same line
+    unmatchedRuns = runStarts[runLengths == 1]
+    for firstIndex, secondIndex, length in collinearSegmentOverlaps(segments[unmatchedRuns], owners[unmatchedRuns]):
+        addSharedLength(firstIndex, secondIndex, length * quantization)
+    return sharedBoundaryLengths
+
+
+def collinearSegmentOverlaps(segments, owners):
+    # segments are in grid units, anything within a grid unit of the other segment's line counts as on it
+    if len(segments) < 2:
+        return []
+    segmentLines = [LineString([(segment[0], segment[1]), (segment[2], segment[3])]) for segment in segments.tolist()]
+    indexForLine = {id(line): index for index, line in enumerate(segmentLines)}
+    tree = STRtree(segmentLines)
+    segments = segments.astype(np.float64)
+    overlaps = []
+    for index, line in enumerate(segmentLines):
+        candidateIndices = [indexForLine[id(candidate)] for candidate in tree.query(line)]
+        candidateIndices = [candidateIndex for candidateIndex in candidateIndices
+                            if candidateIndex > index and owners[candidateIndex] != owners[index]]
+        if not candidateIndices:
+            continue
+        start = segments[index, :2]
+        direction = segments[index, 2:] - start
+        length = np.hypot(*direction)
+        unitDirection = direction / length
+        candidates = segments[candidateIndices]
+        candidateStarts = candidates[:, :2] - start
+        candidateEnds = candidates[:, 2:] - start
+        startDistances = np.abs(candidateStarts[:, 0] * unitDirection[1] - candidateStarts[:, 1] * unitDirection[0])
+        endDistances = np.abs(candidateEnds[:, 0] * unitDirection[1] - candidateEnds[:, 1] * unitDirection[0])
+        startPositions = candidateStarts @ unitDirection
+        endPositions = candidateEnds @ unitDirection
+        overlapLengths = np.minimum(np.maximum(startPositions, endPositions), length) - \
+                         np.maximum(np.minimum(startPositions, endPositions), 0)
+        isOverlapping = (startDistances <= 1) & (endDistances <= 1) & (overlapLengths > 1)
+        for candidateIndex, overlapLength in zip(np.array(candidateIndices)[isOverlapping].tolist(),
+                                                 overlapLengths[isOverlapping].tolist()):
+            overlaps.append((int(owners[index]), int(owners[candidateIndex]), overlapLength))
+    return overlaps
+
+
 def findDirection(basePoint, targetPoint, topAngleFromCenter=45.0):
     if basePoint == targetPoint:
         return CardinalDirection.north
@@ -215,6 +482,38 @@ def findDirection(basePoint, targetPoint, topAngleFromCenter=45.0):
         return CardinalDirection.north
 
 
+def findDirections(basePoints, targetPoints, topAnglesFromCenter=45.0):
+    # findDirection for many (x, y) points at once, returning CardinalDirection values. A single base point or top
+    # angle is used for every target point
+    basePoints = np.asarray(basePoints, dtype=np.float64).reshape(-1, 2)
+    targetPoints = np.asarray(targetPoints, dtype=np.float64).reshape(-1, 2)
+    xDiffs = targetPoints[:, 0] - basePoints[:, 0]
+    yDiffs = targetPoints[:, 1] - basePoints[:, 1]
+
+    # rotate 90 degrees for easier angle matching
+    radianDiffs = np.arctan2(yDiffs, xDiffs) - (pi / 2)
+    radianDiffs = np.where(radianDiffs < 0, radianDiffs + (2 * pi), radianDiffs)
+    degDiffs = np.degrees(radianDiffs)
+
+    topAnglesFromCenter = np.asarray(topAnglesFromCenter, dtype=np.float64)
+    northWestAngles = topAnglesFromCenter
+    southWestAngles = 180 - topAnglesFromCenter
+    southEastAngles = 180 + topAnglesFromCenter
+    northEastAngles = 360 - topAnglesFromCenter
+
+    directions = np.full(len(degDiffs), CardinalDirection.north.value, dtype=np.uint8)
+    # later assignments win, so go in the reverse of findDirection's order
+    directions[(southEastAngles <= degDiffs) & (degDiffs < northEastAngles)] = CardinalDirection.east.value
+    directions[(southWestAngles <= degDiffs) & (degDiffs < southEastAngles)] = CardinalDirection.south.value
+    directions[(northWestAngles <= degDiffs) & (degDiffs < southWestAngles)] = CardinalDirection.west.value
+    directions[(xDiffs == 0) & (yDiffs == 0)] = CardinalDirection.north.value
+    return directions
+
+
+def cardinalDirectionsFromValues(directionValues):
+    return [cardinalDirectionForValue[directionValue] for directionValue in directionValues.tolist()]
+
+
 def findDirectionOfShape(baseShape, targetShape):
     basePoint = baseShape.centroid
     targetPoint = targetShape.centroid
@@ -232,18 +531,35 @@ def findDirectionOfShapeFromPoint(basePoint, targetShape):
     return direction
 
 
+def findDirectionsOfShapesFromPoint(basePoint, targetShapes):
+    targetPoints = [(targetPoint.x, targetPoint.y) for targetPoint in
+                    [targetShape.centroid for targetShape in targetShapes]]
+    return cardinalDirectionsFromValues(findDirections(basePoints=(basePoint.x, basePoint.y),
+                                                       targetPoints=targetPoints))
+
+
 def findDirectionOfBorderGeometries(parentGeometry, targetGeometries):
-    directionOfShapes = []
+    # same as findDirectionOfShape from the parent to each common edge, with the parent's centroid and dimensions
+    # worked out once
+    parentShape = parentGeometry.geometry
+    parentCentroid = parentShape.centroid
+    dimensionsOfParentShape = dimensionsOfPolygon(parentShape)
+    topAngleFromCenterOfParentShape = topAngleFromCenterOfRectangle(width=dimensionsOfParentShape[0],
+                                                                    height=dimensionsOfParentShape[1])
+    commonEdgeCentroids = []
     for targetGeometry in targetGeometries:
-        edgesInCommon = findCommonEdges(parentGeometry.geometry, targetGeometry.geometry)
+        edgesInCommon = findCommonEdges(parentShape, targetGeometry.geometry)
 
         if not edgesInCommon:  # means we intersect only at a point
-            edgesInCommon = parentGeometry.geometry.boundary.intersection(targetGeometry.geometry.boundary)
+            edgesInCommon = parentShape.boundary.intersection(targetGeometry.geometry.boundary)
 
         commonEdgeShape = polygonFromMultiplePolygons(edgesInCommon)
-        direction = findDirectionOfShape(baseShape=parentGeometry.geometry, targetShape=commonEdgeShape)
-        directionOfShapes.append((targetGeometry, direction))
-    return directionOfShapes
+        commonEdgeCentroid = commonEdgeShape.centroid
+        commonEdgeCentroids.append((commonEdgeCentroid.x, commonEdgeCentroid.y))
+    directions = findDirections(basePoints=(parentCentroid.x, parentCentroid.y),
+                                targetPoints=commonEdgeCentroids,
+                                topAnglesFromCenter=topAngleFromCenterOfParentShape)
+    return list(zip(targetGeometries, cardinalDirectionsFromValues(directions)))
 
 
 def topAngleFromCenterOfRectangle(width, height):
@@ -340,55 +656,323 @@ def findClosestGeometry(originGeometry, otherGeometries):
     return closestGeometry
 
 
+class ContiguityIndex:
+    # how many contiguous pieces a set of graph objects falls into when some of them are taken out. One depth first
+    # search finds the articulation points, so taking out a single object is answered without a search.
+    # Neighbors are taken to go both ways. The set is either the graph objects given, or the nodes of a graph engine
+    # in a mask. Build a new index when the set changes
+    def __init__(self, graphObjects=None, graphEngine=None, nodeMask=None):
+        if graphEngine is None:
+            graphEngine = GraphEngine(graphObjects)
+        if nodeMask is None:
+            nodeMask = np.ones(len(graphEngine), dtype=bool)
+        self.nodeIndexForGraphId = graphEngine.nodeIndexForGraphId
+        _, self.positionForNode, self.neighborIndices = graphEngine.undirectedNeighborLists(nodeMask)
+        self.numberOfPieces, self.numberOfPiecesWithoutNode = self.findArticulationPoints()
+
+    def findArticulationPoints(self):
+        # iterative depth first search. Taking out a node leaves the other pieces, plus one for each child in the
+        # search tree that can't reach above the node, minus one for the root's own piece
+        numberOfNodes = len(self.neighborIndices)
+        discoveryOrder = [-1] * numberOfNodes
+        lowestReachable = [0] * numberOfNodes
+        separatedChildCount = [0] * numberOfNodes
+        isRoot = [False] * numberOfNodes
+        numberOfPieces = 0
+        order = 0
+        for rootIndex in range(numberOfNodes):
+            if discoveryOrder[rootIndex] >= 0:
+                continue
+            numberOfPieces += 1
+            isRoot[rootIndex] = True
+            discoveryOrder[rootIndex] = lowestReachable[rootIndex] = order
+            order += 1
+            stack = [(rootIndex, -1, iter(self.neighborIndices[rootIndex]))]
+            while stack:
+                nodeIndex, parentIndex, neighborIterator = stack[-1]
+                childIndex = next(neighborIterator, None)
+                if childIndex is None:
+                    stack.pop()
+                    if parentIndex >= 0:
+                        lowestReachable[parentIndex] = min(lowestReachable[parentIndex], lowestReachable[nodeIndex])
+                        if isRoot[parentIndex] or lowestReachable[nodeIndex] >= discoveryOrder[parentIndex]:
+                            separatedChildCount[parentIndex] += 1
+                elif discoveryOrder[childIndex] < 0:
+                    discoveryOrder[childIndex] = lowestReachable[childIndex] = order
+                    order += 1
+                    stack.append((childIndex, nodeIndex, iter(self.neighborIndices[childIndex])))
+                elif childIndex != parentIndex:
+                    lowestReachable[nodeIndex] = min(lowestReachable[nodeIndex], discoveryOrder[childIndex])
+        numberOfPiecesWithoutNode = [numberOfPieces + separatedChildCount[nodeIndex] - (1 if isRoot[nodeIndex] else 0)
+                                     for nodeIndex in range(numberOfNodes)]
+        return numberOfPieces, numberOfPiecesWithoutNode
+
+    def numberOfPiecesWithout(self, graphObjects):
+        removedIndices = {self.positionForNode[self.nodeIndexForGraphId[graphObject.graphId]].item()
+                          for graphObject in graphObjects if graphObject.graphId in self.nodeIndexForGraphId}
+        removedIndices.discard(-1)
+        if not removedIndices:
+            return self.numberOfPieces
+        if len(removedIndices) == 1:
+            return self.numberOfPiecesWithoutNode[removedIndices.pop()]
+
+        # more than one object, count the pieces with a search that skips them
+        isVisited = [False] * len(self.neighborIndices)
+        for removedIndex in removedIndices:
+            isVisited[removedIndex] = True
+        numberOfPieces = 0
+        for startIndex in range(len(self.neighborIndices)):
+            if isVisited[startIndex]:
+                continue
+            numberOfPieces += 1
+            isVisited[startIndex] = True
+            stack = [startIndex]
+            while stack:
+                for neighborIndex in self.neighborIndices[stack.pop()]:
+                    if not isVisited[neighborIndex]:
+                        isVisited[neighborIndex] = True
+                        stack.append(neighborIndex)
+        return numberOfPieces
+
+
 def findContiguousGroupsOfGraphObjects(graphObjects):
-    if graphObjects:
-        remainingObjects = graphObjects.copy()
-        contiguousObjectGroups = []
-        while len(remainingObjects) > 0:
-            contiguousObjectGroups.append(
-                forestFireFillGraphObject(candidateObjects=remainingObjects))
-        return contiguousObjectGroups
-    else:
-        return []
+    # each group starts from the first object not already in an earlier group, like filling from the front of the
+    # remaining objects would
+    unfilledGraphIds = {graphObject.graphId for graphObject in graphObjects}
+    contiguousObjectGroups = []
+    for graphObject in graphObjects:
+        if graphObject.graphId in unfilledGraphIds:
+            contiguousObjectGroups.append(breadthFirstFillGraphObject(startingObject=graphObject,
+                                                                      candidateGraphIds=unfilledGraphIds))
+    return contiguousObjectGroups
 
 
 def forestFireFillGraphObject(candidateObjects, startingObject=None, notInList=None):
-    fireFilledObjects = []
-    fireQueue = []
     if not startingObject:
         startingObject = candidateObjects[0]
-    fireQueue.append(startingObject)
-
-    while len(fireQueue) > 0:
-        graphObject = fireQueue.pop(0)
-        candidateObjects.remove(graphObject)
-        fireFilledObjects.append(graphObject)
+    candidateGraphIds = {candidateObject.graphId for candidateObject in candidateObjects}
+    if startingObject.graphId not in candidateGraphIds:
+        raise ValueError('Starting object {0} is not one of the candidate objects'.format(startingObject.graphId))
+    excludedGraphIds = set() if notInList is None else {excludedObject.graphId for excludedObject in notInList}
+
+    fireFilledObjects = breadthFirstFillGraphObject(startingObject=startingObject,
+                                                    candidateGraphIds=candidateGraphIds,
+                                                    excludedGraphIds=excludedGraphIds)
+
+    # the filled objects come out of the candidates, which callers rely on
+    candidateObjects[:] = [candidateObject for candidateObject in candidateObjects
+                           if candidateObject.graphId in candidateGraphIds]
+    return fireFilledObjects
 
-        for neighborObject in graphObject.allNeighbors:
-            if neighborObject in candidateObjects and neighborObject not in fireQueue:
-                if notInList is None or neighborObject not in notInList:
-                    fireQueue.append(neighborObject)
 
+def breadthFirstFillGraphObject(startingObject, candidateGraphIds, excludedGraphIds=frozenset()):
+    # fills outward from the starting object in breadth first order, taking each filled object out of
+    # candidateGraphIds as it is queued so nothing is queued twice
+    candidateGraphIds.discard(startingObject.graphId)
+    fireFilledObjects = [startingObject]
+    fireQueue = deque(fireFilledObjects)
+    while fireQueue:
+        for neighborObject in fireQueue.popleft().iterateNeighbors():
+            neighborId = neighborObject.graphId
+            if neighborId in candidateGraphIds and neighborId not in excludedGraphIds:
+                candidateGraphIds.discard(neighborId)
+                fireFilledObjects.append(neighborObject)
+                fireQueue.append(neighborObject)
     return fireFilledObjects
 
 
+class FireFillFrontier:
+    # the weighted forest fire fill's queue of candidate groups. A group is keyed by its objects' graph ids, and the
+    # best group is the highest scoring one, with ties going to the lowest key. Groups are only scored once until
+    # rescoreAll is called, which the fill does when what the scores depend on changes. Scoring is handed a list of
+    # groups and returns a score for each. Every heap entry carries the version it was pushed with, so entries left
+    # behind by a removal or a rescore are skipped without comparing scores
+    def __init__(self):
+        self.groupForKey = {}
+        self.versionForKey = {}
+        self.nextVersion = 0
+        self.keysForGraphId = {}
+        self.unscoredKeys = []
+        self.heap = []
+
+    def __len__(self):
+        return len(self.groupForKey)
+
+    def __contains__(self, group):
+        return fireFillKey(group) in self.groupForKey
+
+    def groups(self):
+        return list(self.groupForKey.values())
+
+    def containsGraphObject(self, graphObject):
+        return graphObject.graphId in self.keysForGraphId
+
+    def groupsContainingGraphObjects(self, graphObjects):
+        keys = {key for graphObject in graphObjects for key in self.keysForGraphId.get(graphObject.graphId, ())}
+        return [self.groupForKey[key] for key in keys]
+
+    def add(self, group):
+        key = fireFillKey(group)
+        if key in self.groupForKey:
+            return
+        self.groupForKey[key] = group
+        self.unscoredKeys.append(key)
+        for graphId in key:
+            self.keysForGraphId.setdefault(graphId, set()).add(key)
+
+    def remove(self, group):
+        key = fireFillKey(group)
+        if self.groupForKey.pop(key, None) is None:
+            return
+        # heap entries for the group are skipped when they come up
+        self.versionForKey.pop(key, None)
+        for graphId in key:
+            keysWithGraphId = self.keysForGraphId[graphId]
+            keysWithGraphId.discard(key)
+            if not keysWithGraphId:
+                del self.keysForGraphId[graphId]
+
+    def scoreNew(self, scoresOfGroups):
+        keys = [key for key in dict.fromkeys(self.unscoredKeys)
+                if key in self.groupForKey and key not in self.versionForKey]
+        scores = scoresOfGroups([self.groupForKey[key] for key in keys]) if keys else []
+        for key, score in zip(keys, scores):
+            heappush(self.heap, self.heapEntry(key, score))
+        self.unscoredKeys = []
+
+    def rescoreAll(self, scoresOfGroups):
+        # every group is scored in one call, so the scores can be worked out together
+        keys = list(self.groupForKey)
+        scores = scoresOfGroups(list(self.groupForKey.values())) if keys else []
+        self.versionForKey = {}
+        self.heap = [self.heapEntry(key, score) for key, score in zip(keys, scores)]
+        heapify(self.heap)
+        self.unscoredKeys = []
+
+    def heapEntry(self, key, score):
+        # a NaN score can't be ordered against anything, so the group would never come out in the right place
+        if score != score:
+            raise ValueError('Fire fill group {0} has a score of NaN'.format(key))
+        version = self.nextVersion
+        self.nextVersion += 1
+        self.versionForKey[key] = version
+        return -score, key, version
+
+    def pop(self):
+        # groups that haven't been scored yet (only the starting group) come out first, in the order they were added
+        while self.unscoredKeys:
+            key = self.unscoredKeys.pop(0)
+            if key in self.groupForKey and key not in self.versionForKey:
+                group = self.groupForKey[key]
+                self.remove(group)
+                return group
+        while self.heap:
+            _, key, version = heappop(self.heap)
+            if self.versionForKey.get(key) == version:
+                group = self.groupForKey[key]
+                self.remove(group)
+                return group
+        raise IndexError('pop from an empty fire fill frontier')
+
+
+def fireFillKey(group):
+    return tuple(graphObject.graphId for graphObject in group)
+
+
+class CandidateShapeCache:
+    # bounds and centroids of the shapes the fill's candidate groups are scored on, polygonFromMultipleGeometries of
+    # each group, so a whole frontier can be scored with array arithmetic. Each group's shape is worked out once,
+    # since nothing changes shape during a fill. With envelopes the bounds come from the graph engine's node bounds
+    # and don't need the shape at all
+    def __init__(self, graphEngine, useEnvelope=True):
+        self.graphEngine = graphEngine
+        self.useEnvelope = useEnvelope
+        self.boundsForKey = {}
+        self.centroidForKey = {}
+
+    def cacheShapeOfGroup(self, key, group):
+        groupShape = polygonFromMultipleGeometries(group, useEnvelope=self.useEnvelope)
+        self.boundsForKey[key] = groupShape.bounds
+        self.centroidForKey[key] = groupShape.centroid.coords[0]
+
+    def boundsOfGroups(self, groups):
+        if self.useEnvelope:
+            if not groups:
+                return np.empty((0, 4))
+            # a union of envelopes reaches exactly as far as its objects' bounds
+            objectBounds = self.graphEngine.bounds[self.graphEngine.nodeIndicesForGraphObjects(
+                [graphObject for group in groups for graphObject in group])]
+            groupStarts = np.cumsum([0] + [len(group) for group in groups[:-1]])
+            return np.hstack((np.minimum.reduceat(objectBounds[:, :2], groupStarts),
+                              np.maximum.reduceat(objectBounds[:, 2:], groupStarts)))
+
+        groupBounds = np.empty((len(groups), 4))
+        for groupIndex, group in enumerate(groups):
+            key = fireFillKey(group)
+            if key not in self.boundsForKey:
+                self.cacheShapeOfGroup(key, group)
+            groupBounds[groupIndex] = self.boundsForKey[key]
+        return groupBounds
+
+    def centroidsOfGroups(self, groups):
+        groupCentroids = np.empty((len(groups), 2))
+        for groupIndex, group in enumerate(groups):
+            key = fireFillKey(group)
+            if key not in self.centroidForKey:
+                self.cacheShapeOfGroup(key, group)
+            groupCentroids[groupIndex] = self.centroidForKey[key]
+        return groupCentroids
+
+
+# the label the fill gives what it has filled in its graph engine
+fireFilledLabel = 1
+
+
 def weightedForestFireFillGraphObject(candidateObjects,
                                       startingObjects=None,
                                       condition=lambda x, y: (True, 0),
                                       weightingScore=lambda w, x, y, z: 1,
                                       shouldDrawEachStep=False,
                                       returnBestCandidateGroup=True,
-                                      fastCalculations=True):
+                                      fastCalculations=True,
+                                      batchWeightingScore=None,
+                                      weightingScoreDependsOnFill=True,
+                                      graphEngine=None):
     bestGraphObjectCandidateGroupThisPass = None
     offCount = 0
-    candidateGroupsThatDidNotMeetConditionThisPass = []
+    candidateGroupsThatDidNotMeetConditionThisPass = set()
     fireFilledObjects = []
-    fireQueue = []
-    remainingObjects = candidateObjects.copy()
+    # kept up to date as groups are filled, so it's never rebuilt from every filled group
+    fireFilledObjectsShape = polygonFromMultipleGeometries(fireFilledObjects)
+    fireQueue = FireFillFrontier()
+    # the fill runs on a graph engine holding the candidates: what's remaining is a mask over its nodes, neighbors
+    # come from its edges and what's filled is labeled, so the engine keeps the filled population up to date.
+    # Remaining objects stay in order, a candidate that's put back goes to the end
+    if graphEngine is None:
+        graphEngine = GraphEngine(candidateObjects)
+    graphEngine.clearLabels()
+    isRemaining = graphEngine.maskForGraphObjects(candidateObjects)
+    remainingObjectForGraphId = {candidateObject.graphId: candidateObject for candidateObject in candidateObjects}
     if not startingObjects:
         # this doesn't occur during the forest fire fill when creating districts
-        startingObjects = [remainingObjects[0]]
-    fireQueue.append(startingObjects)
+        startingObjects = [candidateObjects[0]]
+    fireQueue.add(startingObjects)
+    # whether taking a candidate out of the remaining objects would cut some of them off
+    contiguityIndex = ContiguityIndex(graphEngine=graphEngine, nodeMask=isRemaining)
+
+    def scoresOfQueueGroups(queueObjectGroups):
+        remainingObjects = list(remainingObjectForGraphId.values())
+        # a batch weighting score scores the whole list at once, in place of calling weightingScore for each group
+        if batchWeightingScore is not None:
+            return batchWeightingScore(fireFilledObjectsShape, remainingObjects, queueObjectGroups, fastCalculations)
+        return [weightingScore(fireFilledObjectsShape, remainingObjects, queueObjectGroup, fastCalculations)
+                for queueObjectGroup in queueObjectGroups]
+
+    def putBackCandidateGroup(candidateGroup, candidateNodeIndices):
+        # add candidate back to the end of the remaining objects
+        isRemaining[candidateNodeIndices] = True
+        for graphObject in candidateGroup:
+            remainingObjectForGraphId[graphObject.graphId] = graphObject
 
     count = 1
     with tqdm() as pbar:
@@ -396,73 +980,67 @@ def weightedForestFireFillGraphObject(candidateObjects,
             pbar.update(1)
             pbar.set_description(
                 'FireFilled: {0} - FireQueue: {1} - Remaining: {2} - Off count: {3}'.format(
-                    len(fireFilledObjects), len(fireQueue), len(remainingObjects), offCount))
+                    len(fireFilledObjects), len(fireQueue), len(remainingObjectForGraphId), offCount))
 
             # pull from the top of the queue
-            graphObjectCandidateGroup = fireQueue.pop(0)
+            graphObjectCandidateGroup = fireQueue.pop()
+            didFillThisPass = False
 
             # remove objects that we pulled from the queue from the remaining list
-            remainingObjects = [object for object in remainingObjects if object not in graphObjectCandidateGroup]
+            candidateNodeIndices = graphEngine.nodeIndicesForGraphObjects(graphObjectCandidateGroup)
+            isRemaining[candidateNodeIndices] = False
+            for graphObject in graphObjectCandidateGroup:
+                remainingObjectForGraphId.pop(graphObject.graphId, None)
 
             if shouldDrawEachStep:
-                plotGraphObjectGroups([fireFilledObjects, graphObjectCandidateGroup, remainingObjects],
+                plotGraphObjectGroups([fireFilledObjects, graphObjectCandidateGroup,
+                                       list(remainingObjectForGraphId.values())],
                                       showDistrictNeighborConnections=True,
                                       saveImages=True,
                                       saveDescription='WeightedForestFireFillGraphObject-{0}-{1}'.format(
                                           id(candidateObjects), count))
                 count += 1
 
-            potentiallyIsolatedGroups = findContiguousGroupsOfGraphObjects(remainingObjects)
-            if len(potentiallyIsolatedGroups) <= 1:  # candidate won't block any other groups
+            if contiguityIndex.numberOfPiecesWithout(graphObjectCandidateGroup) <= 1:
+                # candidate won't block any other groups
                 conditionResult = condition(fireFilledObjects, graphObjectCandidateGroup)
                 if conditionResult[0]:
                     offCount = conditionResult[1]
                     fireFilledObjects.extend(graphObjectCandidateGroup)
+                    graphEngine.setLabels(candidateNodeIndices, fireFilledLabel)
+                    fireFilledObjectsShape = polygonFromMultiplePolygons(
+                        [fireFilledObjectsShape] + [graphObject.geometry for graphObject in graphObjectCandidateGroup])
+                    didFillThisPass = True
                     bestGraphObjectCandidateGroupThisPass = None  # set this back to none when we add something
-                    candidateGroupsThatDidNotMeetConditionThisPass = []  # clear this when we add something
+                    candidateGroupsThatDidNotMeetConditionThisPass = set()  # clear this when we add something
 
                     # find any of objects just added and remove them from the queue
-                    remainingItemsFromGroups = []
-                    groupsToRemove = []
-                    for queueItemGroup in fireQueue:
-                        if any([queueItem for queueItem in queueItemGroup if queueItem in graphObjectCandidateGroup]):
-                            remainingItems = [queueItem for queueItem in queueItemGroup if
-                                              queueItem not in graphObjectCandidateGroup]
-                            remainingItemsFromGroups.extend(remainingItems)
-                            groupsToRemove.append(queueItemGroup)
-                    # remove duplicates from the lists
-                    remainingItemsFromGroups = set(remainingItemsFromGroups)
-                    # crazy way to remove duplicates from a list of lists
-                    groupsToRemove = [list(item) for item in set(tuple(row) for row in groupsToRemove)]
-                    for groupToRemove in groupsToRemove:
-                        fireQueue.remove(groupToRemove)
-                    neighborsOfFireFilledObjects = [group.allNeighbors for group in fireFilledObjects]
-                    for remainingItemFromGroups in remainingItemsFromGroups:
-                        if remainingItemFromGroups in neighborsOfFireFilledObjects:
-                            fireQueue.append([remainingItemFromGroups])
+                    for queueItemGroup in fireQueue.groupsContainingGraphObjects(graphObjectCandidateGroup):
+                        fireQueue.remove(queueItemGroup)
 
                     # add neighbors to the queue
-                    for graphObjectCandidate in graphObjectCandidateGroup:
-                        for neighborObject in graphObjectCandidate.allNeighbors:
-                            flatFireQueue = [graphObject for graphObjectGroup in fireQueue
-                                             for graphObject in graphObjectGroup]
-                            if neighborObject in remainingObjects and neighborObject not in flatFireQueue:
-                                fireQueue.append([neighborObject])
+                    for neighborObject in graphEngine.graphObjectsForNodes(
+                            graphEngine.neighborsOfNodes(candidateNodeIndices, nodeMask=isRemaining)):
+                        if not fireQueue.containsGraphObject(neighborObject):
+                            fireQueue.add([neighborObject])
 
                     # if we don't need to return the next best candidate, we can remove groups from the queue
                     # that don't meet the condition right now to speed up processing
                     if not returnBestCandidateGroup:
-                        fireQueue = [fireQueueGroup for fireQueueGroup in fireQueue if
-                                     condition(fireFilledObjects, fireQueueGroup)[0]]
+                        for fireQueueGroup in fireQueue.groups():
+                            if not condition(fireFilledObjects, fireQueueGroup)[0]:
+                                fireQueue.remove(fireQueueGroup)
                 else:
                     if returnBestCandidateGroup and bestGraphObjectCandidateGroupThisPass is None:
                         if all([len(graphObjectCandidate.children) > 1
                                 for graphObjectCandidate in graphObjectCandidateGroup]):
                             bestGraphObjectCandidateGroupThisPass = graphObjectCandidateGroup
 
-                    remainingObjects.extend(graphObjectCandidateGroup)  # add candidate back to the queue
-                    candidateGroupsThatDidNotMeetConditionThisPass.append(graphObjectCandidateGroup)
+                    putBackCandidateGroup(graphObjectCandidateGroup, candidateNodeIndices)
+                    candidateGroupsThatDidNotMeetConditionThisPass.add(fireFillKey(graphObjectCandidateGroup))
             else:
+                potentiallyIsolatedGroups = findContiguousGroupsOfGraphObjects(
+                    list(remainingObjectForGraphId.values()))
                 # find the contiguous group with largest population and remove.
                 # This everything else and will be handled by subsequent fire fill passes
                 potentiallyIsolatedGroups.sort(key=lambda x: sum(group.population for group in x), reverse=True)
@@ -473,7 +1051,7 @@ def weightedForestFireFillGraphObject(candidateObjects,
                 if conditionResult[0]:
                     if shouldDrawEachStep:
                         plotGraphObjectGroups(
-                            [fireFilledObjects, graphObjectCandidateGroup, remainingObjects,
+                            [fireFilledObjects, graphObjectCandidateGroup, list(remainingObjectForGraphId.values()),
                              potentiallyIsolatedObjects],
                             showDistrictNeighborConnections=True,
                             saveImages=True,
@@ -483,32 +1061,25 @@ def weightedForestFireFillGraphObject(candidateObjects,
 
                     groupAndIsolatedObjects = potentiallyIsolatedObjects + graphObjectCandidateGroup
 
-                    if groupAndIsolatedObjects not in candidateGroupsThatDidNotMeetConditionThisPass:
-                        fireQueue.append(groupAndIsolatedObjects)
+                    if fireFillKey(groupAndIsolatedObjects) not in candidateGroupsThatDidNotMeetConditionThisPass:
+                        fireQueue.add(groupAndIsolatedObjects)
                 else:
-                    candidateGroupsThatDidNotMeetConditionThisPass.append(graphObjectCandidateGroup)
-
-                remainingObjects.extend(graphObjectCandidateGroup)  # add candidate back to the queue
+                    candidateGroupsThatDidNotMeetConditionThisPass.add(fireFillKey(graphObjectCandidateGroup))
 
-            # remove duplicates from the list
-            fireQueue.sort()
-            fireQueue = list(fireQueueItem for fireQueueItem, _ in groupby(fireQueue))
+                putBackCandidateGroup(graphObjectCandidateGroup, candidateNodeIndices)
 
-            # apply weights for sorting
-            weightedQueue = []
-            fireFilledObjectsShape = polygonFromMultipleGeometries(fireFilledObjects)
-            for queueObjectGroup in fireQueue:
-                weightScore = weightingScore(fireFilledObjectsShape, remainingObjects, queueObjectGroup,
-                                             fastCalculations)
-                weightedQueue.append((queueObjectGroup, weightScore))
-
-            # sort queue
-            weightedQueue.sort(key=lambda x: x[1], reverse=True)
-            fireQueue = [x[0] for x in weightedQueue]
+            # the filled shape and what's remaining only change when something is filled. Scores that don't depend
+            # on them are the same as before, so only the groups the fill added to the queue need scores
+            if didFillThisPass:
+                contiguityIndex = ContiguityIndex(graphEngine=graphEngine, nodeMask=isRemaining)
+            if didFillThisPass and weightingScoreDependsOnFill:
+                fireQueue.rescoreAll(scoresOfQueueGroups)
+            else:
+                fireQueue.scoreNew(scoresOfQueueGroups)
 
     if shouldDrawEachStep:
         plotGraphObjectGroups(
-            [fireFilledObjects, [], remainingObjects],
+            [fireFilledObjects, [], list(remainingObjectForGraphId.values())],
             showDistrictNeighborConnections=True,
             saveImages=True,
             saveDescription='WeightedForestFireFillGraphObject-{0}-{1}'.format(id(candidateObjects), count))
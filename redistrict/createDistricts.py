@@ -1,7 +1,10 @@
+import numpy as np
+from tqdm import tqdm
 from us import states
 from exportData.displayShapes import plotDistricts, plotPolygons
 from exportData.exportData import loadDataFromFileWithDescription, saveDataToFileWithDescription, \
-    saveGeoJSONToDirectoryWithDescription
+    saveGeoJSONToDirectoryWithDescription, loadArraysFromDirectoryWithDescription
+from formatData.atomicBlockGraph import AtomicBlockGraph
 from geographyHelper import populationDeviationFromPercent
 from redistrict.district import createDistrictFromRedistrictingGroups, WeightingMethod, BreakingMethod
 
@@ -31,7 +34,8 @@ districts = initialDistrict.splitDistrict(numberOfDistricts=numberOfDistricts,
                                           shouldDrawEachStep=False,
                                           shouldRefillEachPass=True,
                                           fastCalculations=False,
-                                          showDetailedProgress=False)
+                                          showDetailedProgress=False,
+                                          shouldReleaseDiscardedGraphObjects=True)
 saveDataToFileWithDescription(data=districts,
                               censusYear=censusYear,
                               stateName=stateInfo,
@@ -40,6 +44,22 @@ saveGeoJSONToDirectoryWithDescription(geographyList=districts,
                                       censusYear=censusYear,
                                       stateName=stateInfo,
                                       descriptionOfInfo='FederalDistrictsGeoJSON')
+
+# each district's border with the others, measured along the shared edges of its blocks. The block graph is
+# memory-mapped read-only, so it isn't copied into memory
+atomicBlockGraph = AtomicBlockGraph(loadArraysFromDirectoryWithDescription(censusYear=censusYear,
+                                                                           stateName=stateInfo.name,
+                                                                           descriptionOfInfo='{0}AtomicBlockGraph'
+                                                                           .format(descriptionToWorkWith)))
+districtLabels = np.full(len(atomicBlockGraph), -1, dtype=np.int64)
+for districtIndex, district in enumerate(districts):
+    districtBlockGraphIds = [atomicBlock.graphId for group in district.children for atomicBlock in group.children]
+    districtLabels[atomicBlockGraph.nodeIndicesForGraphIds(districtBlockGraphIds)] = districtIndex
+districtBorderLengths = atomicBlockGraph.cutEdgeLengths(districtLabels)
+tqdm.write('Total district border length: {0}'.format(districtBorderLengths.sum() / 2))
+for districtIndex, districtBorderLength in enumerate(districtBorderLengths.tolist()):
+    tqdm.write('District {0} border length: {1}'.format(districtIndex + 1, districtBorderLength))
+
 plotDistricts(districts=districts,
               showPopulationCounts=False,
               showDistrictNeighborConnections=False)
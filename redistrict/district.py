@@ -1,17 +1,20 @@
 import math
 import gc
+import numpy as np
 from tqdm import tqdm
 from enum import Enum
 from exportData.displayShapes import plotGraphObjectGroups, plotDistrict
 from exportData.exportData import saveDataToFileWithDescription, loadDataFromFileWithDescription
 from formatData.atomicBlock import assignNeighborBlocksFromCandidateBlocks
 from formatData.blockBorderGraph import BlockBorderGraph
+from formatData.graphContext import GraphContext
+from formatData.graphEngine import GraphEngine
 from formatData.redistrictingGroup import validateContiguousRedistrictingGroups, RedistrictingGroup, \
     assignNeighboringRedistrictingGroupsToRedistrictingGroups, validateRedistrictingGroups, SplitType
 from geographyHelper import alignmentOfPolygon, Alignment, mostCardinalOfGeometries, CardinalDirection, \
     weightedForestFireFillGraphObject, polsbyPopperScoreOfPolygon, polygonFromMultipleGeometries, \
-    intersectingGeometries, polygonFromMultiplePolygons, findContiguousGroupsOfGraphObjects, boundsIndexFromDirection, \
-    isPolygonAGoodDistrictShape, getOppositeDirection, getCWDirection
+    findIntersectingPolygonPairs, polygonFromMultiplePolygons, findContiguousGroupsOfGraphObjects, boundsIndexFromDirection, \
+    isPolygonAGoodDistrictShape, getOppositeDirection, getCWDirection, CandidateShapeCache, fireFilledLabel
 
 
 class District(BlockBorderGraph):
@@ -22,8 +25,22 @@ class District(BlockBorderGraph):
 
     def updateBlockContainerData(self):
         super(District, self).updateBlockContainerData()
+        self.cachedGraphEngine = None
         validateContiguousRedistrictingGroups(self.children)
 
+    def __getstate__(self):
+        # the graph engine is built again when it's needed
+        state = self.__dict__.copy()
+        state.pop('cachedGraphEngine', None)
+        return state
+
+    @property
+    def graphEngine(self):
+        # the children as a graph engine, built when it's first needed after the children change
+        if getattr(self, 'cachedGraphEngine', None) is None:
+            self.cachedGraphEngine = GraphEngine(self.children)
+        return self.cachedGraphEngine
+
     def getCutStartingCandidates(self):
         longestDirection = alignmentOfPolygon(self.geometry)
 
@@ -60,7 +77,8 @@ class District(BlockBorderGraph):
                       shouldDrawEachStep=False,
                       fastCalculations=True,
                       showDetailedProgress=False,
-                      shouldSaveProgress=True):
+                      shouldSaveProgress=True,
+                      shouldReleaseDiscardedGraphObjects=False):
         if totalSplitCount is None:
             tqdm.write('*** Splitting into {0} districts ***'.format(numberOfDistricts))
             totalSplitCount = 0
@@ -195,32 +213,43 @@ class District(BlockBorderGraph):
                    .format(bestFillDirection, bestSplitScore, bestPolsbyPopperScore, bestBreakingMethod))
         totalSplitCount += 1
 
-        aDistrictSplits = aDistrict.splitDistrict(numberOfDistricts=aRatio,
-                                                  populationDeviation=populationDeviation,
-                                                  weightingMethod=weightingMethod,
-                                                  breakingMethod=originalBreakingMethod,
-                                                  totalSplitCount=totalSplitCount,
-                                                  shouldMergeIntoFormerRedistrictingGroups=shouldMergeIntoFormerRedistrictingGroups,
-                                                  shouldRefillEachPass=shouldRefillEachPass,
-                                                  shouldDrawFillAttempts=shouldDrawFillAttempts,
-                                                  shouldDrawEachStep=shouldDrawEachStep,
-                                                  fastCalculations=fastCalculations,
-                                                  showDetailedProgress=showDetailedProgress,
-                                                  shouldSaveProgress=shouldSaveProgress)
+        # the split candidates that weren't picked are still in the graph registry, along with the copy of this
+        # district the best split was loaded over
+        graphContext = GraphContext.activeContext
+        if shouldReleaseDiscardedGraphObjects:
+            graphContext.releaseUnreachable(rootGraphObjects=[aDistrict, bDistrict])
+            gc.collect()
+
+        with graphContext.pinned([bDistrict]):
+            aDistrictSplits = aDistrict.splitDistrict(numberOfDistricts=aRatio,
+                                                      populationDeviation=populationDeviation,
+                                                      weightingMethod=weightingMethod,
+                                                      breakingMethod=originalBreakingMethod,
+                                                      totalSplitCount=totalSplitCount,
+                                                      shouldMergeIntoFormerRedistrictingGroups=shouldMergeIntoFormerRedistrictingGroups,
+                                                      shouldRefillEachPass=shouldRefillEachPass,
+                                                      shouldDrawFillAttempts=shouldDrawFillAttempts,
+                                                      shouldDrawEachStep=shouldDrawEachStep,
+                                                      fastCalculations=fastCalculations,
+                                                      showDetailedProgress=showDetailedProgress,
+                                                      shouldSaveProgress=shouldSaveProgress,
+                                                      shouldReleaseDiscardedGraphObjects=shouldReleaseDiscardedGraphObjects)
         districts.extend(aDistrictSplits)
 
-        bDistrictSplits = bDistrict.splitDistrict(numberOfDistricts=bRatio,
-                                                  populationDeviation=populationDeviation,
-                                                  weightingMethod=weightingMethod,
-                                                  breakingMethod=originalBreakingMethod,
-                                                  totalSplitCount=totalSplitCount,
-                                                  shouldMergeIntoFormerRedistrictingGroups=shouldMergeIntoFormerRedistrictingGroups,
-                                                  shouldRefillEachPass=shouldRefillEachPass,
-                                                  shouldDrawFillAttempts=shouldDrawFillAttempts,
-                                                  shouldDrawEachStep=shouldDrawEachStep,
-                                                  fastCalculations=fastCalculations,
-                                                  showDetailedProgress=showDetailedProgress,
-                                                  shouldSaveProgress=shouldSaveProgress)
+        with graphContext.pinned(aDistrictSplits):
+            bDistrictSplits = bDistrict.splitDistrict(numberOfDistricts=bRatio,
+                                                      populationDeviation=populationDeviation,
+                                                      weightingMethod=weightingMethod,
+                                                      breakingMethod=originalBreakingMethod,
+                                                      totalSplitCount=totalSplitCount,
+                                                      shouldMergeIntoFormerRedistrictingGroups=shouldMergeIntoFormerRedistrictingGroups,
+                                                      shouldRefillEachPass=shouldRefillEachPass,
+                                                      shouldDrawFillAttempts=shouldDrawFillAttempts,
+                                                      shouldDrawEachStep=shouldDrawEachStep,
+                                                      fastCalculations=fastCalculations,
+                                                      showDetailedProgress=showDetailedProgress,
+                                                      shouldSaveProgress=shouldSaveProgress,
+                                                      shouldReleaseDiscardedGraphObjects=shouldReleaseDiscardedGraphObjects)
         districts.extend(bDistrictSplits)
 
         return districts
@@ -282,8 +311,8 @@ class District(BlockBorderGraph):
                     saveImages=True,
                     saveDescription='DistrictSplittingIteration-{0}-{1}'.format(id(self), count))
 
-            candidateDistrictAPop = sum(group.population for group in candidateDistrictA)
-            candidateDistrictBPop = sum(group.population for group in candidateDistrictB)
+            candidateDistrictAPop = self.graphEngine.populationOfGraphObjects(candidateDistrictA)
+            candidateDistrictBPop = self.graphEngine.populationOfGraphObjects(candidateDistrictB)
 
             if idealDistrictASize - populationDeviation <= candidateDistrictAPop <= idealDistrictASize + populationDeviation and \
                     idealDistrictBSize - populationDeviation <= candidateDistrictBPop <= idealDistrictBSize + populationDeviation:
@@ -451,14 +480,18 @@ class District(BlockBorderGraph):
         i = 0
         startingObjects = []
         candidateDistrictA = []
+        # shared by every starting candidate, since they all fill the same groups
+        graphEngine = self.graphEngine
+        candidateShapeCache = CandidateShapeCache(graphEngine=graphEngine, useEnvelope=fastCalculations)
         nextBestGroupFromCandidateDistrictA = None
         while not candidateDistrictA and i < len(startingGroupCandidates):
             startingObjects = startingGroupCandidates[i][0]
             fillOriginDirection = startingGroupCandidates[i][1]
 
             def withinIdealDistrictSize(currentGroups, candidateGroups):
-                currentPop = sum(group.population for group in currentGroups)
-                candidatePop = sum(group.population for group in candidateGroups)
+                # the fill labels the groups it has filled, so the engine already has their population
+                currentPop = graphEngine.populationOfLabel(fireFilledLabel)
+                candidatePop = graphEngine.populationOfGraphObjects(candidateGroups)
                 proposedPop = currentPop + candidatePop
                 isWithinIdealPop = proposedPop <= idealDistrictASize
                 proposedPopDiff = idealDistrictASize - proposedPop
@@ -479,37 +512,45 @@ class District(BlockBorderGraph):
 
                 return minimumPolsbyPopperScore
 
-            def distanceScoreOfCombinedGeometry(currentGroupPolygon, remainingGroups, candidateGroups,
+            def distanceScoresOfCandidateGroups(currentGroupPolygon, remainingGroups, candidateGroupsList,
                                                 fastCalculations=True):
-                candidateGroupsPolygon = polygonFromMultipleGeometries(candidateGroups,
-                                                                       useEnvelope=fastCalculations)
-                distance = currentGroupPolygon.centroid.distance(candidateGroupsPolygon.centroid)
-                score = 1 / distance
-
-                return score
-
-            def cardinalDirectionScoreOfCandidateGroups(currentGroupPolygon, remainingGroups, candidateGroups,
-                                                        fastCalculations=True):
+                candidateGroupsCentroids = candidateShapeCache.centroidsOfGroups(candidateGroupsList)
+                if currentGroupPolygon.is_empty:
+                    distances = np.zeros(len(candidateGroupsList))
+                else:
+                    currentGroupCentroid = currentGroupPolygon.centroid
+                    xDifferences = candidateGroupsCentroids[:, 0] - currentGroupCentroid.x
+                    yDifferences = candidateGroupsCentroids[:, 1] - currentGroupCentroid.y
+                    distances = np.sqrt(xDifferences * xDifferences + yDifferences * yDifferences)
+                if not distances.all():
+                    raise ZeroDivisionError('A candidate group is centered on the current group')
+                scores = 1 / distances
+
+                return scores.tolist()
+
+            def cardinalDirectionScoresOfCandidateGroups(currentGroupPolygon, remainingGroups, candidateGroupsList,
+                                                         fastCalculations=True):
                 boundsIndex = boundsIndexFromDirection(fillOriginDirection)
                 directionReferenceValue = self.geometry.bounds[boundsIndex]
-                candidateGroupsPolygon = polygonFromMultipleGeometries(candidateGroups,
-                                                                       useEnvelope=fastCalculations)
-                candidateGroupsValue = candidateGroupsPolygon.bounds[boundsIndex]
-                difference = directionReferenceValue - candidateGroupsValue
-                difference = math.fabs(difference)
-                if difference == 0:
-                    score = math.inf
-                else:
-                    score = 1 / difference
-
-                return score
-
+                candidateGroupsValues = candidateShapeCache.boundsOfGroups(candidateGroupsList)[:, boundsIndex]
+                differences = np.abs(directionReferenceValue - candidateGroupsValues)
+                # groups right on the edge score infinitely well
+                with np.errstate(divide='ignore'):
+                    scores = 1 / differences
+
+                return scores.tolist()
+
+            chosenWeightingAlgorithm = None
+            chosenBatchWeightingAlgorithm = None
+            # scores from the distance to the district's edge don't change as the fill grows
+            chosenWeightingDependsOnFill = True
             if weightingMethod is WeightingMethod.distance:
-                chosenWeightingAlgorithm = distanceScoreOfCombinedGeometry
+                chosenBatchWeightingAlgorithm = distanceScoresOfCandidateGroups
             elif weightingMethod is WeightingMethod.polsbyPopper:
                 chosenWeightingAlgorithm = polsbyPopperScoreOfCombinedGeometry
             elif weightingMethod is WeightingMethod.cardinalDistance:
-                chosenWeightingAlgorithm = cardinalDirectionScoreOfCandidateGroups
+                chosenBatchWeightingAlgorithm = cardinalDirectionScoresOfCandidateGroups
+                chosenWeightingDependsOnFill = False
             else:
                 raise RuntimeError('Must choose a weighting method. {0} is not supported'.format(weightingMethod))
 
@@ -517,14 +558,17 @@ class District(BlockBorderGraph):
                                                                          startingObjects=startingObjects,
                                                                          condition=withinIdealDistrictSize,
                                                                          weightingScore=chosenWeightingAlgorithm,
+                                                                         batchWeightingScore=chosenBatchWeightingAlgorithm,
+                                                                         weightingScoreDependsOnFill=chosenWeightingDependsOnFill,
                                                                          shouldDrawEachStep=shouldDrawEachStep,
                                                                          returnBestCandidateGroup=returnBestCandidateGroup,
-                                                                         fastCalculations=fastCalculations)
+                                                                         fastCalculations=fastCalculations,
+                                                                         graphEngine=graphEngine)
             candidateDistrictA = candidateDistrictAResult[0]
             nextBestGroupFromCandidateDistrictA = candidateDistrictAResult[1]
             i += 1
 
-        candidateDistrictB = [group for group in self.children if group not in candidateDistrictA]
+        candidateDistrictB = graphEngine.graphObjectsForNodes(~graphEngine.maskForGraphObjects(candidateDistrictA))
         return (candidateDistrictA,
                 candidateDistrictB), nextBestGroupFromCandidateDistrictA, fillOriginDirection, startingObjects
 
@@ -536,14 +580,15 @@ def createDistrictFromRedistrictingGroups(redistrictingGroups):
 
 def getRedistrictingGroupsBetweenCandidates(aCandidate, bCandidate):
     groupsBetween = []
+    groupIdsBetween = set()
 
-    for aGroup in aCandidate:
-        for bGroup in bCandidate:
-            if intersectingGeometries(aGroup, bGroup):
-                if aGroup not in groupsBetween:
-                    groupsBetween.append(aGroup)
-                if bGroup not in groupsBetween:
-                    groupsBetween.append(bGroup)
+    intersectingPairs = findIntersectingPolygonPairs(aPolygons=[aGroup.geometry for aGroup in aCandidate],
+                                                     bPolygons=[bGroup.geometry for bGroup in bCandidate])
+    for aIndex, bIndex in intersectingPairs:
+        for group in (aCandidate[aIndex], bCandidate[bIndex]):
+            if id(group) not in groupIdsBetween:
+                groupIdsBetween.add(id(group))
+                groupsBetween.append(group)
 
     return groupsBetween
 
@@ -614,8 +659,9 @@ def splitGroupsOnEdge(candidateDistrictA,
     if shouldMergeIntoFormerRedistrictingGroups and shouldRefillEachPass:
         groupsToBreakUp = groupsBetweenCandidates
     else:
+        candidateDistrictAIds = {group.graphId for group in candidateDistrictA}
         groupsToBreakUp = [groupToBreakUp for groupToBreakUp in groupsBetweenCandidates
-                           if groupToBreakUp not in candidateDistrictA]
+                           if groupToBreakUp.graphId not in candidateDistrictAIds]
     groupsToBreakUp = [(groupToBreakUp, Alignment.all) for groupToBreakUp in groupsToBreakUp]
     return groupsToBreakUp
 
@@ -624,21 +670,21 @@ def splitLowestEnergySeam(candidateDistrictA, candidateDistrictB,
                           showDetailedProgress, energyRelativeToPopulation):
     groupsBetweenCandidates = getRedistrictingGroupsBetweenCandidates(candidateDistrictA,
                                                                       candidateDistrictB)
+    candidateDistrictAIds = {group.graphId for group in candidateDistrictA}
     groupBreakUpCandidates = [groupToBreakUp for groupToBreakUp in groupsBetweenCandidates
-                              if groupToBreakUp not in candidateDistrictA]
+                              if groupToBreakUp.graphId not in candidateDistrictAIds]
     groupBreakUpCandidates = [groupBreakUpCandidate
                               for groupBreakUpCandidate in groupBreakUpCandidates
                               if len(groupBreakUpCandidate.children) > 1 and groupBreakUpCandidate.population > 0]
     seamsToEvaluate = []
     for groupBreakUpCandidate in groupBreakUpCandidates:
-        westernAndEasternNeighbors = groupBreakUpCandidate.westernNeighbors + groupBreakUpCandidate.easternNeighbors
-        if any([neighbor for neighbor in westernAndEasternNeighbors
-                if neighbor in candidateDistrictA]):
+        neighborDirectionsInCandidateDistrictA = {groupBreakUpCandidate.directionOfNeighbor(neighbor)
+                                                  for neighbor in groupBreakUpCandidate.allNeighbors
+                                                  if neighbor.graphId in candidateDistrictAIds}
+        if neighborDirectionsInCandidateDistrictA & {CardinalDirection.west, CardinalDirection.east}:
             seamsToEvaluate.append((groupBreakUpCandidate, Alignment.westEast))
 
-        northernAndSouthernNeighbors = groupBreakUpCandidate.northernNeighbors + groupBreakUpCandidate.southernNeighbors
-        if any([neighbor for neighbor in northernAndSouthernNeighbors
-                if neighbor in candidateDistrictA]):
+        if neighborDirectionsInCandidateDistrictA & {CardinalDirection.north, CardinalDirection.south}:
             seamsToEvaluate.append((groupBreakUpCandidate, Alignment.northSouth))
     tqdm.write(
         '      *** Finding lowest energy seam out of {0} seams ***'.format(len(seamsToEvaluate)))
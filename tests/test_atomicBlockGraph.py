@@ -0,0 +1,81 @@
+import os
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+import numpy as np
+from exportData.exportData import loadDataFromFile, saveArraysToDirectory, loadArraysFromDirectory
+from formatData.atomicBlockGraph import AtomicBlockGraph, createAtomicBlockGraphFromRedistrictingGroups
+from shapely.geometry import box
+from censusData.censusBlock import CensusBlock
+from formatData.atomicBlock import AtomicBlock
+from formatData.graphContext import GraphContext
+from formatData.redistrictingGroup import RedistrictingGroup, assignNeighboringRedistrictingGroupsToRedistrictingGroups
+from geographyHelper import CardinalDirection
+
+
+def redistrictingGroupForSquare(blockFIPS, minX, minY):
+    atomicBlock = AtomicBlock(childrenBlocks=[CensusBlock(countyFIPS='01',
+                                                          tractFIPS='01',
+                                                          blockFIPS=blockFIPS,
+                                                          population=10,
+                                                          isWater=False,
+                                                          geometry=box(minX, minY, minX + 1, minY + 1))])
+    return RedistrictingGroup(childrenBlocks=[atomicBlock])
+
+
+class TestAtomicBlockGraph(TestCase):
+
+    def test_createAtomicBlockGraphFromRedistrictingGroups_matchesNeighborLists(self):
+        testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                        'testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+        redistrictingGroups = loadDataFromFile(filePath=testDataFilePath)
+        atomicBlocks = redistrictingGroups[0].children
+        atomicBlockGraph = createAtomicBlockGraphFromRedistrictingGroups(redistrictingGroups)
+
+        self.assertEqual(len(atomicBlockGraph), len(atomicBlocks))
+        self.assertEqual(atomicBlockGraph.totalPopulation(), redistrictingGroups[0].population)
+        self.assertTrue(np.all(atomicBlockGraph.groupIds == redistrictingGroups[0].graphId))
+        for atomicBlock in atomicBlocks:
+            nodeIndex = atomicBlockGraph.nodeIndexForGraphId(atomicBlock.graphId)
+            neighborGraphIds = atomicBlockGraph.graphIds[atomicBlockGraph.neighborIndices(nodeIndex)].tolist()
+            northernGraphIds = [graphId for graphId, direction in
+                                zip(neighborGraphIds, atomicBlockGraph.neighborDirections(nodeIndex).tolist())
+                                if direction == CardinalDirection.north.value]
+            self.assertEqual(sorted(neighborGraphIds),
+                             sorted(neighbor.graphId for neighbor in atomicBlock.allNeighbors))
+            self.assertEqual(northernGraphIds, [neighbor.graphId for neighbor in atomicBlock.northernNeighbors])
+            self.assertEqual(atomicBlockGraph.populations[nodeIndex], atomicBlock.population)
+        self.assertIsNone(atomicBlockGraph.nodeIndexForGraphId(-1))
+        self.assertGreater(np.count_nonzero(atomicBlockGraph.sharedEdgeLengths), 0)
+
+        with TemporaryDirectory() as temporaryDirectory:
+            directoryPath = os.path.join(temporaryDirectory, 'graph.redistarrays')
+            saveArraysToDirectory(arrays=atomicBlockGraph.arrays, directoryPath=directoryPath)
+            loadedGraph = AtomicBlockGraph(loadArraysFromDirectory(directoryPath=directoryPath))
+            self.assertIsInstance(loadedGraph.neighbors, np.memmap)
+            self.assertFalse(loadedGraph.neighbors.flags.writeable)
+            for arrayName, array in atomicBlockGraph.arrays.items():
+                self.assertTrue(np.array_equal(loadedGraph.arrays[arrayName], array))
+            del loadedGraph
+
+    def test_createAtomicBlockGraphFromRedistrictingGroups_measuresEdgesBetweenGroups(self):
+        with GraphContext():
+            # a row of three unit squares, each its own group, so no block has block neighbors
+            redistrictingGroups = [redistrictingGroupForSquare('{0:02}'.format(column), column, 0)
+                                   for column in range(3)]
+            assignNeighboringRedistrictingGroupsToRedistrictingGroups(changedRedistrictingGroups=redistrictingGroups,
+                                                                      allNeighborCandidates=redistrictingGroups,
+                                                                      shouldAttachOrphans=False)
+            atomicBlockGraph = createAtomicBlockGraphFromRedistrictingGroups(redistrictingGroups)
+            atomicBlocks = [redistrictingGroup.children[0] for redistrictingGroup in redistrictingGroups]
+            middleIndex = atomicBlockGraph.nodeIndexForGraphId(atomicBlocks[1].graphId)
+            self.assertEqual(atomicBlockGraph.graphIds[atomicBlockGraph.neighborIndices(middleIndex)].tolist(),
+                             [atomicBlocks[0].graphId, atomicBlocks[2].graphId])
+            self.assertEqual(atomicBlockGraph.neighborDirections(middleIndex).tolist(),
+                             [CardinalDirection.west.value, CardinalDirection.east.value])
+            self.assertEqual(atomicBlockGraph.neighborSharedEdgeLengths(middleIndex).tolist(), [1.0, 1.0])
+
+            labels = np.zeros(len(atomicBlockGraph), dtype=np.int64)
+            labels[atomicBlockGraph.nodeIndicesForGraphIds([atomicBlocks[2].graphId])] = 1
+            self.assertEqual(atomicBlockGraph.cutEdgeLengths(labels).tolist(), [1.0, 1.0])
+            with self.assertRaises(ValueError):
+                atomicBlockGraph.nodeIndicesForGraphIds([-1])
@@ -0,0 +1,78 @@
+import pickle
+from unittest import TestCase
+from shapely.geometry import Polygon, MultiPolygon
+from censusData.blockTable import BlockTable
+from censusData.geoid import packGEOIDFromFIPS, formatGEOID, maxSplitPart
+from censusData.censusBlock import CensusBlock, populationFromBlocks, getAllBlocksWithCountyFIPS
+from formatData.atomicBlock import createAtomicBlocksFromBlockList
+
+
+class TestBlockTable(TestCase):
+
+    def setUp(self):
+        self.previousBlockTable = CensusBlock.blockTable
+        CensusBlock.blockTable = BlockTable(initialCapacity=2)
+
+    def tearDown(self):
+        CensusBlock.blockTable = self.previousBlockTable
+
+    def test_blockTable_blockViews(self):
+        blocks = [CensusBlock(countyFIPS='{0:03}'.format(1 + 2 * (i % 2)),
+                              tractFIPS='000100',
+                              blockFIPS='{0:04}'.format(i),
+                              population=i,
+                              isWater=i == 0,
+                              geoJSONGeometry={'type': 'Polygon',
+                                               'coordinates': [[[i, 0], [i, 2], [i + 1, 2], [i + 1, 0], [i, 0]]]})
+                  for i in range(5)]
+
+        self.assertEqual(len(CensusBlock.blockTable), 5)
+        self.assertEqual(blocks[0].FIPS, '0000')
+        self.assertTrue(blocks[0].isWater)
+        self.assertEqual(blocks[3].id, packGEOIDFromFIPS(None, '003', '000100', '0003'))
+        self.assertEqual(populationFromBlocks(blocks), 10)
+        self.assertEqual(getAllBlocksWithCountyFIPS('003'), [blocks[1], blocks[3]])
+        self.assertEqual(tuple(CensusBlock.blockTable.centroid[4]), (4.5, 1.0))
+
+        blocks[4].geometry = Polygon([(0, 0), (0, 3), (3, 3), (3, 0)])
+        blocks[4].population = 20
+        self.assertEqual(tuple(CensusBlock.blockTable.bounds[4]), (0, 0, 3, 3))
+        self.assertEqual(CensusBlock.blockTable.area[4], 9)
+        self.assertEqual(CensusBlock.blockTable.totalPopulation(), 26)
+
+    def test_blockTable_unpicklePreviousCensusBlockState(self):
+        block = CensusBlock.__new__(CensusBlock)
+        block.__setstate__({'FIPS': '10021',
+                            'countyFIPS': '029',
+                            'tractFIPS': '970100',
+                            'id': '029-970100-10021',
+                            'population': 12,
+                            'isWater': False,
+                            'neighboringBlocks': [],
+                            'geometry': Polygon([(0, 0), (0, 1), (1, 1), (1, 0)])})
+        self.assertEqual((block.FIPS, block.splitPart), ('1002', 1))
+        self.assertEqual(block.id, packGEOIDFromFIPS(None, '029', '970100', '1002', splitPart=1))
+        self.assertIs(CensusBlock.blockTable.blocks[block.rowIndex], block)
+
+        unpickledBlock = pickle.loads(pickle.dumps(block))
+        self.assertIsNot(unpickledBlock, block)
+        self.assertEqual((unpickledBlock.id, unpickledBlock.population, unpickledBlock.geometry.area),
+                         (block.id, 12, 1.0))
+
+    def test_blockTable_splitPartsKeepGEOIDsUnique(self):
+        block = CensusBlock(stateFIPS='26',
+                            countyFIPS='029',
+                            tractFIPS='970100',
+                            blockFIPS='1002',
+                            population=3,
+                            isWater=False,
+                            geometry=MultiPolygon([Polygon([(0, 0), (0, 1), (1, 1), (1, 0)]),
+                                                   Polygon([(5, 0), (5, 1), (6, 1), (6, 0)])]))
+        atomicBlocks = createAtomicBlocksFromBlockList([block])
+
+        splitBlocks = sorted((atomicBlock.children[0] for atomicBlock in atomicBlocks), key=lambda item: item.id)
+        self.assertEqual([(splitBlock.FIPS, splitBlock.splitPart, splitBlock.population) for splitBlock in splitBlocks],
+                         [('1002', 1, 1), ('1002', 2, 2)])
+        self.assertEqual([formatGEOID(splitBlock.id) for splitBlock in splitBlocks],
+                         ['260299701001002-1', '260299701001002-2'])
+        self.assertEqual(splitBlocks[0].id & ~maxSplitPart, block.id)
@@ -0,0 +1,74 @@
+import pickle
+import tempfile
+from os import path
+from unittest import TestCase
+from exportData.exportData import saveRecordsToChunkedFile, iterateRecordsFromChunkedFile
+from formatData.redistrictingGroup import createRedistrictingGroupsWithAtomicBlocksFromCensusData
+
+
+def squareBlockRecord(countyFIPS, blockIndex):
+    return {'P001001': str(blockIndex),
+            'state': '26',
+            'county': countyFIPS,
+            'tract': '000100',
+            'block': '{0:04}'.format(1000 + blockIndex),
+            'geometry': {'type': 'Polygon',
+                         'coordinates': [[[blockIndex, 0], [blockIndex, 1], [blockIndex + 1, 1],
+                                          [blockIndex + 1, 0], [blockIndex, 0]]]}}
+
+
+class TestChunkedRecordFile(TestCase):
+
+    def setUp(self):
+        self.temporaryDirectory = tempfile.TemporaryDirectory()
+        self.filePath = path.join(self.temporaryDirectory.name, 'blocks.redistrecords')
+
+    def tearDown(self):
+        self.temporaryDirectory.cleanup()
+
+    def test_chunkedRecordFile_roundTripInChunks(self):
+        recordsConsumed = []
+
+        def generateRecords():
+            for blockIndex in range(25):
+                recordsConsumed.append(blockIndex)
+                yield squareBlockRecord(countyFIPS='001', blockIndex=blockIndex)
+
+        numberOfRecords = saveRecordsToChunkedFile(records=generateRecords(), filePath=self.filePath, chunkSize=10)
+        self.assertEqual(numberOfRecords, 25)
+        self.assertFalse(path.exists('{0}.partial'.format(self.filePath)))
+
+        chunkSizes = []
+        with open(self.filePath, 'rb') as file:
+            while True:
+                try:
+                    chunkSizes.append(len(pickle.load(file)))
+                except EOFError:
+                    break
+        self.assertEqual(chunkSizes, [10, 10, 5])
+
+        records = iterateRecordsFromChunkedFile(self.filePath)
+        self.assertEqual(next(records)['block'], '1000')
+        self.assertEqual([record['block'] for record in records], ['{0:04}'.format(1001 + i) for i in range(24)])
+
+    def test_chunkedRecordFile_streamIntoRedistrictingGroups(self):
+        saveRecordsToChunkedFile(records=(squareBlockRecord(countyFIPS=countyFIPS, blockIndex=blockIndex)
+                                          for countyFIPS in ('001', '003') for blockIndex in range(4)),
+                                 filePath=self.filePath,
+                                 chunkSize=3)
+
+        redistrictingGroups = createRedistrictingGroupsWithAtomicBlocksFromCensusData(
+            iterateRecordsFromChunkedFile(self.filePath))
+        self.assertEqual(len(redistrictingGroups), 2)
+        self.assertEqual([redistrictingGroup.population for redistrictingGroup in redistrictingGroups], [6, 6])
+
+    def test_chunkedRecordFile_failedWriteLeavesNoPartialFile(self):
+        def generateRecordsThenFail():
+            for blockIndex in range(15):
+                yield squareBlockRecord(countyFIPS='001', blockIndex=blockIndex)
+            raise RuntimeError('County shard could not be read')
+
+        with self.assertRaises(RuntimeError):
+            saveRecordsToChunkedFile(records=generateRecordsThenFail(), filePath=self.filePath, chunkSize=10)
+        self.assertFalse(path.exists('{0}.partial'.format(self.filePath)))
+        self.assertFalse(path.exists(self.filePath))
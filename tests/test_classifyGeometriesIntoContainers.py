@@ -0,0 +1,58 @@
+from unittest import TestCase
+from shapely.geometry import box, Polygon, MultiPolygon
+from geographyHelper import classifyGeometriesIntoContainers, doesPolygonContainTheOther, ContainerGeometryCache
+
+
+class TestClassifyGeometriesIntoContainers(TestCase):
+
+    def setUp(self):
+        squareWithHole = Polygon(box(0, 0, 4, 4).exterior.coords, [box(1, 1, 3, 3).exterior.coords])
+        self.containers = [squareWithHole,
+                           MultiPolygon([box(10, 0, 12, 2), box(20, 0, 22, 2)]),
+                           box(0, 0, 30, 30)]
+        self.targets = [box(0, 0, 1, 1),  # in the ring of the first container
+                        box(1.5, 1.5, 2.5, 2.5),  # in the hole
+                        box(20.5, 0.5, 21, 1),  # in the second polygon of the second container
+                        box(11, 1, 13, 3),  # sticks out of the second container
+                        box(40, 40, 41, 41),  # outside everything
+                        MultiPolygon([box(50, 50, 51, 51), box(10.5, 0.5, 11, 1)])]
+
+    def test_classifyGeometriesIntoContainers_matchesDoesPolygonContainTheOther(self):
+        for ignoreInteriors in (True, False):
+            for useTargetRepresentativePoint in (True, False):
+                containerIndices = classifyGeometriesIntoContainers(
+                    containers=self.containers,
+                    targetGeometries=self.targets,
+                    ignoreInteriors=ignoreInteriors,
+                    useTargetRepresentativePoint=useTargetRepresentativePoint)
+
+                expectedContainerIndices = [next((containerIndex for containerIndex, container
+                                                  in enumerate(self.containers)
+                                                  if doesPolygonContainTheOther(
+                                                      container=container,
+                                                      target=target,
+                                                      ignoreInteriors=ignoreInteriors,
+                                                      useTargetRepresentativePoint=useTargetRepresentativePoint)), -1)
+                                            for target in self.targets]
+                self.assertEqual(containerIndices.tolist(), expectedContainerIndices)
+
+    def test_classifyGeometriesIntoContainers_holes(self):
+        containerIndices = classifyGeometriesIntoContainers(containers=self.containers,
+                                                            targetGeometries=self.targets,
+                                                            ignoreInteriors=False)
+        self.assertEqual(containerIndices.tolist(), [0, 2, 1, 2, -1, 1])
+
+        containerIndices = classifyGeometriesIntoContainers(containers=self.containers,
+                                                            targetGeometries=self.targets,
+                                                            ignoreInteriors=True)
+        self.assertEqual(containerIndices.tolist(), [0, 0, 1, 2, -1, 1])
+
+    def test_containerGeometryCache_reusesPreparedParts(self):
+        containerGeometryCache = ContainerGeometryCache()
+        containerParts = containerGeometryCache.partsForContainer(self.containers[0])
+        self.assertIs(containerGeometryCache.partsForContainer(self.containers[0]), containerParts)
+        self.assertIsNot(containerGeometryCache.partsForContainer(self.containers[0], ignoreInteriors=False),
+                         containerParts)
+        self.assertTrue(doesPolygonContainTheOther(container=self.containers[0],
+                                                   target=self.targets[1],
+                                                   containerGeometryCache=containerGeometryCache))
@@ -0,0 +1,29 @@
+import os
+from unittest import TestCase
+from exportData.exportData import loadDataFromFile
+from geographyHelper import ContiguityIndex, findContiguousGroupsOfGraphObjects
+
+
+class TestContiguityIndex(TestCase):
+
+    def test_contiguityIndex_matchesFindContiguousGroupsOfGraphObjects(self):
+        testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                        'testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+        atomicBlocks = loadDataFromFile(filePath=testDataFilePath)[0].children
+        contiguityIndex = ContiguityIndex(atomicBlocks)
+        self.assertEqual(contiguityIndex.numberOfPieces, len(findContiguousGroupsOfGraphObjects(atomicBlocks.copy())))
+
+        articulationPointCount = 0
+        for atomicBlock in atomicBlocks[::31]:
+            remainingBlocks = [remainingBlock for remainingBlock in atomicBlocks if remainingBlock is not atomicBlock]
+            expectedNumberOfPieces = len(findContiguousGroupsOfGraphObjects(remainingBlocks))
+            self.assertEqual(contiguityIndex.numberOfPiecesWithout([atomicBlock]), expectedNumberOfPieces)
+            if expectedNumberOfPieces > contiguityIndex.numberOfPieces:
+                articulationPointCount += 1
+        self.assertGreater(articulationPointCount, 0)
+
+        for firstIndex in range(0, len(atomicBlocks), 211):
+            removedBlocks = [atomicBlocks[firstIndex]] + atomicBlocks[firstIndex].allNeighbors
+            remainingBlocks = [remainingBlock for remainingBlock in atomicBlocks if remainingBlock not in removedBlocks]
+            self.assertEqual(contiguityIndex.numberOfPiecesWithout(removedBlocks),
+                             len(findContiguousGroupsOfGraphObjects(remainingBlocks)))
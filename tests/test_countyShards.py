@@ -0,0 +1,50 @@
+import tempfile
+from os import path
+from unittest import TestCase
+from censusData.countyShards import saveCountyShard, completedCountyFIPSCodes, removeCountyShards, \
+    loadCountyShardsInOrder, countyShardFilePath
+
+
+class TestCountyShards(TestCase):
+
+    def setUp(self):
+        self.temporaryDirectory = tempfile.TemporaryDirectory()
+        self.shardDirectoryPath = path.join(self.temporaryDirectory.name, 'shards')
+        self.counties = [{'NAME': 'Alcona County', 'county': '001'},
+                         {'NAME': 'Alger County', 'county': '003'},
+                         {'NAME': 'Allegan County', 'county': '005'}]
+
+    def tearDown(self):
+        self.temporaryDirectory.cleanup()
+
+    def test_countyShards_resumeAndMergeInCountyOrder(self):
+        saveCountyShard(data={'blockData': ['c']}, directoryPath=self.shardDirectoryPath, countyFIPS='005')
+        saveCountyShard(data={'blockData': ['a']}, directoryPath=self.shardDirectoryPath, countyFIPS='001')
+        # a shard that was being written when a run died shouldn't count as finished
+        with open('{0}.partial'.format(countyShardFilePath(self.shardDirectoryPath, '003')), 'wb') as file:
+            file.write(b'truncated')
+
+        self.assertEqual(completedCountyFIPSCodes(self.shardDirectoryPath), {'001', '005'})
+        with self.assertRaises(RuntimeError):
+            list(loadCountyShardsInOrder(directoryPath=self.shardDirectoryPath, countyList=self.counties))
+
+        saveCountyShard(data={'blockData': ['b']}, directoryPath=self.shardDirectoryPath, countyFIPS='003')
+        mergedBlockData = [blockData
+                           for county, countyShard in loadCountyShardsInOrder(directoryPath=self.shardDirectoryPath,
+                                                                              countyList=self.counties)
+                           for blockData in countyShard['blockData']]
+        self.assertEqual(mergedBlockData, ['a', 'b', 'c'])
+
+    def test_countyShards_refetchSingleCounty(self):
+        for county in self.counties:
+            saveCountyShard(data={'blockData': [county['county']]}, directoryPath=self.shardDirectoryPath,
+                            countyFIPS=county['county'])
+
+        removeCountyShards(directoryPath=self.shardDirectoryPath, countyFIPSCodes=['003'])
+        self.assertEqual(completedCountyFIPSCodes(self.shardDirectoryPath), {'001', '005'})
+
+        saveCountyShard(data={'blockData': ['refetched']}, directoryPath=self.shardDirectoryPath, countyFIPS='003')
+        shards = dict((county['county'], countyShard['blockData'])
+                      for county, countyShard in loadCountyShardsInOrder(directoryPath=self.shardDirectoryPath,
+                                                                         countyList=self.counties))
+        self.assertEqual(shards, {'001': ['001'], '003': ['refetched'], '005': ['005']})
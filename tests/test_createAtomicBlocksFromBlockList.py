@@ -0,0 +1,42 @@
+from unittest import TestCase
+from shapely.geometry import Polygon
+from censusData.censusBlock import CensusBlock
+from formatData.atomicBlock import AtomicBlock, createAtomicBlocksFromBlockList, atomicBlockWithBlock
+
+
+def squareCoordinates(minX, minY, size):
+    return [(minX, minY), (minX, minY + size), (minX + size, minY + size), (minX + size, minY)]
+
+
+def censusBlockWithGeometry(blockFIPS, geometry, population=1):
+    return CensusBlock(countyFIPS='029',
+                       tractFIPS='970100',
+                       blockFIPS=blockFIPS,
+                       population=population,
+                       isWater=False,
+                       geometry=geometry)
+
+
+class TestCreateAtomicBlocksFromBlockList(TestCase):
+
+    def test_createAtomicBlocksFromBlockList_nestedHolesJoinOutermostBlock(self):
+        # a ring of a block, with a ring of a block in its hole, with a small block in that hole
+        outerBlock = censusBlockWithGeometry('1000', Polygon(squareCoordinates(0, 0, 10),
+                                                             [squareCoordinates(2, 2, 6)]))
+        middleBlock = censusBlockWithGeometry('1001', Polygon(squareCoordinates(2, 2, 6),
+                                                              [squareCoordinates(4, 4, 2)]))
+        innerBlock = censusBlockWithGeometry('1002', Polygon(squareCoordinates(4, 4, 2)))
+        neighborBlock = censusBlockWithGeometry('1003', Polygon(squareCoordinates(10, 0, 10)), population=5)
+        holeInNeighbor = censusBlockWithGeometry('1004', Polygon(squareCoordinates(30, 0, 2)))
+
+        blockList = [innerBlock, outerBlock, neighborBlock, middleBlock, holeInNeighbor]
+        atomicBlocks = createAtomicBlocksFromBlockList(blockList)
+
+        self.assertEqual([[block.FIPS for block in atomicBlock.children] for atomicBlock in atomicBlocks],
+                         [['1004'], ['1003'], ['1000', '1001', '1002']])
+        self.assertEqual([atomicBlock.population for atomicBlock in atomicBlocks], [1, 5, 3])
+        self.assertEqual(atomicBlocks[2].geometry.area, 100)
+        for atomicBlock in atomicBlocks:
+            for block in atomicBlock.children:
+                self.assertIs(atomicBlockWithBlock(block), atomicBlock)
+                self.assertIs(AtomicBlock.atomicBlockForBlock[block], atomicBlock)
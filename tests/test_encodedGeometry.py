@@ -0,0 +1,65 @@
+import pickle
+from unittest import TestCase
+from shapely.geometry import shape
+from censusData.blockTable import BlockTable
+from censusData.censusBlock import CensusBlock
+from censusData.censusCounty import County
+from censusData.encodedGeometry import encodeGeoJSONGeometry, decodeGeometry
+
+
+class TestEncodedGeometry(TestCase):
+
+    def setUp(self):
+        self.previousBlockTable = CensusBlock.blockTable
+        # far from (0, 0) like real block coordinates, with a hole and an unclosed exterior ring
+        self.polygonWithHole = {'type': 'Polygon',
+                                'coordinates': [[[-85.0, 45.0], [-85.0, 45.01], [-84.98, 45.01], [-84.98, 45.0]],
+                                                [[-84.995, 45.002], [-84.99, 45.002], [-84.99, 45.004],
+                                                 [-84.995, 45.004], [-84.995, 45.002]]]}
+        self.multiPolygon = {'type': 'MultiPolygon',
+                             'coordinates': [[[[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]],
+                                             [[[3, 0], [3, 2], [4, 2], [3, 0]]]]}
+
+    def tearDown(self):
+        CensusBlock.blockTable = self.previousBlockTable
+
+    def test_encodedGeometry_decodesToSameShapeAndStats(self):
+        CensusBlock.blockTable = BlockTable()
+        for geoJSONGeometry in (self.polygonWithHole, self.multiPolygon):
+            expectedGeometry = shape(geoJSONGeometry)
+            self.assertTrue(decodeGeometry(encodeGeoJSONGeometry(geoJSONGeometry)).equals(expectedGeometry))
+
+            block = CensusBlock(countyFIPS='029', tractFIPS='970100', blockFIPS='1000', population=1, isWater=False,
+                                geoJSONGeometry=geoJSONGeometry)
+            rowIndex = block.rowIndex
+            self.assertIs(type(CensusBlock.blockTable.storedGeometryForRow(rowIndex)), bytes)
+            self.assertAlmostEqual(CensusBlock.blockTable.area[rowIndex], expectedGeometry.area, places=12)
+            self.assertAlmostEqual(CensusBlock.blockTable.centroid[rowIndex, 0], expectedGeometry.centroid.x, places=9)
+            self.assertAlmostEqual(CensusBlock.blockTable.centroid[rowIndex, 1], expectedGeometry.centroid.y, places=9)
+            self.assertEqual(tuple(CensusBlock.blockTable.bounds[rowIndex]), expectedGeometry.bounds)
+
+            # still encoded after pickling
+            unpickledBlock = pickle.loads(pickle.dumps(block))
+            self.assertIs(type(CensusBlock.blockTable.storedGeometryForRow(unpickledBlock.rowIndex)), bytes)
+
+            self.assertEqual(type(block.geometry), type(expectedGeometry))
+            self.assertTrue(block.geometry.equals(expectedGeometry))
+            self.assertIs(block.geometry, CensusBlock.blockTable.storedGeometryForRow(rowIndex))
+
+    def test_encodedGeometry_boundedDecodedGeometryCache(self):
+        CensusBlock.blockTable = BlockTable(decodedGeometryCacheSize=2)
+        blocks = [CensusBlock(countyFIPS='029', tractFIPS='970100', blockFIPS='{0:04}'.format(i), population=1,
+                              isWater=False, geoJSONGeometry=self.multiPolygon) for i in range(4)]
+
+        for block in blocks:
+            self.assertEqual(block.geometry.area, 2)
+        self.assertEqual(len(CensusBlock.blockTable.decodedGeometryCache), 2)
+        self.assertIs(blocks[3].geometry, blocks[3].geometry)
+        self.assertTrue(all(type(CensusBlock.blockTable.storedGeometryForRow(block.rowIndex)) is bytes
+                            for block in blocks))
+
+    def test_encodedGeometry_countyGeometryDecodedOnFirstUse(self):
+        county = County(countyName='Charlevoix County', countyFIPS='029', countyGeoJSONGeometry=self.polygonWithHole)
+        self.assertIs(type(county.storedGeometry), bytes)
+        self.assertTrue(county.geometry.equals(shape(self.polygonWithHole)))
+        self.assertIsNot(type(county.storedGeometry), bytes)
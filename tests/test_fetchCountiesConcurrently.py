@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import TestCase
+from urllib.parse import urlparse, parse_qs
+from censusData.countyFetchEngine import fetchCountiesConcurrently, getBlocksInCountyFromCensusAPI, \
+    getBlockGeometriesInCountyFromTIGERweb
+
+
+class CannedCensusServer:
+    # Stand-in for api.census.gov and TIGERweb that serves canned responses for a few counties
+    def __init__(self, blocksPerCounty, failuresBeforeSuccess=None, responseDelayInSeconds=0.0):
+        self.blocksPerCounty = blocksPerCounty
+        self.failuresBeforeSuccess = failuresBeforeSuccess or {}
+        self.responseDelayInSeconds = responseDelayInSeconds
+        self.requestCounts = {}
+        self.requestsInFlight = 0
+        self.maxRequestsInFlight = 0
+        self.lock = threading.Lock()
+
+        cannedServer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                cannedServer.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpServer = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.baseURL = 'http://127.0.0.1:{0}'.format(self.httpServer.server_address[1])
+        self.thread = threading.Thread(target=self.httpServer.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpServer.shutdown()
+        self.httpServer.server_close()
+
+    def handle(self, request):
+        parsedURL = urlparse(request.path)
+        query = {key: values[0] for key, values in parse_qs(parsedURL.query).items()}
+        if parsedURL.path.endswith('/dec/sf1'):
+            countyFIPS = query['in'].split('county:')[1]
+        else:
+            countyFIPS = query['where'].split('COUNTY=\'')[1][:3]
+        requestKey = (parsedURL.path, countyFIPS, query.get('resultOffset'))
+
+        with self.lock:
+            self.requestsInFlight += 1
+            self.maxRequestsInFlight = max(self.maxRequestsInFlight, self.requestsInFlight)
+            self.requestCounts[requestKey] = self.requestCounts.get(requestKey, 0) + 1
+            shouldFail = self.requestCounts[requestKey] <= self.failuresBeforeSuccess.get(countyFIPS, 0)
+        try:
+            time.sleep(self.responseDelayInSeconds)
+            if shouldFail:
+                request.send_response(503)
+                request.end_headers()
+                return
+
+            blocks = self.blocksPerCounty[countyFIPS]
+            if parsedURL.path.endswith('/dec/sf1'):
+                body = [['P001001', 'state', 'county', 'tract', 'block']] + \
+                       [[str(population), '26', countyFIPS, tract, block] for tract, block, population in blocks]
+            else:
+                offset = int(query['resultOffset'])
+                pageSize = int(query['resultRecordCount'])
+                page = blocks[offset:offset + pageSize]
+                body = {'type': 'FeatureCollection',
+                        'features': [{'type': 'Feature',
+                                      'properties': {'STATE': '26', 'COUNTY': countyFIPS, 'TRACT': tract,
+                                                     'BLOCK': block},
+                                      'geometry': {'type': 'Point', 'coordinates': [0, 0]}}
+                                     for tract, block, _ in page],
+                        'exceededTransferLimit': offset + pageSize < len(blocks)}
+            encodedBody = json.dumps(body).encode('utf-8')
+            request.send_response(200)
+            request.send_header('Content-Type', 'application/json')
+            request.send_header('Content-Length', str(len(encodedBody)))
+            request.end_headers()
+            request.wfile.write(encodedBody)
+        finally:
+            with self.lock:
+                self.requestsInFlight -= 1
+
+
+def cannedBlocks(numberOfBlocks):
+    return [('000100', '{0:04}'.format(1000 + i), i) for i in range(numberOfBlocks)]
+
+
+class TestFetchCountiesConcurrently(TestCase):
+
+    def setUp(self):
+        self.counties = [{'NAME': 'County {0}'.format(i), 'state': '26', 'county': '{0:03}'.format(i)}
+                         for i in range(1, 11)]
+        blocksPerCounty = {county['county']: cannedBlocks(5 + i) for i, county in enumerate(self.counties)}
+        self.server = CannedCensusServer(blocksPerCounty=blocksPerCounty,
+                                         failuresBeforeSuccess={'003': 2},
+                                         responseDelayInSeconds=0.05)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_fetchCountiesConcurrently_populationRows(self):
+        results = fetchCountiesConcurrently(
+            countyList=self.counties,
+            fetchCounty=lambda county: getBlocksInCountyFromCensusAPI(stateFIPSCode='26',
+                                                                      countyFIPSCode=county['county'],
+                                                                      censusYear=2010,
+                                                                      apiKey=None,
+                                                                      timeout=5,
+                                                                      initialBackoffSeconds=0.01,
+                                                                      baseURL=self.server.baseURL),
+            maxConcurrentRequests=3)
+
+        self.assertEqual([len(result) for result in results], [5 + i for i in range(10)])
+        self.assertEqual(results[0][1], {'P001001': '1', 'state': '26', 'county': '001', 'tract': '000100',
+                                         'block': '1001'})
+        self.assertLessEqual(self.server.maxRequestsInFlight, 3)
+        self.assertGreater(self.server.maxRequestsInFlight, 1)
+
+    def test_fetchCountiesConcurrently_pagedGeometriesWithRetries(self):
+        fetchedCounties = []
+        results = fetchCountiesConcurrently(
+            countyList=self.counties,
+            fetchCounty=lambda county: getBlockGeometriesInCountyFromTIGERweb(
+                stateFIPSCode='26',
+                countyFIPSCode=county['county'],
+                timeout=5,
+                initialBackoffSeconds=0.01,
+                pageSize=4,
+                layerURL='{0}/MapServer/14'.format(self.server.baseURL)),
+            maxConcurrentRequests=4,
+            onCountyFetched=lambda county, result: fetchedCounties.append(county['county']))
+
+        self.assertEqual(sorted(fetchedCounties), [county['county'] for county in self.counties])
+        self.assertEqual([len(result) for result in results], [5 + i for i in range(10)])
+        self.assertEqual([feature['properties']['BLOCK'] for feature in results[2]],
+                         ['{0:04}'.format(1000 + i) for i in range(7)])
+
+    def test_fetchCountiesConcurrently_reportsFailedCounties(self):
+        with self.assertRaises(RuntimeError):
+            fetchCountiesConcurrently(
+                countyList=self.counties,
+                fetchCounty=lambda county: getBlocksInCountyFromCensusAPI(stateFIPSCode='26',
+                                                                          countyFIPSCode=county['county'],
+                                                                          censusYear=2010,
+                                                                          apiKey=None,
+                                                                          timeout=5,
+                                                                          maxRetries=1,
+                                                                          initialBackoffSeconds=0.01,
+                                                                          baseURL=self.server.baseURL),
+                maxConcurrentRequests=4)
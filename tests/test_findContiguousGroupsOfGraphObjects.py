@@ -0,0 +1,58 @@
+import os
+from unittest import TestCase
+from exportData.exportData import loadDataFromFile
+from geographyHelper import findContiguousGroupsOfGraphObjects, forestFireFillGraphObject
+
+
+def listForestFireFill(candidateObjects, startingObject):
+    # the fill as a plain list queue, to check the set based one against
+    fireFilledObjects = []
+    fireQueue = [startingObject]
+    while fireQueue:
+        graphObject = fireQueue.pop(0)
+        candidateObjects.remove(graphObject)
+        fireFilledObjects.append(graphObject)
+        for neighborObject in graphObject.allNeighbors:
+            if neighborObject in candidateObjects and neighborObject not in fireQueue:
+                fireQueue.append(neighborObject)
+    return fireFilledObjects
+
+
+class TestFindContiguousGroupsOfGraphObjects(TestCase):
+
+    def setUp(self):
+        testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                        'testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+        self.atomicBlocks = loadDataFromFile(filePath=testDataFilePath)[0].children
+
+    def test_findContiguousGroupsOfGraphObjects_keepsBreadthFirstOrder(self):
+        # every 7th block leaves plenty of holes, so there are a lot of pieces
+        graphObjects = [atomicBlock for index, atomicBlock in enumerate(self.atomicBlocks) if index % 7 != 3]
+        remainingObjects = graphObjects.copy()
+        expectedGroups = []
+        while remainingObjects:
+            expectedGroups.append(listForestFireFill(candidateObjects=remainingObjects,
+                                                     startingObject=remainingObjects[0]))
+
+        contiguousGroups = findContiguousGroupsOfGraphObjects(graphObjects)
+        self.assertGreater(len(contiguousGroups), 2)
+        self.assertEqual([[graphObject.graphId for graphObject in group] for group in contiguousGroups],
+                         [[graphObject.graphId for graphObject in group] for group in expectedGroups])
+        self.assertEqual(findContiguousGroupsOfGraphObjects([]), [])
+
+    def test_forestFireFillGraphObject_removesFilledObjectsFromCandidates(self):
+        candidateObjects = self.atomicBlocks.copy()
+        startingObject = candidateObjects[100]
+        notInList = startingObject.allNeighbors[:1]
+
+        fireFilledObjects = forestFireFillGraphObject(candidateObjects=candidateObjects,
+                                                      startingObject=startingObject,
+                                                      notInList=notInList)
+
+        self.assertEqual(fireFilledObjects[0], startingObject)
+        self.assertNotIn(notInList[0], fireFilledObjects)
+        self.assertEqual(len(set(fireFilledObjects)), len(fireFilledObjects))
+        self.assertEqual(candidateObjects, [atomicBlock for atomicBlock in self.atomicBlocks
+                                            if atomicBlock not in fireFilledObjects])
+        with self.assertRaises(ValueError):
+            forestFireFillGraphObject(candidateObjects=candidateObjects, startingObject=startingObject)
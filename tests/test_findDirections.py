@@ -0,0 +1,48 @@
+import os
+from unittest import TestCase
+import numpy as np
+from shapely.geometry import Point
+from exportData.exportData import loadDataFromFile
+from geographyHelper import findDirection, findDirections, cardinalDirectionsFromValues, CardinalDirection
+
+
+class TestFindDirections(TestCase):
+
+    def test_findDirections_matchesFindDirection(self):
+        randomGenerator = np.random.default_rng(0)
+        basePoints = randomGenerator.uniform(-10, 10, size=(2000, 2))
+        targetPoints = randomGenerator.uniform(-10, 10, size=(2000, 2))
+        # points right on the diagonals, on the axes and on top of the base point
+        targetPoints[:8] = basePoints[:8] + [(1, 1), (-1, 1), (-1, -1), (1, -1), (0, 1), (-1, 0), (0, -1), (0, 0)]
+        topAngles = randomGenerator.uniform(1, 89, size=2000)
+        topAngles[:8] = 45.0
+
+        directions = cardinalDirectionsFromValues(findDirections(basePoints=basePoints,
+                                                                 targetPoints=targetPoints,
+                                                                 topAnglesFromCenter=topAngles))
+
+        expectedDirections = [findDirection(basePoint=Point(*basePoint), targetPoint=Point(*targetPoint),
+                                            topAngleFromCenter=topAngle)
+                              for basePoint, targetPoint, topAngle in
+                              zip(basePoints.tolist(), targetPoints.tolist(), topAngles.tolist())]
+        self.assertEqual(directions, expectedDirections)
+        self.assertEqual(directions[7], CardinalDirection.north)
+
+    def test_findDirections_singleBasePoint(self):
+        directions = findDirections(basePoints=(0.0, 0.0), targetPoints=[(0, 1), (-1, 0), (1, 0), (0, -1)])
+        self.assertEqual(cardinalDirectionsFromValues(directions),
+                         [CardinalDirection.north, CardinalDirection.west, CardinalDirection.east,
+                          CardinalDirection.south])
+
+    def test_assignNeighboringBlocksToBlocks_keepsDirections(self):
+        testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                        'testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+        redistrictingGroup = loadDataFromFile(filePath=testDataFilePath)[0]
+        previousDirections = {(atomicBlock.graphId, neighbor.graphId): atomicBlock.directionOfNeighbor(neighbor)
+                              for atomicBlock in redistrictingGroup.children for neighbor in atomicBlock.allNeighbors}
+
+        redistrictingGroup.assignNeighboringBlocksToBlocks()
+
+        directions = {(atomicBlock.graphId, neighbor.graphId): atomicBlock.directionOfNeighbor(neighbor)
+                      for atomicBlock in redistrictingGroup.children for neighbor in atomicBlock.allNeighbors}
+        self.assertEqual(directions, previousDirections)
@@ -0,0 +1,33 @@
+from unittest import TestCase
+from shapely.geometry import Polygon, box
+from geographyHelper import findSharedBoundaryLengths
+
+
+class TestFindSharedBoundaryLengths(TestCase):
+
+    def test_findSharedBoundaryLengths_grid(self):
+        # 2x2 grid, the diagonal squares only touch at a corner so they aren't neighbors
+        geometries = [box(0, 0, 1, 1), box(1, 0, 2, 1), box(0, 1, 1, 2), box(1, 1, 2, 2)]
+        sharedBoundaryLengths = findSharedBoundaryLengths(geometries)
+        self.assertEqual(sorted(sharedBoundaryLengths.keys()), [(0, 1), (0, 2), (1, 3), (2, 3)])
+        for length in sharedBoundaryLengths.values():
+            self.assertAlmostEqual(length, 1)
+
+    def test_findSharedBoundaryLengths_missingVertexAlongEdge(self):
+        # the long block has no vertex where the two short blocks meet
+        longBlock = Polygon([(0, 0), (0, 2), (1, 2), (1, 0)])
+        lowerBlock = Polygon([(1, 0), (1, 0.5), (2, 0.5), (2, 0)])
+        upperBlock = Polygon([(1, 0.5), (1, 2), (2, 2), (2, 0.5)])
+        sharedBoundaryLengths = findSharedBoundaryLengths([longBlock, lowerBlock, upperBlock])
+        self.assertEqual(sorted(sharedBoundaryLengths.keys()), [(0, 1), (0, 2), (1, 2)])
+        self.assertAlmostEqual(sharedBoundaryLengths[(0, 1)], 0.5)
+        self.assertAlmostEqual(sharedBoundaryLengths[(0, 2)], 1.5)
+        self.assertAlmostEqual(sharedBoundaryLengths[(1, 2)], 1)
+
+    def test_findSharedBoundaryLengths_blockInHole(self):
+        outerBlock = Polygon([(0, 0), (0, 3), (3, 3), (3, 0)], [[(1, 1), (1, 2), (2, 2), (2, 1)]])
+        innerBlock = box(1, 1, 2, 2)
+        farBlock = box(5, 5, 6, 6)
+        sharedBoundaryLengths = findSharedBoundaryLengths([outerBlock, innerBlock, farBlock])
+        self.assertEqual(list(sharedBoundaryLengths.keys()), [(0, 1)])
+        self.assertAlmostEqual(sharedBoundaryLengths[(0, 1)], 4)
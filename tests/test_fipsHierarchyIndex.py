@@ -0,0 +1,24 @@
+from unittest import TestCase
+from censusData.fipsHierarchyIndex import FIPSHierarchyIndex
+from censusData.geoid import packGEOIDFromFIPS
+
+
+class TestFIPSHierarchyIndex(TestCase):
+
+    def test_fipsHierarchyIndex_contiguousCountyAndTractRanges(self):
+        blockFIPSCodes = [('26', '003', '000200', '1000'),
+                          ('26', '001', '000100', '1001'),
+                          ('26', '003', '000100', '1000'),
+                          ('26', '001', '000100', '1000'),
+                          ('26', '003', '000200', '1001'),
+                          ('27', '001', '000100', '1000')]
+        geoids = [packGEOIDFromFIPS(*fipsCodes) for fipsCodes in blockFIPSCodes]
+        fipsHierarchyIndex = FIPSHierarchyIndex(geoids)
+
+        self.assertEqual(fipsHierarchyIndex.countyRange(stateCode=26, countyCode=3), (2, 5))
+        self.assertEqual(fipsHierarchyIndex.rowsInCounty(stateCode=26, countyCode=1).tolist(), [3, 1])
+        self.assertEqual(fipsHierarchyIndex.rowsInTract(stateCode=26, countyCode=3, tractCode=200).tolist(), [0, 4])
+        self.assertEqual(fipsHierarchyIndex.rowsInCounty(stateCode=26, countyCode=5).tolist(), [])
+        self.assertEqual(sorted(fipsHierarchyIndex.rowsWithCountyCode(1).tolist()), [1, 3, 5])
+        self.assertEqual(fipsHierarchyIndex.rowWithGEOID(geoids[4]), 4)
+        self.assertIsNone(fipsHierarchyIndex.rowWithGEOID(packGEOIDFromFIPS('26', '005', '000100', '1000')))
@@ -0,0 +1,39 @@
+import pickle
+from unittest import TestCase
+from shapely.geometry import box
+from formatData.graphObject import GraphObject, getNextUniqueId, reserveGraphIdRange, useGraphIdRange
+
+
+class TestGetNextUniqueId(TestCase):
+
+    def setUp(self):
+        self.graphIdRange = GraphObject.graphIdRange
+        self.nextGraphId = GraphObject.nextGraphId
+
+    def tearDown(self):
+        GraphObject.graphIdRange = self.graphIdRange
+        GraphObject.nextGraphId = max(GraphObject.nextGraphId, self.nextGraphId)
+
+    def test_getNextUniqueId_neverReusesIds(self):
+        firstGraphObject = GraphObject(centerOfObject=box(0, 0, 1, 1).centroid)
+        secondGraphObject = GraphObject(centerOfObject=box(1, 0, 2, 1).centroid)
+        self.assertEqual(secondGraphObject.graphId, firstGraphObject.graphId + 1)
+
+        # ids of unpickled objects aren't handed out again
+        GraphObject.nextGraphId = 0
+        unpickledGraphObject = pickle.loads(pickle.dumps(secondGraphObject))
+        self.assertIs(GraphObject.graphObjectDict[secondGraphObject.graphId], unpickledGraphObject)
+        self.assertEqual(getNextUniqueId(), secondGraphObject.graphId + 1)
+
+    def test_reserveGraphIdRange_rangesAreDisjoint(self):
+        firstRange = reserveGraphIdRange(10)
+        secondRange = reserveGraphIdRange(5)
+        self.assertEqual(firstRange[1] - firstRange[0], 10)
+        self.assertEqual(secondRange, (firstRange[1], firstRange[1] + 5))
+        self.assertEqual(getNextUniqueId(), secondRange[1])
+
+        useGraphIdRange(firstGraphId=firstRange[0], endGraphId=firstRange[0] + 2)
+        self.assertEqual(getNextUniqueId(), firstRange[0])
+        self.assertEqual(getNextUniqueId(), firstRange[0] + 1)
+        with self.assertRaises(RuntimeError):
+            getNextUniqueId()
@@ -0,0 +1,78 @@
+from unittest import TestCase
+from shapely.geometry import box
+from censusData.censusBlock import CensusBlock
+from formatData.atomicBlock import AtomicBlock
+from formatData.graphContext import GraphContext
+from formatData.graphObject import GraphObject
+from formatData.redistrictingGroup import RedistrictingGroup
+from redistrict.district import createDistrictFromRedistrictingGroups, WeightingMethod, BreakingMethod
+
+
+def atomicBlockForSquare(blockFIPS, minX, minY):
+    return AtomicBlock(childrenBlocks=[CensusBlock(countyFIPS='01',
+                                                   tractFIPS='01',
+                                                   blockFIPS=blockFIPS,
+                                                   population=10,
+                                                   isWater=False,
+                                                   geometry=box(minX, minY, minX + 1, minY + 1))])
+
+
+class TestGraphContext(TestCase):
+
+    def test_graphContext_keepsRegistriesSeparate(self):
+        outerGraphObjectDict = GraphObject.graphObjectDict
+        outerBlockTable = CensusBlock.blockTable
+        with GraphContext() as graphContext:
+            atomicBlock = atomicBlockForSquare('01', 0, 0)
+            self.assertEqual(atomicBlock.graphId, 0)
+            self.assertEqual(len(GraphObject.graphObjectDict), 1)
+            self.assertEqual(AtomicBlock.atomicBlockList, [atomicBlock])
+            self.assertEqual(len(CensusBlock.blockTable), 1)
+            self.assertIs(GraphContext.activeContext, graphContext)
+        self.assertIs(GraphObject.graphObjectDict, outerGraphObjectDict)
+        self.assertIs(CensusBlock.blockTable, outerBlockTable)
+        self.assertNotIn(atomicBlock, AtomicBlock.atomicBlockList)
+
+        # the context keeps its registries, including the id counter, for the next time it's active
+        with graphContext:
+            self.assertEqual(atomicBlockForSquare('02', 1, 0).graphId, 1)
+
+    def test_graphContext_releaseUnreachable(self):
+        with GraphContext() as graphContext:
+            keptBlocks = [atomicBlockForSquare('01', 0, 0), atomicBlockForSquare('02', 0, 1)]
+            keptGroup = RedistrictingGroup(childrenBlocks=keptBlocks)
+            keptGroup.assignNeighboringBlocksToBlocks()
+            discardedGroup = RedistrictingGroup(childrenBlocks=[atomicBlockForSquare('03', 5, 5)])
+            pinnedGroup = RedistrictingGroup(childrenBlocks=[atomicBlockForSquare('04', 9, 9)])
+
+            with graphContext.pinned([pinnedGroup]):
+                releasedCount = graphContext.releaseUnreachable(rootGraphObjects=[keptGroup])
+            self.assertEqual(releasedCount, 2)
+            self.assertEqual(sorted(GraphObject.graphObjectDict.keys()),
+                             sorted(graphObject.graphId for graphObject in keptBlocks + [keptGroup, pinnedGroup,
+                                                                                         pinnedGroup.children[0]]))
+            self.assertNotIn(discardedGroup.children[0], AtomicBlock.atomicBlockList)
+            self.assertEqual(CensusBlock.blockTable.totalPopulation(), 30)
+            self.assertEqual(keptBlocks[0].allNeighbors, [keptBlocks[1]])
+
+    def test_graphContext_splitDistrictReleasesDiscardedGraphObjects(self):
+        with GraphContext():
+            atomicBlocks = [atomicBlockForSquare('{0:02}'.format(row * 2 + column), column, row)
+                            for row in range(4) for column in range(2)]
+            redistrictingGroup = RedistrictingGroup(childrenBlocks=atomicBlocks)
+            redistrictingGroup.assignNeighboringBlocksToBlocks()
+            district = createDistrictFromRedistrictingGroups([redistrictingGroup])
+            splits = district.splitDistrict(numberOfDistricts=2,
+                                            populationDeviation=1,
+                                            weightingMethod=WeightingMethod.distance,
+                                            breakingMethod=BreakingMethod.splitGroupsOnEdge,
+                                            shouldMergeIntoFormerRedistrictingGroups=True,
+                                            fastCalculations=False,
+                                            shouldSaveProgress=False,
+                                            shouldReleaseDiscardedGraphObjects=True)
+            self.assertEqual(len(splits), 2)
+            liveGraphObjects = [graphObject for split in splits for group in split.children
+                                for graphObject in [group] + group.children]
+            self.assertEqual(len(GraphObject.graphObjectDict), len(liveGraphObjects))
+            self.assertEqual(len(AtomicBlock.atomicBlockList), len(atomicBlocks))
+            self.assertEqual(CensusBlock.blockTable.totalPopulation(), 80)
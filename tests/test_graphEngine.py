@@ -0,0 +1,54 @@
+import os
+from unittest import TestCase
+import numpy as np
+from exportData.exportData import loadDataFromFile
+from formatData.graphEngine import GraphEngine
+from geographyHelper import ContiguityIndex
+
+
+class TestGraphEngine(TestCase):
+
+    def test_graphEngine_matchesGraphObjects(self):
+        testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                        'testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+        atomicBlocks = loadDataFromFile(filePath=testDataFilePath)[0].children
+        graphEngine = GraphEngine(atomicBlocks)
+
+        self.assertEqual(len(graphEngine), len(atomicBlocks))
+        self.assertEqual(graphEngine.populationOfGraphObjects(atomicBlocks[:10]),
+                         sum(atomicBlock.population for atomicBlock in atomicBlocks[:10]))
+        self.assertEqual(graphEngine.bounds[5].tolist(), list(atomicBlocks[5].geometry.bounds))
+
+        # labels keep their populations as nodes move between them
+        graphEngine.setLabels(graphEngine.nodeIndicesForGraphObjects(atomicBlocks[:10]), 1)
+        graphEngine.setLabels(graphEngine.nodeIndicesForGraphObjects(atomicBlocks[5:20]), 2)
+        self.assertEqual(graphEngine.populationOfLabel(1),
+                         sum(atomicBlock.population for atomicBlock in atomicBlocks[:5]))
+        self.assertEqual(graphEngine.populationOfLabel(2),
+                         sum(atomicBlock.population for atomicBlock in atomicBlocks[5:20]))
+        self.assertEqual(graphEngine.populationOfLabel(0),
+                         sum(atomicBlock.population for atomicBlock in atomicBlocks[20:]))
+        graphEngine.clearLabels()
+        self.assertEqual(graphEngine.populationOfLabel(1), 0)
+
+        # neighbors come out in allNeighbors order, leaving out those not in the mask
+        someBlocks = atomicBlocks[100:103]
+        nodeMask = ~graphEngine.maskForGraphObjects(atomicBlocks[::2])
+        neighbors = graphEngine.neighborsOfNodes(graphEngine.nodeIndicesForGraphObjects(someBlocks), nodeMask=nodeMask)
+        self.assertEqual(graphEngine.graphObjectsForNodes(neighbors),
+                         [neighbor for atomicBlock in someBlocks for neighbor in atomicBlock.allNeighbors
+                          if nodeMask[graphEngine.nodeIndexForGraphId[neighbor.graphId]]])
+        self.assertEqual(graphEngine.graphObjectsForNodes(nodeMask), atomicBlocks[1::2])
+
+        # an index over the masked nodes matches one built from those graph objects
+        maskedIndex = ContiguityIndex(graphEngine=graphEngine, nodeMask=nodeMask)
+        expectedIndex = ContiguityIndex(atomicBlocks[1::2])
+        self.assertEqual(maskedIndex.numberOfPieces, expectedIndex.numberOfPieces)
+        for atomicBlock in atomicBlocks[1::62]:
+            self.assertEqual(maskedIndex.numberOfPiecesWithout([atomicBlock] + atomicBlock.allNeighbors),
+                             expectedIndex.numberOfPiecesWithout([atomicBlock] + atomicBlock.allNeighbors))
+        self.assertTrue(np.array_equal(graphEngine.undirectedNeighborLists(nodeMask)[0],
+                                       np.arange(1, len(atomicBlocks), 2)))
+
+        with self.assertRaises(ValueError):
+            GraphEngine(atomicBlocks[:2] + atomicBlocks[:1])
@@ -0,0 +1,68 @@
+import pickle
+from unittest import TestCase
+from shapely.geometry import box
+from formatData.graphObject import GraphObject
+from geographyHelper import CardinalDirection
+
+
+class TestGraphObjectNeighbors(TestCase):
+
+    def test_graphObjectNeighbors_keepDirectionOrder(self):
+        centerObject = GraphObject(centerOfObject=box(0, 0, 1, 1).centroid)
+        southernObject = GraphObject(centerOfObject=box(0, -1, 1, 0).centroid)
+        northernObject = GraphObject(centerOfObject=box(0, 1, 1, 2).centroid)
+        easternObject = GraphObject(centerOfObject=box(1, 0, 2, 1).centroid)
+
+        centerObject.addNeighbor(southernObject, direction=CardinalDirection.south)
+        centerObject.addNeighbor(easternObject, direction=CardinalDirection.east)
+        centerObject.addNeighbor(northernObject, direction=CardinalDirection.north)
+        centerObject.addNeighbor(southernObject, direction=CardinalDirection.north)
+
+        self.assertEqual(centerObject.allNeighbors, [northernObject, easternObject, southernObject])
+        self.assertEqual(centerObject.southernNeighbors, [southernObject])
+        self.assertTrue(centerObject.isNeighbor(easternObject))
+        self.assertIs(centerObject.directionOfNeighbor(easternObject), CardinalDirection.east)
+
+        centerObject.removeNeighbor(easternObject)
+        self.assertFalse(centerObject.isNeighbor(easternObject))
+        self.assertEqual(list(centerObject.neighborGraphIds), [southernObject.graphId, northernObject.graphId])
+        centerObject.validateNeighborLists()
+
+    def test_graphObjectNeighbors_migratesNeighborListsFromOlderPickles(self):
+        northernObject = GraphObject(centerOfObject=box(0, 1, 1, 2).centroid)
+        westernObject = GraphObject(centerOfObject=box(-1, 0, 0, 1).centroid)
+        legacyObject = GraphObject.__new__(GraphObject)
+        legacyObject.__setstate__({'graphId': GraphObject.nextGraphId,
+                                   '_GraphObject__northernNeighbors': [northernObject.graphId],
+                                   '_GraphObject__westernNeighbors': [westernObject.graphId],
+                                   '_GraphObject__easternNeighbors': [],
+                                   '_GraphObject__southernNeighbors': [],
+                                   'populationEnergy': 0})
+
+        self.assertEqual(legacyObject.allNeighbors, [northernObject, westernObject])
+        self.assertEqual(legacyObject.westernNeighbors, [westernObject])
+        self.assertFalse(hasattr(legacyObject, '_GraphObject__northernNeighbors'))
+
+    def test_graphObjectNeighbors_iterateAndPickleInDirectionOrder(self):
+        centerObject = GraphObject(centerOfObject=box(0, 0, 1, 1).centroid)
+        westernObject = GraphObject(centerOfObject=box(-1, 0, 0, 1).centroid)
+        southernObject = GraphObject(centerOfObject=box(0, -1, 1, 0).centroid)
+        northernObject = GraphObject(centerOfObject=box(0, 1, 1, 2).centroid)
+        centerObject.addNeighbors([southernObject, westernObject, northernObject],
+                                  directions=[CardinalDirection.south, CardinalDirection.west, CardinalDirection.north])
+        self.assertEqual(list(centerObject.iterateNeighbors()), [northernObject, westernObject, southernObject])
+
+        # a neighbor that's removed and added again goes to the back of its direction
+        centerObject.removeNeighbor(westernObject)
+        centerObject.addNeighbor(southernObject, direction=CardinalDirection.south)
+        self.assertEqual(centerObject.westernNeighbors, [])
+        centerObject.addNeighbor(westernObject, direction=CardinalDirection.south)
+        self.assertEqual(centerObject.southernNeighbors, [southernObject, westernObject])
+
+        state = centerObject.__getstate__()
+        self.assertNotIn('_GraphObject__neighborIdsInDirection', state)
+        unpickledObject = pickle.loads(pickle.dumps(centerObject))
+        self.assertEqual([neighbor.graphId for neighbor in unpickledObject.allNeighbors],
+                         [northernObject.graphId, southernObject.graphId, westernObject.graphId])
+        unpickledObject.clearNeighborGraphObjects()
+        self.assertEqual(unpickledObject.allNeighbors, [])
@@ -0,0 +1,52 @@
+import os
+from unittest import TestCase
+from shapely.geometry import box, Polygon, MultiPolygon
+from exportData.exportData import loadDataFromFile
+from geographyHelper import intersectingPolygons, intersectingPolygonPairs, findIntersectingPolygonPairs
+
+
+class TestIntersectingPolygonPairs(TestCase):
+
+    def test_intersectingPolygonPairs_matchesIntersectingPolygons(self):
+        square = box(0, 0, 1, 1)
+        squareWithHole = Polygon(box(0, 0, 4, 4).exterior.coords, [box(1, 1, 3, 3).exterior.coords])
+        polygons = [square,
+                    box(1, 0, 2, 1),  # shares an edge
+                    box(1, 1, 2, 2),  # touches at a corner
+                    box(0.5, 0.5, 1.5, 1.5),  # overlaps without sharing an edge
+                    box(0.25, 0.25, 0.75, 0.75),  # inside
+                    box(5, 5, 6, 6),  # far away
+                    box(0, 1, 0.5, 2),  # shares part of an edge
+                    squareWithHole,
+                    box(1, 1, 3, 3),  # fills the hole
+                    box(1.5, 1.5, 2.5, 2.5),  # inside the hole
+                    Polygon([(1, 2), (2, 1), (3, 2), (2, 3)]),  # inside the hole, touching it at points
+                    MultiPolygon([box(2, 0, 3, 1), box(5, 6, 6, 7)])]
+        aPolygons = [a for a in polygons for b in polygons if a is not b]
+        bPolygons = [b for a in polygons for b in polygons if a is not b]
+
+        isIntersecting, sharedEdgeLengths = intersectingPolygonPairs(aPolygons=aPolygons, bPolygons=bPolygons)
+
+        self.assertEqual(isIntersecting.tolist(), [intersectingPolygons(a, b) for a, b in zip(aPolygons, bPolygons)])
+        # the first pairs are the square with each of the others
+        self.assertEqual(sharedEdgeLengths[:6].tolist(), [1.0, 0.0, 0.0, 0.0, 0.0, 0.5])
+
+        intersectingPairs = findIntersectingPolygonPairs(aPolygons=polygons, bPolygons=polygons)
+        self.assertEqual(intersectingPairs,
+                         [(aIndex, bIndex) for aIndex, a in enumerate(polygons) for bIndex, b in enumerate(polygons)
+                          if intersectingPolygons(a, b)])
+
+    def test_findIntersectingPolygonPairs_blocks(self):
+        testDataFilePath = os.path.join(os.path.dirname(__file__),
+                                        'testData/2010-Michigan-CharlevoixRedistrictingGroupInfoNeedsSplit.redistdata')
+        atomicBlocks = loadDataFromFile(filePath=testDataFilePath)[0].children[:300]
+        geometries = [atomicBlock.geometry for atomicBlock in atomicBlocks]
+
+        intersectingPairs, sharedEdgeLengths = findIntersectingPolygonPairs(aPolygons=geometries,
+                                                                            bPolygons=geometries,
+                                                                            shouldFindSharedEdgeLengths=True)
+
+        self.assertEqual(intersectingPairs,
+                         [(aIndex, bIndex) for aIndex, a in enumerate(geometries) for bIndex, b in enumerate(geometries)
+                          if a.intersects(b) and intersectingPolygons(a, b)])
+        self.assertEqual(len(sharedEdgeLengths), len(intersectingPairs))
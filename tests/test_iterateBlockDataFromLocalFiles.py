@@ -0,0 +1,101 @@
+import json
+import tempfile
+from os import path
+from unittest import TestCase, skipUnless
+from censusData.blockDataJoin import createBlockJoinMismatches, hasBlockJoinMismatches
+from censusData.geoid import packGEOIDFromFIPS
+from censusData.localBlockData import iterateBlockDataFromLocalFiles
+from formatData.redistrictingGroup import createRedistrictingGroupsWithAtomicBlocksFromCensusData
+
+try:
+    import shapefile
+except ImportError:
+    shapefile = None
+
+
+def squareCoordinates(x, y):
+    return [[[x, y], [x, y + 1], [x + 1, y + 1], [x + 1, y], [x, y]]]
+
+
+class TestIterateBlockDataFromLocalFiles(TestCase):
+
+    def setUp(self):
+        self.temporaryDirectory = tempfile.TemporaryDirectory()
+        self.blocks = [('000100', '1000', 4, 0), ('000100', '1001', 7, 1), ('000200', '2000', 0, 2)]
+
+    def tearDown(self):
+        self.temporaryDirectory.cleanup()
+
+    def filePath(self, fileName):
+        return path.join(self.temporaryDirectory.name, fileName)
+
+    def tigerLineFeature(self, tract, block, x, population=None):
+        properties = {'STATEFP10': '26', 'COUNTYFP10': '029', 'TRACTCE10': tract, 'BLOCKCE10': block}
+        if population is not None:
+            properties['POP10'] = population
+        return {'type': 'Feature', 'properties': properties,
+                'geometry': {'type': 'Polygon', 'coordinates': squareCoordinates(x, 0)}}
+
+    def test_iterateBlockDataFromLocalFiles_geoJSONWithPopulationTable(self):
+        with open(self.filePath('blocks.geojson'), 'w') as geoJSONFile:
+            json.dump({'type': 'FeatureCollection',
+                       'features': [self.tigerLineFeature(tract, block, x)
+                                    for tract, block, _, x in reversed(self.blocks)]}, geoJSONFile)
+        with open(self.filePath('population.csv'), 'w') as csvFile:
+            csvFile.write('GEO_ID,P001001\n')
+            for tract, block, population, _ in self.blocks:
+                csvFile.write('1000000US26029{0}{1},{2}\n'.format(tract, block, population))
+
+        blockJoinMismatches = createBlockJoinMismatches()
+        blockData = list(iterateBlockDataFromLocalFiles(blockGeometryFilePath=self.filePath('blocks.geojson'),
+                                                        blockJoinMismatches=blockJoinMismatches,
+                                                        populationTableFilePath=self.filePath('population.csv')))
+
+        self.assertFalse(hasBlockJoinMismatches(blockJoinMismatches))
+        self.assertEqual([(item['state'], item['county'], item['tract'], item['block'], item['P001001'])
+                          for item in blockData],
+                         [('26', '029', '000200', '2000', '0'),
+                          ('26', '029', '000100', '1001', '7'),
+                          ('26', '029', '000100', '1000', '4')])
+        self.assertEqual(blockData[0]['geometry']['type'], 'Polygon')
+
+        redistrictingGroups = createRedistrictingGroupsWithAtomicBlocksFromCensusData(blockData)
+        self.assertEqual(len(redistrictingGroups), 1)
+        self.assertEqual(redistrictingGroups[0].population, 11)
+
+    def test_iterateBlockDataFromLocalFiles_lineDelimitedGeoJSONWithMissingPopulation(self):
+        with open(self.filePath('blocks.geojsonl'), 'w') as geoJSONFile:
+            for tract, block, _, x in self.blocks:
+                geoJSONFile.write(json.dumps(self.tigerLineFeature(tract, block, x)) + '\n')
+        with open(self.filePath('population.json'), 'w') as jsonFile:
+            json.dump([['P001001', 'state', 'county', 'tract', 'block'],
+                       ['4', '26', '029', '000100', '1000'],
+                       ['7', '26', '029', '000100', '1001']], jsonFile)
+
+        blockJoinMismatches = createBlockJoinMismatches()
+        blockData = list(iterateBlockDataFromLocalFiles(blockGeometryFilePath=self.filePath('blocks.geojsonl'),
+                                                        blockJoinMismatches=blockJoinMismatches,
+                                                        populationTableFilePath=self.filePath('population.json')))
+
+        self.assertEqual(len(blockData), 2)
+        self.assertEqual(blockJoinMismatches['geometriesWithoutBlockData'],
+                         [packGEOIDFromFIPS('26', '029', '000200', '2000')])
+
+    @skipUnless(shapefile, 'pyshp is needed to write shapefiles')
+    def test_iterateBlockDataFromLocalFiles_populationAndHousingShapefile(self):
+        with shapefile.Writer(self.filePath('tabblock2010_26_pophu')) as shapefileWriter:
+            for fieldName in ('STATEFP10', 'COUNTYFP10', 'TRACTCE10', 'BLOCKCE'):
+                shapefileWriter.field(fieldName, 'C')
+            shapefileWriter.field('POP10', 'N')
+            for tract, block, population, x in self.blocks:
+                shapefileWriter.poly(squareCoordinates(x, 0))
+                shapefileWriter.record('26', '029', tract, block, population)
+
+        blockJoinMismatches = createBlockJoinMismatches()
+        blockData = list(iterateBlockDataFromLocalFiles(
+            blockGeometryFilePath=self.filePath('tabblock2010_26_pophu.shp'),
+            blockJoinMismatches=blockJoinMismatches))
+
+        self.assertEqual([(item['tract'], item['block'], item['P001001']) for item in blockData],
+                         [('000100', '1000', '4'), ('000100', '1001', '7'), ('000200', '2000', '0')])
+        self.assertEqual(blockData[0]['geometry']['type'], 'Polygon')
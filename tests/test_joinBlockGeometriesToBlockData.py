@@ -0,0 +1,58 @@
+from unittest import TestCase
+from censusData.geoid import packGEOIDFromFIPS
+from censusData.blockDataJoin import createBlockDataIndex, createBlockJoinMismatches, \
+    joinBlockGeometriesToBlockData, findBlockDataWithoutGeometry, hasBlockJoinMismatches
+
+
+def blockData(tract, block):
+    return {'state': '26', 'county': '029', 'tract': tract, 'block': block, 'P001001': '1'}
+
+
+def blockKey(tract, block):
+    return packGEOIDFromFIPS(stateFIPS='26', countyFIPS='029', tractFIPS=tract, blockFIPS=block)
+
+
+def blockGeometry(tract, block):
+    return {'properties': {'STATE': '26', 'COUNTY': '029', 'TRACT': tract, 'BLOCK': block},
+            'geometry': {'type': 'Polygon', 'coordinates': [[[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]]}}
+
+
+class TestJoinBlockGeometriesToBlockData(TestCase):
+
+    def test_joinBlockGeometriesToBlockData_allMatch(self):
+        existingBlockData = [blockData('000100', '1000'), blockData('000100', '1001'), blockData('000200', '1000')]
+        blockGeometries = [blockGeometry('000200', '1000'), blockGeometry('000100', '1000'),
+                           blockGeometry('000100', '1001')]
+
+        blockJoinMismatches = createBlockJoinMismatches()
+        blockDataIndex = createBlockDataIndex(existingBlockData, blockJoinMismatches)
+        matchedBlockKeys = set()
+        joinedBlockData = joinBlockGeometriesToBlockData(blockGeometries, blockDataIndex, matchedBlockKeys,
+                                                         blockJoinMismatches)
+        findBlockDataWithoutGeometry(blockDataIndex, matchedBlockKeys, blockJoinMismatches)
+
+        self.assertFalse(hasBlockJoinMismatches(blockJoinMismatches))
+        self.assertEqual(len(joinedBlockData), 3)
+        self.assertEqual([(item['tract'], item['block']) for item in joinedBlockData],
+                         [('000200', '1000'), ('000100', '1000'), ('000100', '1001')])
+        self.assertTrue(all('geometry' in item for item in joinedBlockData))
+
+    def test_joinBlockGeometriesToBlockData_reportsMismatchesInBulk(self):
+        existingBlockData = [blockData('000100', '1000'), blockData('000100', '1000'),
+                             blockData('000100', '1001'), blockData('000300', '2000')]
+        blockGeometries = [blockGeometry('000100', '1000'), blockGeometry('000100', '1000'),
+                           blockGeometry('000100', '1001'), blockGeometry('000900', '1000')]
+
+        blockJoinMismatches = createBlockJoinMismatches()
+        blockDataIndex = createBlockDataIndex(existingBlockData, blockJoinMismatches)
+        matchedBlockKeys = set()
+        joinedBlockData = joinBlockGeometriesToBlockData(blockGeometries, blockDataIndex, matchedBlockKeys,
+                                                         blockJoinMismatches)
+        findBlockDataWithoutGeometry(blockDataIndex, matchedBlockKeys, blockJoinMismatches)
+
+        self.assertTrue(hasBlockJoinMismatches(blockJoinMismatches))
+        self.assertEqual(len(joinedBlockData), 2)
+        self.assertEqual(blockJoinMismatches['duplicateBlockData'], [blockKey('000100', '1000')])
+        self.assertEqual(blockJoinMismatches['geometriesMatchedMoreThanOnce'], [blockKey('000100', '1000')])
+        self.assertEqual(blockJoinMismatches['geometriesWithoutBlockData'], [blockKey('000900', '1000')])
+        self.assertEqual(blockJoinMismatches['blockDataWithoutGeometry'], [blockKey('000300', '2000')])
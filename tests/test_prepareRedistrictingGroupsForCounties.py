@@ -0,0 +1,78 @@
+from unittest import TestCase
+from unittest.mock import patch
+from shapely.geometry import box, mapping
+from formatData.countyStageRunner import prepareRedistrictingGroupsForCounties, prepareRedistrictingGroupsForCounty, \
+    prepareRedistrictingGroupsForCountyInWorker, graphIdsNeededForCounty, groupCensusDataByCounty
+from formatData.graphContext import GraphContext
+from formatData.graphObject import GraphObject
+
+
+def censusBlockDictsForGrid(countyFIPS, originX, numberOfColumns, numberOfRows, isFragmented=False):
+    # a fragmented grid is in pieces of two blocks with gaps between them. Single blocks would be attached to their
+    # closest neighbor
+    censusBlockDicts = []
+    for row in range(numberOfRows):
+        for column in range(numberOfColumns):
+            blockNumber = row * numberOfColumns + column
+            minX = originX + column + column // 2 if isFragmented else originX + column
+            minY = row * 2 if isFragmented else row
+            # the first block is water, it has a block FIPS starting with 0
+            blockFIPS = '{0:04}'.format(blockNumber) if blockNumber == 0 else '{0:04}'.format(1000 + blockNumber)
+            censusBlockDicts.append({'state': '26',
+                                     'county': countyFIPS,
+                                     'tract': '000100',
+                                     'block': blockFIPS,
+                                     'P001001': '0' if blockNumber == 0 else str(blockNumber),
+                                     'geometry': mapping(box(minX, minY, minX + 1, minY + 1))})
+    return censusBlockDicts
+
+
+class TestPrepareRedistrictingGroupsForCounties(TestCase):
+
+    def test_prepareRedistrictingGroupsForCounties_parallelMatchesSerial(self):
+        censusData = censusBlockDictsForGrid('001', 0, 4, 3) + censusBlockDictsForGrid('003', 4, 3, 3)
+
+        serialGroups = prepareRedistrictingGroupsForCounties(censusData=censusData, numberOfProcesses=1)
+        parallelGroups = prepareRedistrictingGroupsForCounties(censusData=censusData, numberOfProcesses=2)
+
+        self.assertEqual(len(parallelGroups), len(serialGroups))
+        for serialGroup, parallelGroup in zip(serialGroups, parallelGroups):
+            self.assertEqual(parallelGroup.population, serialGroup.population)
+            self.assertEqual(len(parallelGroup.children), len(serialGroup.children))
+            self.assertEqual(sorted(len(atomicBlock.allNeighbors) for atomicBlock in parallelGroup.children),
+                             sorted(len(atomicBlock.allNeighbors) for atomicBlock in serialGroup.children))
+        self.assertEqual([len(group.children) for group in parallelGroups], [11, 8])
+
+        parallelGraphObjects = parallelGroups + [atomicBlock for group in parallelGroups
+                                                 for atomicBlock in group.children]
+        parallelGraphIds = [graphObject.graphId for graphObject in parallelGraphObjects]
+        self.assertEqual(len(parallelGraphIds), len(set(parallelGraphIds)))
+        for graphObject in parallelGraphObjects:
+            self.assertIs(GraphObject.graphObjectDict[graphObject.graphId], graphObject)
+        for group in parallelGroups:
+            for atomicBlock in group.children:
+                for neighbor in atomicBlock.allNeighbors:
+                    self.assertIn(neighbor, group.children)
+
+    def test_graphIdsNeededForCounty_coversAFragmentedCounty(self):
+        censusBlockDicts = groupCensusDataByCounty(censusBlockDictsForGrid('005', 0, 6, 3, isFragmented=True))[0]
+        with GraphContext(firstGraphId=0):
+            redistrictingGroups = prepareRedistrictingGroupsForCounty(censusBlockDicts=censusBlockDicts)
+            graphIdsUsed = GraphObject.nextGraphId
+        self.assertEqual(len(redistrictingGroups), 8)
+        self.assertLessEqual(graphIdsUsed, graphIdsNeededForCounty(censusBlockDicts))
+
+    def test_prepareRedistrictingGroupsForCounties_countiesThatRunOutOfIdsArePreparedAgain(self):
+        censusData = censusBlockDictsForGrid('001', 0, 4, 3) + censusBlockDictsForGrid('003', 4, 6, 3, isFragmented=True)
+        with GraphContext():
+            self.assertIsNone(prepareRedistrictingGroupsForCountyInWorker((groupCensusDataByCounty(censusData)[1], 0, 3, True)))
+
+        serialGroups = prepareRedistrictingGroupsForCounties(censusData=censusData, numberOfProcesses=1)
+        with patch('formatData.countyStageRunner.graphIdsNeededForCounty', return_value=3):
+            parallelGroups = prepareRedistrictingGroupsForCounties(censusData=censusData, numberOfProcesses=2)
+
+        self.assertEqual([(len(group.children), group.population) for group in parallelGroups],
+                         [(len(group.children), group.population) for group in serialGroups])
+        parallelGraphIds = [graphObject.graphId for group in parallelGroups
+                            for graphObject in [group] + group.children]
+        self.assertEqual(len(parallelGraphIds), len(set(parallelGraphIds)))
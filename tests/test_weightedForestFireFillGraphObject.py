@@ -0,0 +1,126 @@
+from unittest import TestCase
+from shapely.geometry import box
+from censusData.censusBlock import CensusBlock
+from formatData.atomicBlock import AtomicBlock
+from formatData.graphContext import GraphContext
+from formatData.graphEngine import GraphEngine
+from formatData.redistrictingGroup import RedistrictingGroup, assignNeighboringRedistrictingGroupsToRedistrictingGroups
+from geographyHelper import weightedForestFireFillGraphObject, findContiguousGroupsOfGraphObjects, FireFillFrontier, \
+    CandidateShapeCache, polygonFromMultipleGeometries
+
+
+def redistrictingGroupForSquare(blockFIPS, minX, minY):
+    atomicBlock = AtomicBlock(childrenBlocks=[CensusBlock(countyFIPS='01',
+                                                          tractFIPS='01',
+                                                          blockFIPS=blockFIPS,
+                                                          population=10,
+                                                          isWater=False,
+                                                          geometry=box(minX, minY, minX + 1, minY + 1))])
+    return RedistrictingGroup(childrenBlocks=[atomicBlock])
+
+
+class TestWeightedForestFireFillGraphObject(TestCase):
+
+    def test_weightedForestFireFillGraphObject_keepsFilledShapeUpToDate(self):
+        with GraphContext():
+            redistrictingGroups = [redistrictingGroupForSquare('{0:02}'.format(row * 4 + column), column, row)
+                                   for row in range(4) for column in range(4)]
+            assignNeighboringRedistrictingGroupsToRedistrictingGroups(changedRedistrictingGroups=redistrictingGroups,
+                                                                      allNeighborCandidates=redistrictingGroups,
+                                                                      shouldAttachOrphans=False)
+            filledShapes = []
+
+            def withinSevenGroups(currentGroups, candidateGroups):
+                proposedCount = len(currentGroups) + len(candidateGroups)
+                return proposedCount <= 7, 7 - proposedCount
+
+            def westernmostFirst(currentGroupPolygon, remainingGroups, candidateGroups, fastCalculations=True):
+                filledShapes.append(currentGroupPolygon)
+                return -min(candidateGroup.geometry.bounds[0] for candidateGroup in candidateGroups)
+
+            fireFilledObjects, _ = weightedForestFireFillGraphObject(candidateObjects=redistrictingGroups,
+                                                                     startingObjects=[redistrictingGroups[0]],
+                                                                     condition=withinSevenGroups,
+                                                                     weightingScore=westernmostFirst)
+
+            self.assertEqual(len(fireFilledObjects), 7)
+            self.assertEqual(len(findContiguousGroupsOfGraphObjects(fireFilledObjects.copy())), 1)
+            # every filled square is 1x1, so the shape should grow by one unit of area per fill
+            self.assertEqual(sorted(set(filledShape.area for filledShape in filledShapes)), list(range(1, 8)))
+            self.assertTrue(filledShapes[-1].equals(box(0, 0, 1, 4).union(box(1, 0, 2, 3))))
+
+    def test_fireFillFrontier_popsHighestScoreThenLowestGraphIds(self):
+        with GraphContext():
+            redistrictingGroups = [redistrictingGroupForSquare('{0:02}'.format(column), column, 0)
+                                   for column in range(4)]
+            first, second, third, fourth = redistrictingGroups
+            scoreForGroup = {(first,): 1, (second,): 2, (third,): 2, (first, fourth): 3}
+
+            def scoresOfGroups(groups):
+                return [scoreForGroup[tuple(group)] for group in groups]
+
+            fireFillFrontier = FireFillFrontier()
+            fireFillFrontier.add([third])
+            for group in ([second], [first, fourth], [first], [second]):
+                fireFillFrontier.add(group)
+            self.assertEqual(len(fireFillFrontier), 4)
+            self.assertTrue(fireFillFrontier.containsGraphObject(fourth))
+
+            # the starting group comes out before anything is scored
+            self.assertEqual(fireFillFrontier.pop(), [third])
+            fireFillFrontier.add([third])
+            fireFillFrontier.scoreNew(scoresOfGroups)
+            self.assertEqual(fireFillFrontier.pop(), [first, fourth])
+            self.assertFalse(fireFillFrontier.containsGraphObject(fourth))
+
+            # equal scores go to the lowest graph ids
+            self.assertEqual(fireFillFrontier.pop(), [second])
+
+            # a removed group's heap entry is skipped, and rescoring reorders what's left
+            fireFillFrontier.add([second])
+            fireFillFrontier.scoreNew(scoresOfGroups)
+            fireFillFrontier.remove([third])
+            scoreForGroup[(first,)] = 5
+            fireFillFrontier.rescoreAll(scoresOfGroups)
+            self.assertEqual(fireFillFrontier.pop(), [first])
+            self.assertEqual(fireFillFrontier.pop(), [second])
+            self.assertEqual(len(fireFillFrontier), 0)
+
+    def test_candidateShapeCache_matchesPolygonFromMultipleGeometries(self):
+        with GraphContext():
+            redistrictingGroups = [redistrictingGroupForSquare('{0:02}'.format(column), column * 0.7, column * 0.3)
+                                   for column in range(5)]
+            groups = [[redistrictingGroup] for redistrictingGroup in redistrictingGroups] + \
+                     [redistrictingGroups[1:3], [redistrictingGroups[4], redistrictingGroups[0]]]
+            for useEnvelope in (True, False):
+                candidateShapeCache = CandidateShapeCache(graphEngine=GraphEngine(redistrictingGroups),
+                                                          useEnvelope=useEnvelope)
+                for _ in range(2):
+                    groupBounds = candidateShapeCache.boundsOfGroups(groups)
+                    groupCentroids = candidateShapeCache.centroidsOfGroups(groups)
+                    groupPolygons = [polygonFromMultipleGeometries(group, useEnvelope=useEnvelope) for group in groups]
+                    self.assertEqual([tuple(bounds) for bounds in groupBounds.tolist()],
+                                     [groupPolygon.bounds for groupPolygon in groupPolygons])
+                    self.assertEqual([tuple(centroid) for centroid in groupCentroids.tolist()],
+                                     [groupPolygon.centroid.coords[0] for groupPolygon in groupPolygons])
+
+    def test_fireFillFrontier_skipsStaleEntriesAndRejectsNaN(self):
+        with GraphContext():
+            first, second = [redistrictingGroupForSquare('{0:02}'.format(column), column, 0) for column in range(2)]
+            fireFillFrontier = FireFillFrontier()
+            fireFillFrontier.add([first])
+            fireFillFrontier.add([second])
+            fireFillFrontier.scoreNew(lambda groups: [1.0 for _ in groups])
+
+            # a group taken out and put back with the same score only comes out once
+            fireFillFrontier.remove([first])
+            fireFillFrontier.add([first])
+            fireFillFrontier.scoreNew(lambda groups: [1.0 for _ in groups])
+            self.assertEqual(fireFillFrontier.pop(), [first])
+            self.assertEqual(fireFillFrontier.pop(), [second])
+            with self.assertRaises(IndexError):
+                fireFillFrontier.pop()
+
+            fireFillFrontier.add([first])
+            with self.assertRaises(ValueError):
+                fireFillFrontier.scoreNew(lambda groups: [float('nan') for _ in groups])